@@ -2,12 +2,15 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 import datetime
 
-def create_app():
+def create_app(config='config.Config'):
     app = Flask(__name__)
+    # TESTING (e.g. config.TestingConfig, or TESTING=True in the environment)
+    # keeps the background threads below from starting
+    app.config.from_object(config)
     CORS(app, resources={
         r"/api/*": {
             "origins": ["http://localhost:3000", "http://127.0.0.1:3000"],
-            "methods": ["GET", "POST", "OPTIONS"],
+            "methods": ["GET", "POST", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization"]
         }
     })
@@ -15,6 +18,22 @@ def create_app():
     # Import and register blueprints
     from app.routes.api import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
+
+    if not app.config.get('TESTING'):
+        # Load the most recently used saved models before the first request
+        from app.models.model_registry import model_registry
+        model_registry.warm_load()
+
+        # Keep watchlist bars, signals and models warm in the background
+        from app.utils.prefetch import prefetch_scheduler
+        prefetch_scheduler.start()
+
+        # Run the strategy runtime over live bars for the configured and alerted symbols
+        from app.utils.event_runtime import strategy_runtime, runtime_symbols, PollingBarSource
+        from app.utils.event_runtime import STRATEGY_RUNTIME_INTERVAL
+        from app.utils.alerts import alert_engine
+        live_symbols = lambda: sorted(set(runtime_symbols()) | alert_engine.symbols())
+        strategy_runtime.start(PollingBarSource(live_symbols, STRATEGY_RUNTIME_INTERVAL))
     
     # API-specific 404 handler - return JSON instead of HTML
     @app.errorhandler(404)
@@ -43,6 +62,15 @@ def create_app():
                 "/api/chat",
                 "/api/ping",
                 "/api/stock-data",
+                "/api/stock-data/batch",
+                "/api/backtest",
+                "/api/walk-forward",
+                "/api/screener",
+                "/api/portfolio-backtest",
+                "/api/runtime/events",
+                "/api/alerts",
+                "/api/prefetch/status",
+                "/api/models",
                 "/exchange-rate"
             ]
         })
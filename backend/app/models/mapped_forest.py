@@ -0,0 +1,133 @@
+import os
+import copy
+import numpy as np
+from sklearn.metrics import r2_score
+from sklearn.tree._tree import Tree, NODE_DTYPE
+
+
+def forest_arrays(forest):
+    """Flatten a fitted RandomForestRegressor into node, value and offset arrays.
+
+    Returns:
+        tuple: (shell, nodes, values, offsets, max_depths) where ``shell`` is
+        a copy of the forest whose estimators have no ``tree_``, ``nodes`` is
+        every tree's NODE_DTYPE records back to back, ``values`` the leaf
+        values, and ``offsets`` the first node of each tree (plus the total)
+    """
+    if isinstance(forest, MappedForest):
+        return forest.shell, forest.nodes, forest.values, forest.offsets, forest.max_depths
+    shell = copy.copy(forest)
+    shell.estimators_ = []
+    nodes, values, max_depths = [], [], []
+    for estimator in forest.estimators_:
+        state = estimator.tree_.__getstate__()
+        nodes.append(state['nodes'])
+        values.append(state['values'][:, 0, 0])
+        max_depths.append(state['max_depth'])
+        estimator = copy.copy(estimator)
+        del estimator.tree_
+        shell.estimators_.append(estimator)
+    offsets = np.concatenate([[0], np.cumsum([len(n) for n in nodes])]).astype(np.int64)
+    # Keep scikit-learn's padded record layout, which a plain concatenate would pack
+    nodes = np.concatenate(nodes, dtype=NODE_DTYPE)
+    return shell, nodes, np.concatenate(values).astype(np.float64), offsets, np.array(max_depths, dtype=np.int64)
+
+
+def forest_nbytes(forest):
+    """Memory held by a forest's tree arrays."""
+    if isinstance(forest, MappedForest):
+        return forest.nodes.nbytes + forest.values.nbytes
+    return sum(estimator.tree_.node_count * NODE_DTYPE.itemsize + estimator.tree_.value.nbytes
+               for estimator in getattr(forest, 'estimators_', []))
+
+
+def save_arrays(prefix, nodes, values):
+    """Write node and value blocks as ``.npy`` files that can be memory mapped.
+
+    Returns:
+        tuple: (nodes file name, values file name), relative to the prefix's directory
+    """
+    names = []
+    for suffix, array in (('nodes', nodes), ('values', values)):
+        path = f"{prefix}.{suffix}.npy"
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+        names.append(os.path.basename(path))
+    return tuple(names)
+
+
+class MappedForest:
+    """RandomForestRegressor whose trees stay in memory-mapped arrays.
+
+    scikit-learn's ``Tree`` copies its nodes into private memory when it
+    is unpickled, so a loaded forest cannot share pages between worker
+    processes. This predictor walks the trees directly on read-only
+    ``np.memmap`` node and value arrays instead: all samples descend all
+    trees at once, one level per step. Predictions match the forest's
+    (features are compared as float32, like scikit-learn does).
+    ``to_sklearn`` rebuilds a regular forest, e.g. to grow more trees.
+    """
+
+    def __init__(self, shell, nodes, values, offsets, max_depths):
+        self.shell = shell
+        self.nodes = nodes
+        self.values = values
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.max_depths = np.asarray(max_depths, dtype=np.int64)
+
+    @classmethod
+    def load(cls, directory, shell, nodes_name, values_name, offsets, max_depths, mmap_mode='r'):
+        nodes = np.load(os.path.join(directory, nodes_name), mmap_mode=mmap_mode)
+        values = np.load(os.path.join(directory, values_name), mmap_mode=mmap_mode)
+        return cls(shell, nodes, values, offsets, max_depths)
+
+    @property
+    def n_estimators(self):
+        return len(self.offsets) - 1
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        starts = self.offsets[:-1]
+        left = self.nodes['left_child']
+        right = self.nodes['right_child']
+        feature = self.nodes['feature']
+        threshold = self.nodes['threshold']
+
+        rows = np.arange(len(X))[:, None]
+        node = np.repeat(starts[None, :], len(X), axis=0)
+        for _ in range(int(self.max_depths.max(initial=0))):
+            child = left[node]
+            leaf = child == -1
+            if leaf.all():
+                break
+            go_left = X[rows, np.where(leaf, 0, feature[node])] <= threshold[node]
+            node = np.where(leaf, node, np.where(go_left, child, right[node]) + starts)
+
+        # Accumulate tree by tree, in the order the forest does
+        prediction = np.zeros(len(X))
+        for tree in range(self.n_estimators):
+            prediction += self.values[node[:, tree]]
+        return prediction / self.n_estimators
+
+    def score(self, X, y):
+        return r2_score(y, self.predict(X))
+
+    def to_sklearn(self):
+        """Rebuild a RandomForestRegressor (trees copied into private memory)."""
+        forest = copy.copy(self.shell)
+        forest.estimators_ = []
+        for tree_id, estimator in enumerate(self.shell.estimators_):
+            start, end = self.offsets[tree_id], self.offsets[tree_id + 1]
+            tree = Tree(estimator.n_features_in_, np.ones(1, dtype=np.intp), estimator.n_outputs_)
+            tree.__setstate__({
+                'max_depth': int(self.max_depths[tree_id]),
+                'node_count': int(end - start),
+                'nodes': np.array(self.nodes[start:end]),
+                'values': np.array(self.values[start:end]).reshape(-1, 1, 1),
+            })
+            estimator = copy.copy(estimator)
+            estimator.tree_ = tree
+            forest.estimators_.append(estimator)
+        return forest
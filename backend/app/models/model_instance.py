@@ -1,14 +1,16 @@
 from app.models.sk_models import SKModel
+from app.models.model_registry import model_registry
 
 # Create a singleton instance of the model
 sk_model = SKModel()
 sk_model_trained = False
 
 def reset_model():
-    """Reset the model to untrained state."""
+    """Reset the model to untrained state, dropping every registered model."""
     global sk_model, sk_model_trained
     sk_model = SKModel()
     sk_model_trained = False
+    model_registry.clear(remove_saved=True)
     return {
         'status': 'success',
         'message': 'Model has been reset to untrained state'
@@ -0,0 +1,267 @@
+import os
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+from app.models.sk_models import SKModel
+from app.models.model_store import ModelStore
+
+# Trained models kept in memory, and the memory they may use together
+MODEL_REGISTRY_MAX_ENTRIES = int(os.environ.get('MODEL_REGISTRY_MAX_ENTRIES') or 32)
+MODEL_REGISTRY_MAX_BYTES = int(os.environ.get('MODEL_REGISTRY_MAX_BYTES') or 512 * 1024 * 1024)
+# Seconds after which a model is retrained even without new bars
+MODEL_MAX_AGE_SECONDS = float(os.environ.get('MODEL_MAX_AGE_SECONDS') or 6 * 3600)
+# Most recently used saved models loaded when the app starts
+MODEL_WARM_LOAD = int(os.environ.get('MODEL_WARM_LOAD') or 8)
+
+# Model classes selectable with the API's ``model`` parameter
+MODEL_TYPES = {
+    'default': SKModel,
+    'random_forest': SKModel,
+}
+
+
+def model_nbytes(model):
+    """Approximate memory held by a trained model, from its arrays' sizes."""
+    if hasattr(model, 'nbytes'):
+        return model.nbytes()
+    return sum(value.nbytes for value in vars(model).values() if isinstance(value, np.ndarray))
+
+
+class RegisteredModel:
+    """A trained model and the bars it was trained on."""
+
+    def __init__(self, key, model, last_bar, bars, nbytes, trained_at=None):
+        self.key = key
+        self.model = model
+        self.last_bar = last_bar
+        self.bars = bars
+        self.nbytes = nbytes
+        self.trained_at = time.time() if trained_at is None else trained_at
+        self.hits = 0
+
+    def age(self):
+        return time.time() - self.trained_at
+
+    def status(self):
+        symbol, interval, timeframe, model_type = self.key
+        return {
+            'symbol': symbol,
+            'interval': interval,
+            'timeframe': timeframe,
+            'model': model_type,
+            'last_bar': self.last_bar.isoformat() if self.last_bar is not None else None,
+            'bars': self.bars,
+            'bytes': self.nbytes,
+            'age_seconds': round(self.age(), 1),
+            'hits': self.hits,
+        }
+
+
+class ModelRegistry:
+    """Trained models keyed by (symbol, interval, timeframe, model type).
+
+    ``get`` returns the registered model while it was trained on the same
+    bars and is younger than ``max_age``. When only new bars arrived, a
+    copy of the model is updated incrementally (see ``SKModel.update``);
+    otherwise a new one is trained.
+    Concurrent requests for a key being trained wait for that training
+    instead of starting their own. Least recently used models are evicted
+    beyond ``max_entries`` or once their combined size exceeds
+    ``max_bytes``.
+
+    With a ``store``, every trained model is also saved to disk. A key
+    missing from memory (evicted, or after a restart) is loaded from its
+    artifact when that was trained on the same bars, and ``warm_load``
+    fills the registry with the most recently used artifacts.
+    """
+
+    def __init__(self, max_entries=MODEL_REGISTRY_MAX_ENTRIES, max_bytes=MODEL_REGISTRY_MAX_BYTES,
+                 max_age=MODEL_MAX_AGE_SECONDS, model_types=None, store=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.model_types = model_types or MODEL_TYPES
+        self.store = store
+        self.entries = OrderedDict()
+        self.trainings = 0
+        self.updates = 0
+        self._lock = threading.Lock()
+        # Per-key training locks and how many requests hold or wait on them
+        self._key_locks = {}
+
+    def _key(self, symbol, interval, timeframe, model_type):
+        if model_type not in self.model_types:
+            model_type = 'default'
+        return (symbol.upper(), interval, timeframe, model_type)
+
+    def _fresh(self, entry, data):
+        return (entry is not None and entry.last_bar == data.index[-1] and entry.bars == len(data)
+                and entry.age() < self.max_age)
+
+    def _updatable(self, entry, data):
+        # Same bars plus newer ones, and a full training recent enough
+        return (entry is not None and hasattr(entry.model, 'update') and entry.age() < self.max_age
+                and entry.last_bar in data.index and data.index[-1] > entry.last_bar)
+
+    def lookup(self, symbol, interval, timeframe, model_type='default'):
+        """Return the registered entry for a key, or None (no training)."""
+        with self._lock:
+            return self.entries.get(self._key(symbol, interval, timeframe, model_type))
+
+    def get(self, symbol, interval, timeframe, data, model_type='default'):
+        """Return a model trained on ``data``, training one only if needed.
+
+        Args:
+            symbol: Symbol the bars belong to
+            interval: API interval of the bars
+            timeframe: API timeframe of the bars
+            data: Bar DataFrame the model must have been trained on
+            model_type: Key of MODEL_TYPES; unknown types use 'default'
+
+        Returns:
+            The trained model
+        """
+        key = self._key(symbol, interval, timeframe, model_type)
+        with self._lock:
+            entry = self.entries.get(key)
+            if self._fresh(entry, data):
+                self.entries.move_to_end(key)
+                entry.hits += 1
+            else:
+                entry = None
+                key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+                key_lock[1] += 1
+        if entry is not None:
+            if self.store is not None:
+                self.store.touch(key)
+            return entry.model
+
+        try:
+            with key_lock[0]:
+                return self._get_locked(key, symbol, interval, timeframe, data)
+        finally:
+            with self._lock:
+                # The last request using the lock removes it
+                key_lock[1] -= 1
+                if key_lock[1] == 0:
+                    del self._key_locks[key]
+
+    def _get_locked(self, key, symbol, interval, timeframe, data):
+        """Body of ``get`` for a key whose training lock is held."""
+        # Another request may have trained this key while we waited
+        with self._lock:
+            entry = self.entries.get(key)
+            if self._fresh(entry, data):
+                self.entries.move_to_end(key)
+                entry.hits += 1
+                return entry.model
+
+        previous = entry or self._load(key)
+        if self._fresh(previous, data):
+            print(f"Loaded saved {key[3]} model for {key[0]} ({key[1]}, {key[2]})")
+            self._register(previous)
+            return previous.model
+
+        if self._updatable(previous, data):
+            print(f"Updating {key[3]} model for {key[0]} ({key[1]}, {key[2]}) with new bars")
+            # Update a copy so requests still using the old model are unaffected
+            model = previous.model.copy()
+            incremental = model.update(data).get('mode') == 'incremental'
+            # An incremental update keeps the last full training time, so max_age still applies
+            entry = RegisteredModel(key, model, data.index[-1], len(data), model_nbytes(model),
+                                    previous.trained_at if incremental else None)
+            with self._lock:
+                if incremental:
+                    self.updates += 1
+                else:
+                    self.trainings += 1
+            self._save_and_register(entry)
+            return model
+
+        print(f"Training {key[3]} model for {key[0]} ({key[1]}, {key[2]}) on {len(data)} bars")
+        model = self.model_types[key[3]]()
+        model.train(data)
+        self.put(symbol, interval, timeframe, model, data, key[3])
+        return model
+
+    def put(self, symbol, interval, timeframe, model, data, model_type='default'):
+        """Register a model trained elsewhere (e.g. by the prefetch scheduler) on ``data``."""
+        key = self._key(symbol, interval, timeframe, model_type)
+        entry = RegisteredModel(key, model, data.index[-1], len(data), model_nbytes(model))
+        with self._lock:
+            self.trainings += 1
+        self._save_and_register(entry)
+        return entry
+
+    def _save_and_register(self, entry):
+        if self.store is not None:
+            self.store.save(entry.key, entry.model, {'last_bar': entry.last_bar, 'bars': entry.bars,
+                                                     'trained_at': entry.trained_at})
+        self._register(entry)
+
+    def _load(self, key, path=None):
+        """Registry entry for a saved artifact, or None."""
+        if self.store is None or key[3] not in self.model_types:
+            return None
+        model_class = self.model_types[key[3]]
+        loaded = self.store.load_path(path, model_class) if path else self.store.load(key, model_class)
+        if loaded is None:
+            return None
+        model, metadata = loaded
+        key = tuple(metadata.get('key', key))
+        return RegisteredModel(key, model, metadata.get('last_bar'), metadata.get('bars'),
+                               model_nbytes(model), metadata.get('trained_at'))
+
+    def _register(self, entry):
+        with self._lock:
+            self.entries[entry.key] = entry
+            self.entries.move_to_end(entry.key)
+            self._evict()
+
+    def warm_load(self, limit=MODEL_WARM_LOAD):
+        """Load the ``limit`` most recently used saved models; returns how many loaded."""
+        if self.store is None:
+            return 0
+        entries = []
+        for path in self.store.hottest(min(limit, self.max_entries)):
+            key = self.store.key(path)
+            entry = self._load(key, path) if key is not None else None
+            if entry is not None and entry.age() < self.max_age:
+                entries.append(entry)
+        # Coldest first, so the hottest model ends up most recently used
+        for entry in reversed(entries):
+            self._register(entry)
+        print(f"Warm-loaded {len(entries)} saved models")
+        return len(entries)
+
+    def _evict(self):
+        # Least recently used first; the newest model is always kept
+        total = sum(entry.nbytes for entry in self.entries.values())
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or total > self.max_bytes):
+            key, entry = self.entries.popitem(last=False)
+            total -= entry.nbytes
+            print(f"Evicted model for {key[0]} ({key[1]}, {key[2]}, {key[3]})")
+
+    def clear(self, remove_saved=False):
+        with self._lock:
+            if remove_saved and self.store is not None:
+                self.store.clear()
+            self.entries.clear()
+
+    def status(self):
+        with self._lock:
+            return {
+                'models': [entry.status() for entry in self.entries.values()],
+                'bytes': sum(entry.nbytes for entry in self.entries.values()),
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'trainings': self.trainings,
+                'updates': self.updates,
+                'store': self.store.root if self.store is not None else None,
+            }
+
+
+# Shared registry used by the prediction endpoints and the prefetch scheduler,
+# saving trained models to the model store
+model_registry = ModelRegistry(store=ModelStore())
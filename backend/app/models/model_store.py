@@ -0,0 +1,82 @@
+import os
+import re
+import glob
+import time
+import traceback
+import joblib
+from app.models.sk_models import MODEL_ARTIFACT_VERSION
+
+# Directory of saved model artifacts
+MODEL_STORE_DIR = os.environ.get('MODEL_STORE_DIR') or os.path.join('data', 'models')
+
+
+class ModelStore:
+    """Versioned model artifacts on disk, one file per registry key.
+
+    Files are named after the key and the artifact version, so artifacts
+    of an older layout are simply never read; the key itself (including
+    the model type) is kept in each artifact's metadata. A file's
+    modification time records when its model was last used, which ranks
+    the hottest models for warm loading.
+    """
+
+    def __init__(self, root=MODEL_STORE_DIR):
+        self.root = root
+
+    def path(self, key):
+        name = '_'.join(re.sub(r'[^A-Za-z0-9.=-]', '-', str(part)) for part in key)
+        return os.path.join(self.root, f"{name}.v{MODEL_ARTIFACT_VERSION}.joblib")
+
+    def save(self, key, model, metadata):
+        """Save ``model`` for ``key``; models without a ``save`` method are skipped."""
+        if not hasattr(model, 'save'):
+            return False
+        try:
+            model.save(self.path(key), {**metadata, 'key': list(key)})
+            return True
+        except Exception:
+            traceback.print_exc()
+            return False
+
+    def load(self, key, model_class):
+        """Load the artifact of ``key``; returns (model, metadata) or None."""
+        return self.load_path(self.path(key), model_class)
+
+    def load_path(self, path, model_class):
+        if not os.path.exists(path) or not hasattr(model_class, 'load'):
+            return None
+        try:
+            return model_class.load(path)
+        except Exception as e:
+            print(f"Ignoring model artifact {path}: {e}")
+            return None
+
+    def touch(self, key):
+        """Mark the artifact of ``key`` as just used."""
+        now = time.time_ns()
+        try:
+            os.utime(self.path(key), ns=(now, now))
+        except OSError:
+            pass
+
+    def hottest(self, limit):
+        """Paths of the ``limit`` (None: all) most recently used artifacts, hottest first."""
+        pattern = os.path.join(self.root, f"*.v{MODEL_ARTIFACT_VERSION}.joblib")
+        return sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)[:limit]
+
+    def key(self, path):
+        """Registry key saved in an artifact's metadata, or None if unreadable."""
+        try:
+            key = joblib.load(path, mmap_mode='r')['metadata']['key']
+        except Exception as e:
+            print(f"Ignoring model artifact {path}: {e}")
+            return None
+        return tuple(key)
+
+    def clear(self):
+        """Delete every saved artifact of the current version, with its array files."""
+        for path in glob.glob(os.path.join(self.root, f"*.v{MODEL_ARTIFACT_VERSION}.joblib*")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
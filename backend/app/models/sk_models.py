@@ -4,6 +4,25 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import math
+import os
+import copy
+import glob
+import time
+import joblib
+import sklearn
+from sklearn.base import clone
+from app.models.mapped_forest import MappedForest, forest_arrays, forest_nbytes, save_arrays
+from app.utils.bar_file import BarView
+from app.utils.indicators import sma, returns, volatility
+
+# Bumped whenever the layout of saved model artifacts changes
+MODEL_ARTIFACT_VERSION = 2
+# Trees replaced by each incremental update, and the recent rows they are fitted on
+MODEL_INCREMENTAL_TREES = int(os.environ.get('MODEL_INCREMENTAL_TREES') or 10)
+MODEL_INCREMENTAL_WINDOW = int(os.environ.get('MODEL_INCREMENTAL_WINDOW') or 252)
+# Fraction of a feature's fitted range it may move beyond before the scaler is refit
+MODEL_SCALER_DRIFT = float(os.environ.get('MODEL_SCALER_DRIFT') or 0.05)
+
 
 class SKModel:
     def __init__(self, n_estimators=100, max_depth=10, random_state=42):
@@ -24,10 +43,16 @@ class SKModel:
         self.feature_columns = None
         self.target_column = 'Close'
         self.trained = False
+        self.metrics = None
+        # Incremental updates so far; varies the seed of each update's new trees
+        self.updates = 0
  
     def _create_features(self, data):
-        """Create time series features from the data."""
-        df = data.copy()
+        """Create time series features from the data.
+
+        Accepts a DataFrame or a zero-copy BarView read from a bar file.
+        """
+        df = data.to_frame() if isinstance(data, BarView) else data.copy()
         
         # Fix DataFrame format issues (sometimes yfinance returns multi-level columns)
         if isinstance(df.columns, pd.MultiIndex):
@@ -65,29 +90,30 @@ class SKModel:
         df = df[df[self.target_column].notna()]
         
         # Price features (with safe handling of NaN and inf values)
-        df['return_1d'] = df[self.target_column].pct_change(1)
-        df['return_5d'] = df[self.target_column].pct_change(5)
-        df['return_14d'] = df[self.target_column].pct_change(14)
+        close = df[self.target_column]
+        df['return_1d'] = returns(close, 1)
+        df['return_5d'] = returns(close, 5)
+        df['return_14d'] = returns(close, 14)
         
         # Moving averages - ensure min_periods to avoid NaNs
-        df['sma_5'] = df[self.target_column].rolling(window=5, min_periods=1).mean()
-        df['sma_10'] = df[self.target_column].rolling(window=10, min_periods=1).mean()
-        df['sma_20'] = df[self.target_column].rolling(window=20, min_periods=1).mean()
-        df['sma_50'] = df[self.target_column].rolling(window=50, min_periods=1).mean()
+        df['sma_5'] = sma(close, 5, min_periods=1)
+        df['sma_10'] = sma(close, 10, min_periods=1)
+        df['sma_20'] = sma(close, 20, min_periods=1)
+        df['sma_50'] = sma(close, 50, min_periods=1)
         
         # Price relative to moving averages - replace div by zero with NaN
         df['price_sma5_ratio'] = df[self.target_column] / df['sma_5'].replace(0, np.nan)
         df['price_sma20_ratio'] = df[self.target_column] / df['sma_20'].replace(0, np.nan)
         
         # Volatility
-        df['volatility_14d'] = df['return_1d'].rolling(window=14, min_periods=1).std()
-        df['volatility_30d'] = df['return_1d'].rolling(window=30, min_periods=1).std()
+        df['volatility_14d'] = volatility(close, 14, min_periods=1)
+        df['volatility_30d'] = volatility(close, 30, min_periods=1)
         
         # Volume features
         if 'Volume' in df.columns:
-            df['volume_change'] = df['Volume'].pct_change(1)
-            df['volume_ma5'] = df['Volume'].rolling(window=5, min_periods=1).mean()
-            df['volume_ma10'] = df['Volume'].rolling(window=10, min_periods=1).mean()
+            df['volume_change'] = returns(df['Volume'], 1)
+            df['volume_ma5'] = sma(df['Volume'], 5, min_periods=1)
+            df['volume_ma10'] = sma(df['Volume'], 10, min_periods=1)
             # Avoid division by zero in volume ratio
             df['volume_ratio'] = df['Volume'] / df['volume_ma10'].replace(0, np.nan)
         
@@ -157,7 +183,7 @@ class SKModel:
                                        key=lambda x: x[1], 
                                        reverse=True))
         
-        return {
+        self.metrics = {
             'train_score': train_score,
             'test_score': test_score,
             'mse': mse,
@@ -167,6 +193,182 @@ class SKModel:
             'accuracy': self.model.score(X_test, y_test),
             'feature_importance': sorted_importance
         }
+        return self.metrics
+
+    def copy(self):
+        """Copy that can be updated without touching this model's trees list.
+
+        Fitted trees and the scaler are shared; ``update`` only replaces them.
+        """
+        model = copy.copy(self)
+        model.model = copy.copy(self.model)
+        if hasattr(self.model, 'estimators_'):
+            model.model.estimators_ = list(self.model.estimators_)
+        return model
+
+    def scaler_drifted(self, X, tolerance=MODEL_SCALER_DRIFT):
+        """Whether features in ``X`` leave the fitted scaler's range by more than ``tolerance``."""
+        span = np.where(self.scaler.data_range_ > 0, self.scaler.data_range_, 1.0)
+        below = (self.scaler.data_min_ - X.min(axis=0)) / span
+        above = (X.max(axis=0) - self.scaler.data_max_) / span
+        return bool(np.any(below > tolerance) or np.any(above > tolerance))
+
+    def update(self, data, new_trees=MODEL_INCREMENTAL_TREES, window=MODEL_INCREMENTAL_WINDOW,
+               drift_tolerance=MODEL_SCALER_DRIFT):
+        """Keep the forest current with a fraction of a full retrain.
+
+        ``new_trees`` trees are grown (with warm_start) on the most recent
+        ``window`` rows only, and the same number of the oldest trees are
+        retired, so the forest keeps its size and gradually follows new
+        bars. When recent features leave the fitted scaler's range the
+        scaled inputs of the existing trees are no longer comparable, so
+        the model is fully retrained instead.
+
+        Args:
+            data: DataFrame with OHLCV price data, including the new bars
+            new_trees: Trees added and retired
+            window: Most recent training rows the new trees are fitted on
+            drift_tolerance: Allowed feature drift, as a fraction of its fitted range
+
+        Returns:
+            Dictionary with the update metrics, 'mode' ('incremental' or
+            'full'), and the trees added and retired or the 'reason' for a
+            full retrain
+        """
+        if not self.trained:
+            return {**self.train(data), 'mode': 'full'}
+        if isinstance(self.model, MappedForest):
+            # Growing trees needs a regular forest; the mapped arrays stay untouched
+            self.model = self.model.to_sklearn()
+
+        df = self._create_features(data)
+        if not set(self.feature_columns).issubset(df.columns):
+            reason = "features missing from the new bars"
+        else:
+            X = df[self.feature_columns].values[-window:]
+            y = df['target_1d'].values[-window:]
+            if len(X) < 2 * new_trees:
+                reason = f"only {len(X)} recent rows for {new_trees} new trees"
+            elif self.scaler_drifted(X, drift_tolerance):
+                reason = "feature ranges drifted"
+            else:
+                reason = None
+        if reason is not None:
+            print(f"Retraining the full model: {reason}")
+            return {**self._retrain(data), 'mode': 'full', 'reason': reason}
+
+        X_scaled = self.scaler.transform(X)
+        forest = self.model
+        retired = min(new_trees, len(forest.estimators_))
+        # The forest's seed draws the same new-tree seeds for the same forest
+        # size, so each update offsets it to grow different trees
+        seed = forest.random_state
+        self.updates += 1
+        if isinstance(seed, (int, np.integer)):
+            forest.set_params(random_state=int(seed + self.updates) % 2 ** 32)
+        forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + new_trees)
+        forest.fit(X_scaled, y)
+        forest.set_params(random_state=seed)
+        forest.estimators_ = forest.estimators_[retired:]
+        forest.set_params(warm_start=False, n_estimators=len(forest.estimators_))
+
+        y_pred = forest.predict(X_scaled)
+        mse = mean_squared_error(y, y_pred)
+        importance = dict(zip(self.feature_columns, forest.feature_importances_))
+        self.metrics = {
+            'mse': mse,
+            'rmse': math.sqrt(mse),
+            'mae': mean_absolute_error(y, y_pred),
+            'r2': r2_score(y, y_pred),
+            'feature_importance': dict(sorted(importance.items(), key=lambda x: x[1], reverse=True)),
+        }
+        return {**self.metrics, 'mode': 'incremental', 'trees_added': new_trees, 'trees_retired': retired}
+
+    def _retrain(self, data):
+        # Fresh scaler and forest, so a copy sharing the fitted ones is untouched
+        self.scaler = clone(self.scaler)
+        self.model = clone(self.model).set_params(warm_start=False)
+        return self.train(data)
+
+    def nbytes(self):
+        """Memory held by the forest's tree arrays."""
+        return forest_nbytes(self.model)
+
+    def save(self, path, metadata=None):
+        """Write the trained model to a versioned artifact.
+
+        The tree node and value arrays of the whole forest go to two
+        ``.npy`` files next to ``path`` (named with a fresh generation, so
+        readers still mapping the previous ones are unaffected); ``path``
+        itself holds the forest without its trees, the fitted scaler, the
+        feature columns, the training metrics and the array file names.
+        It is written last, replacing the previous artifact atomically.
+
+        Args:
+            path: Artifact file path
+            metadata: Optional dict stored alongside (e.g. the bars trained on)
+        """
+        if not self.trained:
+            raise ValueError("Model not trained yet. Call train() first.")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        shell, nodes, values, offsets, max_depths = forest_arrays(self.model)
+        nodes_name, values_name = save_arrays(f"{path}.{time.time_ns()}", nodes, values)
+        previous = glob.glob(f"{glob.escape(path)}.*.npy")
+        artifact = {
+            'version': MODEL_ARTIFACT_VERSION,
+            'sklearn_version': sklearn.__version__,
+            'forest': shell,
+            'nodes': nodes_name,
+            'values': values_name,
+            'offsets': offsets,
+            'max_depths': max_depths,
+            'scaler': self.scaler,
+            'feature_columns': self.feature_columns,
+            'target_column': self.target_column,
+            'metrics': self.metrics,
+            'updates': self.updates,
+            'metadata': metadata or {},
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(artifact, tmp_path)
+        os.replace(tmp_path, path)
+
+        # Mapped pages of replaced generations stay valid for their readers
+        for old in previous:
+            if os.path.basename(old) not in (nodes_name, values_name):
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Load a model saved with ``save``.
+
+        The trees are memory mapped read-only by default and predicted
+        from in place (see MappedForest), so worker processes loading the
+        same artifact share the forest's pages through the OS cache.
+
+        Returns:
+            tuple: (SKModel, metadata dict)
+        """
+        artifact = joblib.load(path, mmap_mode=mmap_mode)
+        if artifact.get('version') != MODEL_ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported model artifact version {artifact.get('version')} in {path}")
+        if artifact.get('sklearn_version') != sklearn.__version__:
+            raise ValueError(f"Model artifact {path} was saved with scikit-learn "
+                             f"{artifact.get('sklearn_version')}, running {sklearn.__version__}")
+        model = cls.__new__(cls)
+        model.model = MappedForest.load(os.path.dirname(path), artifact['forest'], artifact['nodes'],
+                                        artifact['values'], artifact['offsets'], artifact['max_depths'],
+                                        mmap_mode)
+        model.scaler = artifact['scaler']
+        model.feature_columns = artifact['feature_columns']
+        model.target_column = artifact['target_column']
+        model.metrics = artifact['metrics']
+        model.updates = artifact.get('updates', 0)
+        model.trained = True
+        return model, artifact['metadata']
     
     def predict(self, data):
         """Make predictions using the trained RandomForest model with improved error handling."""
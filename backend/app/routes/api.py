@@ -7,12 +7,25 @@ import traceback
 from datetime import datetime
 # Import utility functions
 from app.utils.trading_strategy import fetch_stock_data, fetch_exchange_rate
-from app.utils.trading_strategy import momentum_trading_strategy
+from app.utils.trading_strategy import fetch_stock_data_batch
+from app.utils.trading_strategy import momentum_trading_strategy, momentum_trading_strategy_grouped
 # Import models
 from app.models.model_instance import sk_model, sk_model_trained
 from app.models.model_instance import reset_model
+from app.models.model_registry import model_registry
 from app.utils.ai_utils import InjectiveChatAgent
 from app.utils.json_utils import clean_for_json
+from app.utils.prefetch import prefetch_scheduler
+from app.utils.streaming_signals import streaming_signals, stream_key
+from app.utils.backtest import backtest_signals, PERIODS_PER_YEAR
+from app.utils.backtest import BACKTEST_FEE_BPS, BACKTEST_SLIPPAGE_BPS, BACKTEST_INITIAL_CAPITAL
+from app.utils.walk_forward import walk_forward_optimize
+from app.utils.screener import screen_universe
+from app.utils.portfolio import backtest_portfolio, PORTFOLIO_REBALANCE
+from app.utils.event_runtime import strategy_runtime
+from app.utils.alerts import alert_engine
+from app.utils.risk import risk_metrics, risk_summary, RISK_BENCHMARK
+from app.utils.monte_carlo import forecast_bands, horizons_for, MONTE_CARLO_BUDGET_MS
 
 # Import model from model_instance instead of app.config
 from app.models.model_instance import sk_model, sk_model_trained
@@ -82,15 +95,20 @@ def stock_data_endpoint():
             symbol = data.get('symbol', 'NVDA')
             timeframe = data.get('timeframe', '1Y') 
             interval = data.get('interval', 'day')
+            include_risk = str(data.get('include_risk', 'false')).lower() == 'true'
+            benchmark = data.get('benchmark', RISK_BENCHMARK)
         else: 
             symbol = request.args.get('symbol', 'NVDA')
             timeframe = request.args.get('timeframe', '1Y')
             interval = request.args.get('interval', 'day')
+            include_risk = request.args.get('include_risk', 'false').lower() == 'true'
+            benchmark = request.args.get('benchmark', RISK_BENCHMARK)
         print(f"Fetching stock data for {symbol} - {timeframe} - {interval}")
         
-        # Fetch data using your existing functions
-        data = fetch_stock_data(symbol, timeframe, interval)
-        signals = momentum_trading_strategy(data)
+        # Charts accept slightly stale bars for an instant answer
+        data = fetch_stock_data(symbol, timeframe, interval, stale_ok=True)
+        # Dashboards poll this endpoint; only bars added since the last poll are processed
+        signals = streaming_signals.update(stream_key(symbol, timeframe, interval), data)
         
         # Create response with the exact field names expected by frontend
         response = {
@@ -103,6 +121,13 @@ def stock_data_endpoint():
             'long_mavg': signals['long_mavg'].tolist(),  
             'positions': signals['positions'].tolist()  
         }
+
+        if include_risk:
+            risk = _risk_for(data, symbol, timeframe, interval, benchmark)
+            response['risk'] = risk_summary(risk, PERIODS_PER_YEAR.get(interval, 252))
+            response['var_historical'] = risk['var_historical'].tolist()
+            response['rolling_sharpe'] = risk['sharpe'].tolist()
+            response['drawdown'] = risk['drawdown'].tolist()
         
         # Clean any NaN or non-JSON serializable values
         clean_for_json(response)
@@ -115,12 +140,272 @@ def stock_data_endpoint():
         }), 500
 
 
+def _risk_for(data, symbol, timeframe, interval, benchmark):
+    """Cached risk metrics for chart bars, with beta when the benchmark can be fetched"""
+    benchmark_data = None
+    if benchmark and benchmark.upper() != symbol.upper():
+        try:
+            benchmark_data = fetch_stock_data(benchmark, timeframe, interval, stale_ok=True)
+        except Exception as e:
+            print(f"Could not fetch benchmark {benchmark}: {str(e)}")
+    return risk_metrics(data, benchmark_data, periods_per_year=PERIODS_PER_YEAR.get(interval, 252))
+
+
+@api_bp.route("/stock-data/batch", methods=["POST"])
+@cross_origin()
+def stock_data_batch_endpoint():
+    """Endpoint to fetch chart data for a list of symbols in one request"""
+    try:
+        if request.is_json:
+            data = request.get_json()
+            symbols = data.get('symbols', [])
+            timeframe = data.get('timeframe', '1Y')
+            interval = data.get('interval', 'day')
+        else:
+            symbols = request.args.getlist('symbols')
+            timeframe = request.args.get('timeframe', '1Y')
+            interval = request.args.get('interval', 'day')
+
+        if not symbols:
+            return jsonify({
+                'error': 'Missing symbols parameter',
+                'message': 'Please provide a list of symbols'
+            }), 400
+        print(f"Fetching batch stock data for {symbols} - {timeframe} - {interval}")
+
+        # One grouped download and one vectorized signal pass for all symbols
+        frames, errors = fetch_stock_data_batch(symbols, timeframe, interval)
+        signals = momentum_trading_strategy_grouped(frames)
+
+        results = {}
+        for symbol, frame in frames.items():
+            results[symbol] = {
+                'price': frame['Close'].tolist(),
+                'dates': frame.index.strftime('%Y-%m-%d').tolist(),
+                'short_mavg': signals[symbol]['short_mavg'].tolist(),
+                'long_mavg': signals[symbol]['long_mavg'].tolist(),
+                'positions': signals[symbol]['positions'].tolist()
+            }
+
+        response = {
+            'timeframe': timeframe,
+            'interval': interval,
+            'results': results,
+            'errors': errors
+        }
+
+        clean_for_json(response)
+        return jsonify(response)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'error': str(e),
+            'message': 'Failed to fetch batch stock data'
+        }), 500
+
+
+@api_bp.route("/backtest", methods=["POST"])
+@cross_origin()
+def backtest_endpoint():
+    """Endpoint to backtest the crossover strategy with fees and slippage"""
+    try:
+        params = request.get_json() if request.is_json else request.args
+        symbol = params.get('symbol', 'NVDA')
+        timeframe = params.get('timeframe', '1Y')
+        interval = params.get('interval', 'day')
+        short_window = int(params.get('short_window', 5))
+        long_window = int(params.get('long_window', 20))
+        fee_bps = float(params.get('fee_bps', BACKTEST_FEE_BPS))
+        slippage_bps = float(params.get('slippage_bps', BACKTEST_SLIPPAGE_BPS))
+        initial_capital = float(params.get('initial_capital', BACKTEST_INITIAL_CAPITAL))
+        print(f"Backtesting {symbol} - {timeframe} - {interval} ({short_window}/{long_window})")
+
+        data = fetch_stock_data(symbol, timeframe, interval, stale_ok=True)
+        signals = momentum_trading_strategy(data, short_window, long_window)
+        backtest, summary = backtest_signals(signals, fee_bps, slippage_bps, initial_capital,
+                                             PERIODS_PER_YEAR.get(interval, 252))
+
+        response = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'interval': interval,
+            'short_window': short_window,
+            'long_window': long_window,
+            'dates': data.index.strftime('%Y-%m-%d').tolist(),
+            'equity': backtest['equity'].tolist(),
+            'drawdown': backtest['drawdown'].tolist(),
+            'net_returns': backtest['net_returns'].tolist(),
+            'summary': summary
+        }
+
+        clean_for_json(response)
+        return jsonify(response)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'error': str(e),
+            'message': 'Failed to run backtest'
+        }), 500
+
+
+@api_bp.route("/walk-forward", methods=["POST"])
+@cross_origin()
+def walk_forward_endpoint():
+    """Endpoint to pick crossover windows by walk-forward optimization"""
+    try:
+        params = request.get_json() if request.is_json else request.args
+        symbol = params.get('symbol', 'NVDA')
+        timeframe = params.get('timeframe', '5Y')
+        interval = params.get('interval', 'day')
+        train_bars = int(params.get('train_bars', 252))
+        test_bars = int(params.get('test_bars', 63))
+        metric = params.get('metric', 'sharpe')
+        anchored = str(params.get('anchored', 'false')).lower() == 'true'
+        print(f"Walk-forward optimizing {symbol} - {timeframe} - {interval}")
+
+        data = fetch_stock_data(symbol, timeframe, interval, stale_ok=True)
+        result = walk_forward_optimize(data, train_bars, test_bars, anchored=anchored, metric=metric,
+                                       periods_per_year=PERIODS_PER_YEAR.get(interval, 252))
+
+        folds = result.folds.copy()
+        for column in ['train_start', 'test_start', 'test_end']:
+            folds[column] = folds[column].dt.strftime('%Y-%m-%d')
+        response = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'interval': interval,
+            'folds': folds.to_dict(orient='records'),
+            'dates': result.backtest.index.strftime('%Y-%m-%d').tolist(),
+            'equity': result.backtest['equity'].tolist(),
+            'summary': result.summary
+        }
+
+        clean_for_json(response)
+        return jsonify(response)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'error': str(e),
+            'message': 'Failed to run walk-forward optimization'
+        }), 500
+
+
+@api_bp.route("/screener", methods=["POST"])
+@cross_origin()
+def screener_endpoint():
+    """Endpoint to screen a universe of symbols for crossover signals in one pass"""
+    try:
+        if request.is_json:
+            params = request.get_json()
+            symbols = params.get('symbols', [])
+        else:
+            params = request.args
+            symbols = request.args.getlist('symbols')
+        timeframe = params.get('timeframe', '1Y')
+        interval = params.get('interval', 'day')
+        trigger = params.get('trigger')
+        sort_by = params.get('sort_by', 'momentum_rank')
+
+        if not symbols:
+            return jsonify({
+                'error': 'Missing symbols parameter',
+                'message': 'Please provide a list of symbols'
+            }), 400
+        print(f"Screening {len(symbols)} symbols - {timeframe} - {interval}")
+
+        results, errors = screen_universe(
+            symbols, timeframe, interval,
+            short_window=int(params.get('short_window', 5)),
+            long_window=int(params.get('long_window', 20)),
+            momentum_window=int(params.get('momentum_window', 20)),
+            volatility_window=int(params.get('volatility_window', 20)),
+            periods_per_year=PERIODS_PER_YEAR.get(interval, 252))
+
+        if not results.empty:
+            if trigger:
+                results = results[results['trigger'] == trigger]
+            if sort_by in results.columns:
+                results = results.sort_values(sort_by)
+
+        response = {
+            'timeframe': timeframe,
+            'interval': interval,
+            'results': results.reset_index().to_dict(orient='records'),
+            'errors': errors
+        }
+
+        clean_for_json(response)
+        return jsonify(response)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'error': str(e),
+            'message': 'Failed to run screener'
+        }), 500
+
+
+@api_bp.route("/portfolio-backtest", methods=["POST"])
+@cross_origin()
+def portfolio_backtest_endpoint():
+    """Endpoint to backtest an equal-weight crossover portfolio across symbols"""
+    try:
+        if request.is_json:
+            params = request.get_json()
+            symbols = params.get('symbols', [])
+        else:
+            params = request.args
+            symbols = request.args.getlist('symbols')
+        timeframe = params.get('timeframe', '1Y')
+        interval = params.get('interval', 'day')
+
+        if not symbols:
+            return jsonify({
+                'error': 'Missing symbols parameter',
+                'message': 'Please provide a list of symbols'
+            }), 400
+        print(f"Portfolio backtest of {len(symbols)} symbols - {timeframe} - {interval}")
+
+        frame, weights, summary, errors = backtest_portfolio(
+            symbols, timeframe, interval,
+            short_window=int(params.get('short_window', 5)),
+            long_window=int(params.get('long_window', 20)),
+            rebalance=str(params.get('rebalance', PORTFOLIO_REBALANCE)),
+            fee_bps=float(params.get('fee_bps', BACKTEST_FEE_BPS)),
+            slippage_bps=float(params.get('slippage_bps', BACKTEST_SLIPPAGE_BPS)),
+            initial_capital=float(params.get('initial_capital', BACKTEST_INITIAL_CAPITAL)),
+            max_weight=float(params.get('max_weight', 1.0)),
+            cash_buffer=float(params.get('cash_buffer', 0.0)))
+
+        response = {
+            'timeframe': timeframe,
+            'interval': interval,
+            'dates': frame.index.strftime('%Y-%m-%d').tolist(),
+            'equity': frame['equity'].tolist(),
+            'drawdown': frame['drawdown'].tolist(),
+            'cash': frame['cash'].tolist(),
+            'rebalances': [
+                {'date': date.strftime('%Y-%m-%d'), 'weights': row[row > 0].to_dict()}
+                for date, row in weights.iterrows()
+            ],
+            'summary': summary,
+            'errors': errors
+        }
+
+        clean_for_json(response)
+        return jsonify(response)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'error': str(e),
+            'message': 'Failed to run portfolio backtest'
+        }), 500
+
+
 @api_bp.route("/predict", methods=["GET", "POST"])
 @cross_origin()
 def predict_endpoint():
     """API endpoint for price predictions"""
     try:
-        reset_model()
         # Get parameters based on request method
         if request.method == "POST":
             if request.is_json:
@@ -130,36 +415,42 @@ def predict_endpoint():
                 timeframe = data.get('timeframe', '1Y') 
                 interval = data.get('interval', 'day')
                 model_type = data.get('model', 'default')
+                simulation = data.get('simulation', 'bootstrap')
             else:
                 # Form data
                 symbol = request.form.get('symbol', 'NVDA')
                 timeframe = request.form.get('timeframe', '1Y')
                 interval = request.form.get('interval', 'day')
                 model_type = request.form.get('model', 'default')
+                simulation = request.form.get('simulation', 'bootstrap')
         else:
             # GET request - get from query parameters
             symbol = request.args.get('symbol', 'NVDA')
             timeframe = request.args.get('timeframe', '1Y')
             interval = request.args.get('interval', 'day')
             model_type = request.args.get('model', 'default')
+            simulation = request.args.get('simulation', 'bootstrap')
             
         print(f"Generating predictions for {symbol} ({timeframe}, {interval}) using model: {model_type}")
 
         # Fetch data
         data = fetch_stock_data(symbol, timeframe, interval)
-        # Train model if not already trained
-        global sk_model, sk_model_trained
-        if not sk_model_trained:
-            print("Training model on data shape:", data.shape)
-            metrics = sk_model.train(data)
-            sk_model_trained = True
+
+        # Reuse the model trained on these bars; retrain only on new bars or once it is too old
+        model = model_registry.get(symbol, interval, timeframe, data, model_type)
         
         # Get performance metrics
-        performance = sk_model.evaluate(data)
+        performance = model.evaluate(data)
         
         # Make predictions
-        predictions = sk_model.predict(data)
+        predictions = model.predict(data)
         current_price = float(data['Close'].iloc[-1])
+
+        # Distribution around the point forecasts, within the latency budget
+        # Markets with weekend bars (crypto) trade every day, so horizons count calendar days
+        continuous = bool((data.index.dayofweek >= 5).any())
+        forecast = forecast_bands(data['Close'], horizons_for(interval, continuous), method=simulation,
+                                  time_budget=MONTE_CARLO_BUDGET_MS / 1000)
         
         # Convert any NumPy types to Python native types for JSON serialization
         def convert_to_native_types(obj):
@@ -182,6 +473,8 @@ def predict_endpoint():
             'symbol': symbol,
             'current_price': current_price,
             'predictions': clean_predictions,
+            'bands': forecast['bands'],
+            'simulation': {key: forecast[key] for key in ('method', 'paths', 'elapsed_ms')},
             'performance': clean_performance,
             'status': 'success'
         })
@@ -193,6 +486,93 @@ def predict_endpoint():
             'status': 'error'
         }), 500
 
+@api_bp.route("/prefetch/status", methods=["GET"])
+@cross_origin()
+def prefetch_status_endpoint():
+    """Show the refresh state of every watchlist entry"""
+    return jsonify({
+        'entries': prefetch_scheduler.status(),
+        'delay_seconds': prefetch_scheduler.delay
+    })
+
+@api_bp.route("/models", methods=["GET"])
+@cross_origin()
+def models_endpoint():
+    """Show the trained models held by the model registry"""
+    response = model_registry.status()
+    clean_for_json(response)
+    return jsonify(response)
+
+@api_bp.route("/runtime/events", methods=["GET"])
+@cross_origin()
+def runtime_events_endpoint():
+    """Show recent position changes emitted by the live strategy runtime"""
+    symbol = request.args.get('symbol')
+    limit = int(request.args.get('limit', 100))
+    response = {
+        'status': strategy_runtime.status(),
+        'events': strategy_runtime.recent_events(symbol.upper() if symbol else None, limit)
+    }
+    clean_for_json(response)
+    return jsonify(response)
+
+@api_bp.route("/alerts", methods=["GET"])
+@cross_origin()
+def alerts_endpoint():
+    """List registered alert rules and recently fired alerts"""
+    symbol = request.args.get('symbol')
+    symbol = symbol.upper() if symbol else None
+    limit = int(request.args.get('limit', 100))
+    response = {
+        'rules': alert_engine.list_rules(symbol),
+        'fired': alert_engine.recent_alerts(symbol, limit),
+        'runtime': strategy_runtime.status()
+    }
+    clean_for_json(response)
+    return jsonify(response)
+
+
+@api_bp.route("/alerts", methods=["POST"])
+@cross_origin()
+def create_alert_endpoint():
+    """Register a price level or moving average crossover alert"""
+    try:
+        params = request.get_json() if request.is_json else request.args
+        symbol = params.get('symbol')
+        kind = params.get('kind')
+        if not symbol or not kind:
+            return jsonify({
+                'error': 'Missing symbol or kind parameter',
+                'message': 'Please provide a symbol and an alert kind'
+            }), 400
+
+        once = params.get('once', True)
+        if isinstance(once, str):
+            once = once.lower() not in ('false', '0', 'no')
+        rule = alert_engine.add_rule(symbol, kind, params.get('threshold'),
+                                     short_window=params.get('short_window', 5),
+                                     long_window=params.get('long_window', 20),
+                                     once=once, since=pd.Timestamp.now(tz='UTC'))
+        print(f"Registered alert {rule.id}: {rule.kind} on {rule.symbol}")
+        return jsonify({'rule': rule.to_dict(), 'status': 'success'})
+    except ValueError as e:
+        return jsonify({'error': str(e), 'message': 'Invalid alert rule'}), 400
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'error': str(e),
+            'message': 'Failed to register alert'
+        }), 500
+
+
+@api_bp.route("/alerts/<int:rule_id>", methods=["DELETE"])
+@cross_origin()
+def delete_alert_endpoint(rule_id):
+    """Remove a registered alert rule"""
+    if not alert_engine.remove_rule(rule_id):
+        return jsonify({'error': 'Not Found', 'message': f"No alert with id {rule_id}"}), 404
+    return jsonify({'rule_id': rule_id, 'status': 'removed'})
+
 @api_bp.route("/reset-model", methods=["POST"])
 @cross_origin()
 def reset_model_endpoint():
@@ -219,10 +599,14 @@ def chart_analysis_endpoint():
             symbol = data.get('symbol', 'NVDA')
             timeframe = data.get('timeframe', '1Y') 
             interval = data.get('interval', 'day')
+            include_risk = str(data.get('include_risk', 'false')).lower() == 'true'
+            benchmark = data.get('benchmark', RISK_BENCHMARK)
         else: 
             symbol = request.args.get('symbol', 'NVDA')
             timeframe = request.args.get('timeframe', '1Y')
             interval = request.args.get('interval', 'day')
+            include_risk = request.args.get('include_risk', 'false').lower() == 'true'
+            benchmark = request.args.get('benchmark', RISK_BENCHMARK)
       
         if not data or "symbol" not in data:
             return jsonify({
@@ -242,8 +626,12 @@ def chart_analysis_endpoint():
                 "response": f"No valid data available for {symbol}."
             }), 400
             
-        # Generate analysis
-        analysis_result = agent.generate_chart_analysis(symbol, signals)
+        # Generate analysis; risk metrics need a second (benchmark) fetch, so only on request
+        risk = None
+        if include_risk:
+            risk = risk_summary(_risk_for(data, symbol, timeframe, interval, benchmark),
+                                PERIODS_PER_YEAR.get(interval, 252))
+        analysis_result = agent.generate_chart_analysis(symbol, signals, interval, risk)
         
         return jsonify({
             "response": analysis_result,
@@ -390,15 +778,13 @@ def predict():
         data = fetch_stock_data(symbol, timeframe, interval)
         
         # Train model if not already trained (per chart)
-        if not sk_model_trained:
-            metrics = sk_model.train(data)
-            sk_model_trained = True
+        model = model_registry.get(symbol, interval, timeframe, data)
         
         # Get performance metrics
-        performance = sk_model.evaluate(data)
+        performance = model.evaluate(data)
         
         # Make predictions
-        predictions = sk_model.predict(data)
+        predictions = model.predict(data)
         current_price = float(data['Close'].iloc[-1])
         
         return jsonify({
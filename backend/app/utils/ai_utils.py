@@ -6,6 +6,7 @@ import json
 import asyncio
 import aiohttp
 from datetime import datetime
+from app.utils.backtest import backtest_signals, PERIODS_PER_YEAR
 from injective_functions.factory import InjectiveClientFactory
 from injective_functions.utils.function_helper import (
     FunctionSchemaLoader,
@@ -48,7 +49,8 @@ class InjectiveChatAgent:
         ]
         self.function_schemas = FunctionSchemaLoader.load_schemas(schema_paths)
 
-    def generate_chart_analysis(self, symbol: str, signals: pd.DataFrame) -> str:
+    def generate_chart_analysis(self, symbol: str, signals: pd.DataFrame, interval: str = 'day',
+                                risk: dict = None) -> str:
         """Generate analysis of trading signals using OpenAI."""
         try:
             # Calculate metrics
@@ -57,6 +59,7 @@ class InjectiveChatAgent:
             sell_signals = len(signals[signals['positions'] == -1.0])
             price_change = ((signals['price'].iloc[-1] - signals['price'].iloc[0]) / 
                         signals['price'].iloc[0] * 100)
+            _, performance = backtest_signals(signals, periods_per_year=PERIODS_PER_YEAR.get(interval, 252))
 
             prompt = f"""
             Analyze this trading data for {symbol}:
@@ -68,6 +71,13 @@ class InjectiveChatAgent:
               Last price: {signals['price'].iloc[-1]:.2f}
               Short MA: {signals['short_mavg'].iloc[-1]:.2f}
               Long MA: {signals['long_mavg'].iloc[-1]:.2f}
+            - Strategy backtest (after {performance['fee_bps']:.0f} bps fees and {performance['slippage_bps']:.0f} bps slippage):
+              Strategy return: {performance['total_return'] * 100:.2f}%
+              Buy and hold return: {performance['buy_and_hold_return'] * 100:.2f}%
+              Sharpe ratio: {performance['sharpe']:.2f}
+              Max drawdown: {performance['max_drawdown'] * 100:.2f}%
+              Time in market: {performance['exposure'] * 100:.1f}%
+            {self._risk_prompt(risk)}
 
             Provide a brief trading analysis and recommendation.
             """
@@ -83,6 +93,23 @@ class InjectiveChatAgent:
         except Exception as e:
             return f"Could not generate analysis: {str(e)}"
 
+    @staticmethod
+    def _risk_prompt(risk):
+        """Format risk metrics for the analysis prompt."""
+        if not risk:
+            return ""
+        lines = [
+            "- Risk metrics:",
+            f"  One-bar VaR (historical): {risk['var_historical'] * 100:.2f}%",
+            f"  One-bar VaR (parametric): {risk['var_parametric'] * 100:.2f}%",
+            f"  Max drawdown: {risk['max_drawdown'] * 100:.2f}%",
+            f"  Sharpe ratio: {risk['sharpe']:.2f} (rolling {risk['rolling_sharpe']:.2f})",
+            f"  Sortino ratio: {risk['sortino']:.2f}",
+        ]
+        if 'beta' in risk:
+            lines.append(f"  Beta vs benchmark: {risk['beta']:.2f}")
+        return "\n              ".join(lines)
+
     def add_token_context(self, session_id: str, symbol: str, analysis_result: str):
         """Add token analysis context to the session"""
         self.token_contexts[session_id] = {
@@ -0,0 +1,241 @@
+import os
+import math
+import bisect
+import itertools
+import threading
+from collections import deque
+import pandas as pd
+from app.utils.event_runtime import strategy_runtime
+from app.utils.streaming_signals import StreamingMomentum
+
+# Fired alerts kept for the API
+ALERT_HISTORY = int(os.environ.get('ALERT_HISTORY') or 1000)
+# Recent closes kept per symbol to warm up newly registered crossover rules
+ALERT_WARMUP_BARS = int(os.environ.get('ALERT_WARMUP_BARS') or 500)
+
+PRICE_KINDS = ('price_above', 'price_below')
+CROSS_KINDS = ('cross_above', 'cross_below')
+
+
+class AlertRule:
+    """A price level or moving average crossover alert on one symbol."""
+
+    __slots__ = ('id', 'symbol', 'kind', 'threshold', 'short_window', 'long_window', 'once', 'since',
+                 'created_at')
+
+    def __init__(self, id, symbol, kind, threshold=None, short_window=None, long_window=None, once=True,
+                 since=None):
+        self.id = id
+        self.symbol = symbol
+        self.kind = kind
+        self.threshold = threshold
+        self.short_window = short_window
+        self.long_window = long_window
+        self.once = once
+        self.since = since
+        self.created_at = pd.Timestamp.now(tz='UTC')
+
+    def to_dict(self):
+        rule = {'id': self.id, 'symbol': self.symbol, 'kind': self.kind, 'once': self.once,
+                'created_at': self.created_at.isoformat()}
+        if self.kind in PRICE_KINDS:
+            rule['threshold'] = self.threshold
+        else:
+            rule.update({'short_window': self.short_window, 'long_window': self.long_window})
+        if self.since is not None:
+            rule['since'] = self.since.isoformat()
+        return rule
+
+
+def _utc(timestamp):
+    # Naive bar timestamps are read as UTC, like PollingBarSource does
+    timestamp = pd.Timestamp(timestamp)
+    return timestamp.tz_localize('UTC') if timestamp.tz is None else timestamp
+
+
+class _PriceLevels:
+    """Thresholds of one symbol's price rules of one kind, kept sorted."""
+
+    __slots__ = ('thresholds', 'ids')
+
+    def __init__(self):
+        self.thresholds = []
+        self.ids = []
+
+    def add(self, threshold, rule_id):
+        position = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(position, threshold)
+        self.ids.insert(position, rule_id)
+
+    def remove(self, rule_id):
+        position = self.ids.index(rule_id)
+        del self.thresholds[position]
+        del self.ids[position]
+
+
+class AlertEngine:
+    """Evaluates price and crossover alerts on streaming bars.
+
+    Rules are indexed by symbol: price rules by kind in sorted threshold
+    lists, so a bar finds the levels crossed since the previous close with
+    two binary searches, and crossover rules by their (short, long)
+    windows, sharing one StreamingMomentum per symbol and window pair.
+    A bar therefore only touches the rules that can fire on it, however
+    many are registered. Alerts fire when the condition becomes true: a
+    price crossing its level, or the short average crossing the long one.
+
+    Registered as a handler of the strategy runtime; fired alerts are kept
+    in a bounded history and passed to the subscribed callbacks.
+    """
+
+    name = 'alerts'
+
+    def __init__(self, history=ALERT_HISTORY, warmup_bars=ALERT_WARMUP_BARS):
+        self.rules = {}
+        self.listeners = []
+        self.fired = deque(maxlen=history)
+        self.warmup_bars = warmup_bars
+        self._levels = {}     # symbol -> kind -> _PriceLevels
+        self._crosses = {}    # symbol -> (short, long) -> [StreamingMomentum, set of rule ids]
+        self._closes = {}     # symbol -> recent closes
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add_rule(self, symbol, kind, threshold=None, short_window=5, long_window=20, once=True, since=None):
+        """Register an alert; raises ValueError for an invalid rule.
+
+        Args:
+            symbol: Symbol the rule watches
+            kind: 'price_above', 'price_below', 'cross_above' or 'cross_below'
+            threshold: Price level of price rules
+            short_window, long_window: Moving average windows of crossover rules
+            once: Remove the rule after it first fires
+            since: Optional timestamp; earlier bars (e.g. warmup history) never fire the rule
+
+        Returns:
+            AlertRule
+        """
+        symbol = symbol.upper()
+        if kind in PRICE_KINDS:
+            if threshold is None or not math.isfinite(float(threshold)):
+                raise ValueError(f"{kind} alerts need a numeric threshold")
+            threshold, short_window, long_window = float(threshold), None, None
+        elif kind in CROSS_KINDS:
+            short_window, long_window = int(short_window), int(long_window)
+            if not 0 < short_window < long_window:
+                raise ValueError("Crossover alerts need 0 < short_window < long_window")
+            threshold = None
+        else:
+            raise ValueError(f"Unknown alert kind: {kind}")
+
+        with self._lock:
+            since = _utc(since) if since is not None else None
+            rule = AlertRule(next(self._ids), symbol, kind, threshold, short_window, long_window, once, since)
+            self.rules[rule.id] = rule
+            if kind in PRICE_KINDS:
+                self._levels.setdefault(symbol, {}).setdefault(kind, _PriceLevels()).add(threshold, rule.id)
+            else:
+                crosses = self._crosses.setdefault(symbol, {})
+                entry = crosses.get((short_window, long_window))
+                if entry is None:
+                    # Warm the new averages on the closes already seen
+                    state = StreamingMomentum(short_window, long_window)
+                    for close in self._closes.get(symbol, ()):
+                        state.update(close)
+                    entry = crosses[(short_window, long_window)] = [state, set()]
+                entry[1].add(rule.id)
+        return rule
+
+    def remove_rule(self, rule_id):
+        with self._lock:
+            return self._remove(rule_id)
+
+    def _remove(self, rule_id):
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        if rule.kind in PRICE_KINDS:
+            self._levels[rule.symbol][rule.kind].remove(rule_id)
+        else:
+            crosses = self._crosses[rule.symbol]
+            windows = (rule.short_window, rule.long_window)
+            crosses[windows][1].discard(rule_id)
+            if not crosses[windows][1]:
+                del crosses[windows]
+        return True
+
+    def symbols(self):
+        with self._lock:
+            return {rule.symbol for rule in self.rules.values()}
+
+    def list_rules(self, symbol=None):
+        with self._lock:
+            return [rule.to_dict() for rule in self.rules.values() if symbol is None or rule.symbol == symbol]
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+        return callback
+
+    def on_bar(self, bar):
+        """Evaluate the rules of ``bar.symbol``; returns None (alerts go to subscribers)."""
+        price = bar.close
+        if price is None or not math.isfinite(price):
+            return None
+
+        alerts = []
+        with self._lock:
+            closes = self._closes.get(bar.symbol)
+            if closes is None:
+                closes = self._closes[bar.symbol] = deque(maxlen=self.warmup_bars)
+            previous = closes[-1] if closes else None
+            closes.append(price)
+
+            levels = self._levels.get(bar.symbol, {})
+            above = levels.get('price_above')
+            if above is not None:
+                # Levels in [previous, price): crossed upwards on this bar
+                low = 0 if previous is None else bisect.bisect_left(above.thresholds, previous)
+                high = bisect.bisect_left(above.thresholds, price)
+                alerts.extend((rule_id, {}) for rule_id in above.ids[low:high])
+            below = levels.get('price_below')
+            if below is not None:
+                # Levels in (price, previous]: crossed downwards on this bar
+                low = bisect.bisect_right(below.thresholds, price)
+                high = len(below.ids) if previous is None else bisect.bisect_right(below.thresholds, previous)
+                alerts.extend((rule_id, {}) for rule_id in below.ids[low:high])
+
+            for state, rule_ids in self._crosses.get(bar.symbol, {}).values():
+                short_mavg, long_mavg, _, position = state.update(price)
+                if position == 1.0 or position == -1.0:
+                    kind = 'cross_above' if position > 0 else 'cross_below'
+                    detail = {'short_mavg': short_mavg, 'long_mavg': long_mavg}
+                    alerts.extend((rule_id, detail) for rule_id in rule_ids if self.rules[rule_id].kind == kind)
+
+            fired = []
+            for rule_id, detail in alerts:
+                rule = self.rules[rule_id]
+                if rule.since is not None and _utc(bar.timestamp) < rule.since:
+                    continue
+                alert = rule.to_dict()
+                del alert['created_at']
+                alert.update({'rule_id': alert.pop('id'), 'timestamp': bar.timestamp.isoformat(),
+                              'price': price, **detail})
+                fired.append(alert)
+                if alert['once']:
+                    self._remove(rule_id)
+            self.fired.extend(fired)
+
+        for alert in fired:
+            for callback in self.listeners:
+                callback(alert)
+        return None
+
+    def recent_alerts(self, symbol=None, limit=100):
+        with self._lock:
+            alerts = [alert for alert in self.fired if symbol is None or alert['symbol'] == symbol]
+        return alerts[-limit:]
+
+
+# Shared engine, fed by the strategy runtime's live bars
+alert_engine = AlertEngine()
+strategy_runtime.register(alert_engine)
@@ -0,0 +1,147 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Default trading costs in basis points of traded notional
+BACKTEST_FEE_BPS = float(os.environ.get('BACKTEST_FEE_BPS') or 10)
+BACKTEST_SLIPPAGE_BPS = float(os.environ.get('BACKTEST_SLIPPAGE_BPS') or 5)
+BACKTEST_INITIAL_CAPITAL = float(os.environ.get('BACKTEST_INITIAL_CAPITAL') or 10000)
+
+# Bars per year of each API interval, used to annualize returns
+PERIODS_PER_YEAR = {
+    'minute': 252 * 390,
+    '5min': 252 * 78,
+    '15min': 252 * 26,
+    '30min': 252 * 13,
+    'hour': 252 * 7,
+    'day': 252,
+    'week': 52,
+    'month': 12,
+}
+
+
+def strategy_returns(price, signal, fee_bps=BACKTEST_FEE_BPS, slippage_bps=BACKTEST_SLIPPAGE_BPS):
+    """Per-bar positions, turnover and gross/net returns of a long/flat signal.
+
+    The signal decided on bar t is held over bar t+1, so returns never use
+    information from the bar they are earned on. Every change in position
+    pays ``fee_bps + slippage_bps`` of the traded notional. ``signal`` may
+    be 2-D (one row per strategy) to evaluate many signals at once.
+
+    Returns:
+        Dict with position, turnover, returns (asset), gross_returns,
+        net_returns, fee_rate and slippage_rate arrays
+    """
+    price = np.asarray(price, dtype=np.float64)
+    signal = np.nan_to_num(np.asarray(signal, dtype=np.float64))
+
+    asset_returns = np.zeros_like(price)
+    asset_returns[1:] = price[1:] / price[:-1] - 1
+
+    position = np.zeros_like(signal)
+    position[..., 1:] = signal[..., :-1]
+    turnover = np.abs(np.diff(position, axis=-1, prepend=0.0))
+
+    gross_returns = position * asset_returns
+    fee_rate = turnover * fee_bps / 1e4
+    slippage_rate = turnover * slippage_bps / 1e4
+    return {
+        'position': position,
+        'turnover': turnover,
+        'returns': asset_returns,
+        'gross_returns': gross_returns,
+        'net_returns': gross_returns - fee_rate - slippage_rate,
+        'fee_rate': fee_rate,
+        'slippage_rate': slippage_rate,
+    }
+
+
+def backtest_arrays(price, signal, fee_bps=BACKTEST_FEE_BPS, slippage_bps=BACKTEST_SLIPPAGE_BPS,
+                    initial_capital=BACKTEST_INITIAL_CAPITAL):
+    """Vectorized long/flat backtest of a signal against a price series.
+
+    See ``strategy_returns`` for the execution model; ``signal`` may be
+    2-D (one row per strategy) to backtest many signals at once.
+
+    Args:
+        price: 1-D array of prices
+        signal: Array of target exposures (0 or 1) with time on the last axis
+        fee_bps: Exchange/broker fee per unit of turnover, in basis points
+        slippage_bps: Execution slippage per unit of turnover, in basis points
+        initial_capital: Starting equity
+
+    Returns:
+        Dict of arrays shaped like ``signal``: position, turnover, returns
+        (asset), gross_returns, net_returns, equity, drawdown, fees, slippage
+    """
+    result = strategy_returns(price, signal, fee_bps, slippage_bps)
+    fee_rate = result.pop('fee_rate')
+    slippage_rate = result.pop('slippage_rate')
+
+    equity = initial_capital * np.cumprod(1 + result['net_returns'], axis=-1)
+    previous_equity = np.concatenate(
+        [np.full(equity.shape[:-1] + (1,), initial_capital), equity[..., :-1]], axis=-1)
+
+    result['equity'] = equity
+    result['drawdown'] = equity / np.maximum.accumulate(equity, axis=-1) - 1
+    result['fees'] = previous_equity * fee_rate
+    result['slippage'] = previous_equity * slippage_rate
+    return result
+
+
+def summarize_backtest(result, initial_capital=BACKTEST_INITIAL_CAPITAL, periods_per_year=252):
+    """Summary statistics of a 1-D ``backtest_arrays`` result."""
+    net_returns = result['net_returns']
+    equity = result['equity']
+    n = len(net_returns)
+
+    final_equity = equity[-1] if n else initial_capital
+    total_return = final_equity / initial_capital - 1
+    volatility = net_returns[1:].std() if n > 1 else 0.0
+    sharpe = net_returns[1:].mean() / volatility * np.sqrt(periods_per_year) if volatility > 0 else 0.0
+    years = n / periods_per_year
+    cagr = (1 + total_return) ** (1 / years) - 1 if years > 0 and total_return > -1 else total_return
+    fees = result['fees'].sum()
+    slippage = result['slippage'].sum()
+
+    held = result['position'] > 0
+    return {
+        'initial_capital': initial_capital,
+        'final_equity': final_equity,
+        'net_pnl': final_equity - initial_capital,
+        'gross_pnl': final_equity - initial_capital + fees + slippage,
+        'fees': fees,
+        'slippage': slippage,
+        'total_return': total_return,
+        'buy_and_hold_return': np.prod(1 + result['returns']) - 1,
+        'cagr': cagr,
+        'annual_volatility': volatility * np.sqrt(periods_per_year),
+        'sharpe': sharpe,
+        'max_drawdown': result['drawdown'].min() if n else 0.0,
+        'turnover': result['turnover'].sum(),
+        'trades': int(np.count_nonzero(result['turnover'])),
+        'exposure': held.mean() if n else 0.0,
+        'win_rate': (result['gross_returns'][held] > 0).mean() if held.any() else 0.0,
+    }
+
+
+def backtest_signals(signals, fee_bps=BACKTEST_FEE_BPS, slippage_bps=BACKTEST_SLIPPAGE_BPS,
+                     initial_capital=BACKTEST_INITIAL_CAPITAL, periods_per_year=252):
+    """Backtest a ``momentum_trading_strategy`` signals frame.
+
+    Parameters:
+        signals (pd.DataFrame): Frame with 'price' and 'signal' columns
+        fee_bps (float): Fee per unit of turnover, in basis points
+        slippage_bps (float): Slippage per unit of turnover, in basis points
+        initial_capital (float): Starting equity
+        periods_per_year (int): Bars per year, see PERIODS_PER_YEAR
+
+    Returns:
+        tuple: (DataFrame of per-bar backtest columns, dict of summary statistics)
+    """
+    result = backtest_arrays(signals['price'].to_numpy(), signals['signal'].to_numpy(),
+                             fee_bps, slippage_bps, initial_capital)
+    frame = pd.DataFrame(result, index=signals.index)
+    summary = summarize_backtest(result, initial_capital, periods_per_year)
+    summary.update({'fee_bps': fee_bps, 'slippage_bps': slippage_bps})
+    return frame, summary
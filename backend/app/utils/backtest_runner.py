@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from app.utils.backtest import backtest_arrays, summarize_backtest, PERIODS_PER_YEAR
+from app.utils.backtest import BACKTEST_FEE_BPS, BACKTEST_SLIPPAGE_BPS, BACKTEST_INITIAL_CAPITAL
+from app.utils.ma_sweep import rolling_means, crossover_matrices
+from app.utils.trading_strategy import fetch_stock_data_batch
+
+# Worker processes for universe backtests (defaults to one per core)
+BACKTEST_WORKERS = int(os.environ.get('BACKTEST_WORKERS') or os.cpu_count() or 1)
+# Symbols backtested by the nightly run, e.g. BACKTEST_UNIVERSE="AAPL,MSFT,NVDA"
+BACKTEST_UNIVERSE = os.environ.get('BACKTEST_UNIVERSE') or ''
+
+# Shared close-price block, attached once per worker process
+_shared_block = None
+
+
+def _attach(name):
+    """Attach a worker to the parent's shared memory block."""
+    global _shared_block
+    try:
+        _shared_block = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: workers share the parent's resource tracker, which
+        # already owns the block, so attaching needs no extra bookkeeping
+        _shared_block = shared_memory.SharedMemory(name=name)
+
+
+def _backtest_slice(task):
+    """Backtest one symbol whose closes live at ``[offset, offset + length)``."""
+    symbol, offset, length, params = task
+    close = np.ndarray((length,), dtype=np.float64, buffer=_shared_block.buf, offset=offset * 8)
+    return symbol, backtest_close(close, **params)
+
+
+def backtest_close(close, short_window=5, long_window=20, fee_bps=BACKTEST_FEE_BPS,
+                   slippage_bps=BACKTEST_SLIPPAGE_BPS, initial_capital=BACKTEST_INITIAL_CAPITAL,
+                   periods_per_year=252):
+    """Crossover signal and backtest summary for one close array."""
+    windows = sorted({short_window, long_window})
+    means = rolling_means(close, windows)
+    signal, _ = crossover_matrices(means, windows, [(short_window, long_window)])
+    result = backtest_arrays(close, signal[0], fee_bps, slippage_bps, initial_capital)
+    return summarize_backtest(result, initial_capital, periods_per_year)
+
+
+def run_universe_backtest(frames, short_window=5, long_window=20, fee_bps=BACKTEST_FEE_BPS,
+                          slippage_bps=BACKTEST_SLIPPAGE_BPS, initial_capital=BACKTEST_INITIAL_CAPITAL,
+                          periods_per_year=252, rank_by='sharpe', workers=BACKTEST_WORKERS):
+    """Backtest the crossover strategy for many symbols on a process pool.
+
+    All close arrays are copied once into a single shared memory block;
+    workers receive only (symbol, offset, length) and read the prices in
+    place, so no DataFrames are pickled across processes.
+
+    Args:
+        frames: Dict of symbol -> DataFrame with a 'Close' column
+        short_window, long_window: Crossover windows
+        fee_bps, slippage_bps, initial_capital, periods_per_year: See backtest_signals
+        rank_by: Summary column to sort by, best first
+        workers: Number of worker processes; 1 runs in this process
+
+    Returns:
+        DataFrame with one row of summary statistics per symbol, ranked
+    """
+    closes = {symbol: frame['Close'].to_numpy(dtype=np.float64)
+              for symbol, frame in frames.items() if frame is not None and len(frame) > 0}
+    params = {
+        'short_window': short_window,
+        'long_window': long_window,
+        'fee_bps': fee_bps,
+        'slippage_bps': slippage_bps,
+        'initial_capital': initial_capital,
+        'periods_per_year': periods_per_year,
+    }
+
+    if workers <= 1 or len(closes) <= 1:
+        results = [(symbol, backtest_close(close, **params)) for symbol, close in closes.items()]
+    else:
+        total = sum(len(close) for close in closes.values())
+        block = shared_memory.SharedMemory(create=True, size=max(total, 1) * 8)
+        try:
+            prices = np.ndarray((total,), dtype=np.float64, buffer=block.buf)
+            tasks, offset = [], 0
+            for symbol, close in closes.items():
+                prices[offset:offset + len(close)] = close
+                tasks.append((symbol, offset, len(close), params))
+                offset += len(close)
+            del prices
+
+            chunksize = max(1, len(tasks) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                     initargs=(block.name,)) as pool:
+                results = list(pool.map(_backtest_slice, tasks, chunksize=chunksize))
+        finally:
+            block.close()
+            block.unlink()
+
+    table = pd.DataFrame([summary for _, summary in results], index=[symbol for symbol, _ in results])
+    if table.empty:
+        return table
+    table.insert(0, 'bars', [len(closes[symbol]) for symbol in table.index])
+    table.insert(1, 'start', [frames[symbol].index[0] for symbol in table.index])
+    table.insert(2, 'end', [frames[symbol].index[-1] for symbol in table.index])
+    table = table.sort_values(rank_by, ascending=False)
+    table.insert(0, 'rank', range(1, len(table) + 1))
+    table.index.name = 'symbol'
+    return table
+
+
+def backtest_universe(symbols, timeframe='1Y', interval='day', **kwargs):
+    """Fetch bars for ``symbols`` and rank them by crossover backtest results.
+
+    Returns:
+        tuple: (ranked DataFrame, dict of symbols that could not be fetched)
+    """
+    frames, errors = fetch_stock_data_batch(symbols, timeframe, interval)
+    kwargs.setdefault('periods_per_year', PERIODS_PER_YEAR.get(interval, 252))
+    return run_universe_backtest(frames, **kwargs), errors
+
+
+if __name__ == '__main__':
+    # Nightly run: python -m app.utils.backtest_runner [SYMBOL ...]
+    symbols = sys.argv[1:] or [s.strip().upper() for s in BACKTEST_UNIVERSE.split(',') if s.strip()]
+    started = time.monotonic()
+    table, errors = backtest_universe(symbols)
+    print(table.to_string())
+    for symbol, error in errors.items():
+        print(f"Skipped {symbol}: {error}")
+    print(f"Backtested {len(table)} symbols in {time.monotonic() - started:.1f}s "
+          f"with {BACKTEST_WORKERS} workers")
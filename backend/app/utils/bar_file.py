@@ -0,0 +1,292 @@
+import os
+import json
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+
+
+class BarView:
+    """Read-only, zero-copy view of a range of bars in a BarFile.
+
+    Columns are NumPy views straight onto the memory-mapped files, so
+    slicing years of minute bars costs no copy. Supports ``len()``,
+    ``view['Close']`` and ``view.columns`` so feature builders can read
+    it like a DataFrame; ``to_frame()`` materializes a real DataFrame.
+    """
+
+    def __init__(self, timestamps, arrays, tz=None, index_name=None):
+        self.timestamps = timestamps
+        self.arrays = arrays
+        self.tz = tz or None
+        self.index_name = index_name
+
+    @property
+    def columns(self):
+        return list(self.arrays)
+
+    @property
+    def index(self):
+        index = pd.DatetimeIndex(self.timestamps.view('datetime64[ns]'), name=self.index_name)
+        if self.tz:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        return index
+
+    @property
+    def empty(self):
+        return len(self.timestamps) == 0
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, column):
+        return self.arrays[column]
+
+    def __contains__(self, column):
+        return column in self.arrays
+
+    def to_frame(self):
+        return pd.DataFrame(dict(self.arrays), index=self.index)
+
+
+class BarFile:
+    """Append-only, memory-mapped columnar file set for one bar series.
+
+    A directory holds one raw binary file per column: the timestamps as
+    int64 nanoseconds (UTC for tz-aware data) and each price column as
+    float64 or float32, plus ``meta.json`` with the column dtypes, the
+    number of valid rows and free-form attributes.
+
+    Appends write new rows past the end of the files. Stored rows at or
+    after the first appended timestamp (a bar that was still forming when
+    it was stored) are replaced in a new generation directory: the kept
+    rows are copied and the revised tail written there, so views already
+    handed to readers never change under them. Anything that would shrink
+    the files or insert before existing rows rewrites the whole series as
+    a new generation, so memory maps held by readers are never truncated
+    either.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._maps = {}
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.path, 'meta.json'))
+
+    def meta(self):
+        with open(os.path.join(self.path, 'meta.json')) as f:
+            return json.load(f)
+
+    def _write_meta(self, meta):
+        meta_path = os.path.join(self.path, 'meta.json')
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def _column_path(self, generation, column):
+        return os.path.join(self.path, f"g{generation}", f"{column}.bin")
+
+    def __len__(self):
+        return self.meta()['rows'] if self.exists() else 0
+
+    def write(self, data, dtype='float64', attrs=None):
+        """Replace the whole series with ``data`` in a new generation."""
+        with self._lock:
+            self._write(data, dtype, attrs)
+
+    def _write(self, data, dtype, attrs):
+        previous = self.meta() if self.exists() else None
+        generation = previous['generation'] + 1 if previous else 0
+        timestamps, tz = _to_utc_ns(data.index)
+
+        os.makedirs(os.path.join(self.path, f"g{generation}"), exist_ok=True)
+        columns = {'__timestamp__': timestamps}
+        for col in data.columns:
+            columns[str(col)] = data[col].to_numpy(dtype=dtype)
+        for col, values in columns.items():
+            with open(self._column_path(generation, col), 'wb') as f:
+                f.write(np.ascontiguousarray(values).tobytes())
+
+        self._write_meta({
+            'generation': generation,
+            'rows': len(timestamps),
+            'columns': [str(col) for col in data.columns],
+            'dtypes': {str(col): np.dtype(dtype).str for col in data.columns},
+            'tz': tz,
+            'index_name': data.index.name,
+            'attrs': attrs if attrs is not None else (previous or {}).get('attrs', {}),
+        })
+
+        self._remove_old_generations(generation)
+
+    def _remove_old_generations(self, generation):
+        # Old generations can go; readers keep their maps of unlinked files
+        # and retry with the new generation if it vanished before they mapped it
+        for name in os.listdir(self.path):
+            if name.startswith('g') and name != f"g{generation}":
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def append(self, data, attrs=None):
+        """Append bars, replacing stored bars at or after the first new one.
+
+        Re-sent bars equal to the stored ones (e.g. a top-up re-requesting
+        the last stored day) are skipped, so only bars that really changed
+        cost a new generation.
+        """
+        with self._lock:
+            if not self.exists():
+                self._write(data, 'float64', attrs)
+                return
+            meta = self.meta()
+            if attrs is None:
+                attrs = meta['attrs']
+            if data.empty:
+                meta['attrs'] = attrs
+                self._write_meta(meta)
+                return
+
+            stored = self.read_range()
+            new_timestamps, _ = _to_utc_ns(data.index)
+            position = int(np.searchsorted(stored.timestamps, new_timestamps[0], side='left'))
+            schema_changed = [str(c) for c in data.columns] != meta['columns']
+            if not schema_changed and 0 < position < meta['rows']:
+                same = _same_rows(stored, position, new_timestamps, data, meta)
+                data, new_timestamps = data.iloc[same:], new_timestamps[same:]
+                position += same
+                if data.empty:
+                    meta['attrs'] = attrs
+                    self._write_meta(meta)
+                    return
+            new_rows = position + len(new_timestamps)
+
+            if (position == 0 and len(stored) > 0) or new_rows < meta['rows'] or schema_changed:
+                # Prepend, shrink or schema change: rewrite as a new generation
+                merged = pd.concat([stored.to_frame(), _localize_like(data, meta['tz'])])
+                merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                dtype = next(iter(meta['dtypes'].values()), '<f8')
+                self._write(merged, dtype, attrs)
+                return
+
+            generation = meta['generation']
+            # Revising stored rows would change views readers already hold:
+            # copy the rows kept into a new generation and revise it there
+            overwrite = position < meta['rows']
+            if overwrite:
+                generation += 1
+                os.makedirs(os.path.join(self.path, f"g{generation}"), exist_ok=True)
+            columns = {'__timestamp__': (new_timestamps, '<i8')}
+            for col in meta['columns']:
+                columns[col] = (data[col].to_numpy(), meta['dtypes'][col])
+            for col, (values, dtype) in columns.items():
+                values = np.ascontiguousarray(values, dtype=dtype)
+                path = self._column_path(generation, col)
+                if overwrite:
+                    _copy_prefix(self._column_path(meta['generation'], col), path, position * values.itemsize)
+                with open(path, 'r+b') as f:
+                    f.seek(position * values.itemsize)
+                    f.write(values.tobytes())
+
+            meta['generation'] = generation
+            meta['rows'] = new_rows
+            meta['attrs'] = attrs
+            self._write_meta(meta)
+            if overwrite:
+                self._remove_old_generations(generation)
+
+    def set_attrs(self, attrs):
+        with self._lock:
+            meta = self.meta()
+            meta['attrs'] = attrs
+            self._write_meta(meta)
+
+    def attrs(self):
+        return self.meta().get('attrs', {}) if self.exists() else {}
+
+    def _map(self, generation, column, dtype, rows):
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        key = (generation, column)
+        mapped = self._maps.get(key)
+        if mapped is None or len(mapped) < rows:
+            mapped = np.memmap(self._column_path(generation, column), dtype=dtype, mode='r')
+            self._maps = {k: v for k, v in self._maps.items() if k[0] == generation}
+            self._maps[key] = mapped
+        return mapped[:rows]
+
+    def read_range(self, start=None, end=None):
+        """Return a zero-copy BarView of bars with ``start <= t < end``.
+
+        Bounds are located by binary search on the timestamp column. Naive
+        bounds are interpreted in the series' own timezone.
+        """
+        if not self.exists():
+            return BarView(np.empty(0, dtype='<i8'), {})
+
+        meta = self.meta()
+        while True:
+            try:
+                return self._read_range(meta, start, end)
+            except FileNotFoundError:
+                # A writer replaced the generation between reading meta and
+                # mapping its files; read the new one
+                previous, meta = meta['generation'], self.meta()
+                if meta['generation'] == previous:
+                    raise
+
+    def _read_range(self, meta, start, end):
+        generation, rows = meta['generation'], meta['rows']
+        timestamps = self._map(generation, '__timestamp__', '<i8', rows)
+
+        lo = 0 if start is None else int(np.searchsorted(timestamps, _bound_ns(start, meta['tz']), 'left'))
+        hi = rows if end is None else int(np.searchsorted(timestamps, _bound_ns(end, meta['tz']), 'left'))
+        hi = max(hi, lo)
+
+        arrays = {col: self._map(generation, col, meta['dtypes'][col], rows)[lo:hi]
+                  for col in meta['columns']}
+        return BarView(timestamps[lo:hi], arrays, meta['tz'], meta.get('index_name'))
+
+
+def _same_rows(stored, position, timestamps, data, meta):
+    """Number of leading new bars equal to the stored bars from ``position`` on."""
+    count = min(len(stored) - position, len(timestamps))
+    equal = stored.timestamps[position:position + count] == timestamps[:count]
+    for col in meta['columns']:
+        old = stored[col][position:position + count]
+        new = np.asarray(data[col].to_numpy()[:count], dtype=meta['dtypes'][col])
+        equal &= (old == new) | (np.isnan(old) & np.isnan(new))
+    return int(np.argmin(equal)) if not equal.all() else count
+
+
+def _copy_prefix(source, destination, nbytes):
+    """Copy the first ``nbytes`` of ``source`` into a new file ``destination``."""
+    # copyfile uses the kernel's file copy; the few revised rows past nbytes are cut off
+    shutil.copyfile(source, destination)
+    with open(destination, 'r+b') as f:
+        f.truncate(nbytes)
+
+
+def _to_utc_ns(index):
+    """Timestamps of an index as UTC int64 nanoseconds, plus its timezone."""
+    index = pd.DatetimeIndex(index).as_unit('ns')
+    tz = str(index.tz) if index.tz is not None else ''
+    if tz:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.asi8, tz
+
+
+def _bound_ns(bound, tz):
+    bound = pd.Timestamp(bound)
+    if tz:
+        bound = bound.tz_localize(tz) if bound.tz is None else bound.tz_convert(tz)
+        bound = bound.tz_convert('UTC').tz_localize(None)
+    elif bound.tz is not None:
+        bound = bound.tz_localize(None)
+    return bound.as_unit('ns').value
+
+
+def _localize_like(data, tz):
+    if tz and data.index.tz is not None:
+        return data.tz_convert(tz)
+    return data
@@ -0,0 +1,167 @@
+import os
+import re
+import threading
+import pandas as pd
+from app.utils.bar_file import BarFile
+
+# Root directory for the on-disk bar store (one bar file set per symbol/interval)
+BAR_STORE_DIR = os.environ.get('BAR_STORE_DIR') or os.path.join('data', 'bars')
+
+
+class BarStore:
+    """Columnar on-disk store of OHLCV bars keyed by (symbol, interval).
+
+    Each key is kept as a memory-mapped BarFile holding the bar timestamps
+    and one float64 array per price column. Its attributes record the day
+    range the upstream source has already been queried for, so repeat
+    requests can be answered from disk.
+    """
+
+    def __init__(self, root=BAR_STORE_DIR):
+        self.root = root
+        self._files = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, symbol, interval):
+        # Keyed like bar_file, so 'aapl' and 'AAPL' serialize on the same file
+        key = (symbol.upper(), interval)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def bar_file(self, symbol, interval):
+        """Return the BarFile backing a key."""
+        key = (symbol.upper(), interval)
+        with self._locks_guard:
+            if key not in self._files:
+                safe_symbol = re.sub(r'[^A-Za-z0-9_.=-]', '_', symbol.upper())
+                self._files[key] = BarFile(os.path.join(self.root, interval, safe_symbol))
+            return self._files[key]
+
+    def meta(self, symbol, interval):
+        """Return the stored attributes for a key, or an empty dict."""
+        return self.bar_file(symbol, interval).attrs()
+
+    def load(self, symbol, interval):
+        """Load all stored bars for a key, or None if nothing is stored."""
+        bar_file = self.bar_file(symbol, interval)
+        if not bar_file.exists():
+            return None
+        return bar_file.read_range().to_frame()
+
+    def view(self, symbol, interval, start=None, end=None):
+        """Return a zero-copy BarView of stored bars with ``start <= t < end``."""
+        return self.bar_file(symbol, interval).read_range(start, end)
+
+    def save(self, symbol, interval, data, fetched_from=None, fetched_through=None):
+        """Replace the stored bars for a key with ``data``.
+
+        ``fetched_from`` and ``fetched_through`` record the day range the
+        upstream source has been queried for, which can be wider than the
+        stored bars (e.g. a range starting on a weekend).
+        """
+        self.bar_file(symbol, interval).write(data, attrs=_attrs(data, fetched_from, fetched_through))
+
+    def get_bars(self, symbol, interval, start, end, download):
+        """Return bars in ``[start, end)``, topping up the store as needed.
+
+        Only bars after the last stored timestamp are requested upstream via
+        ``download(start, end)`` and appended to the bar file; everything
+        else is served from disk. If the store was already topped up through
+        ``end`` no download happens.
+
+        Parameters:
+            symbol (str): Provider symbol, e.g. 'AAPL', 'BTC-USD'
+            interval (str): Provider interval string, e.g. '1d', '1h'
+            start (pd.Timestamp): First day of the requested range
+            end (pd.Timestamp): Exclusive end day of the requested range
+            download (callable): ``download(start, end)`` returning a DataFrame
+
+        Returns:
+            pd.DataFrame: Bars for the requested range
+        """
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        bar_file = self.bar_file(symbol, interval)
+
+        with self._lock(symbol, interval):
+            meta = bar_file.attrs()
+            download_start = _pending_start(meta, start, end)
+
+            if download_start is not None:
+                fresh = download(download_start, end)
+                if fresh is None or fresh.empty:
+                    if not bar_file.exists():
+                        return fresh
+                    fresh = pd.DataFrame()
+                fetched_from = min(download_start, pd.Timestamp(meta.get('fetched_from') or download_start))
+                last_day = meta.get('last_day') if fresh.empty else _last_day(fresh).strftime('%Y-%m-%d')
+                # Today is still trading, so a range running into it is never fully fetched
+                fetched_through = min(end, pd.Timestamp.now().normalize())
+                bar_file.append(fresh, attrs={
+                    'fetched_from': fetched_from.strftime('%Y-%m-%d'),
+                    'fetched_through': fetched_through.strftime('%Y-%m-%d'),
+                    'last_day': last_day,
+                })
+
+        return self.read(symbol, interval, start, end)
+
+    def read(self, symbol, interval, start, end):
+        """Return stored bars in ``[start, end)`` without any download."""
+        bar_file = self.bar_file(symbol, interval)
+        if not bar_file.exists():
+            return None
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        return bar_file.read_range(start, end).to_frame()
+
+    def pending_start(self, symbol, interval, start, end):
+        """Return the day a download for ``[start, end)`` would start from.
+
+        Returns None when the stored bars already cover the range and no
+        upstream call is needed.
+        """
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        return _pending_start(self.meta(symbol, interval), start, end)
+
+
+def _attrs(data, fetched_from, fetched_through):
+    return {
+        'fetched_from': fetched_from,
+        'fetched_through': fetched_through,
+        'last_day': _last_day(data).strftime('%Y-%m-%d') if not data.empty else None,
+    }
+
+
+def _pending_start(meta, start, end):
+    """Day to start downloading from given a key's metadata, or None."""
+    fetched_from = meta.get('fetched_from')
+    if not meta.get('last_day') or fetched_from is None or pd.Timestamp(fetched_from) > start:
+        # Nothing usable on disk for the start of the range
+        return start
+
+    fetched_through = meta.get('fetched_through')
+    if fetched_through is None or pd.Timestamp(fetched_through) < end:
+        # Re-request from the day of the last stored bar, since that
+        # bar may have been incomplete when it was stored
+        return max(pd.Timestamp(meta['last_day']), start)
+    return None
+
+
+def index_days(index):
+    """Calendar days of a DatetimeIndex in its own (local) timezone."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def _last_day(data):
+    return index_days(data.index[-1:])[0]
+
+
+# Shared store used by the data fetching utilities
+bar_store = BarStore()
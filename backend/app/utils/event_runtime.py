@@ -0,0 +1,288 @@
+import os
+import heapq
+import math
+import threading
+import traceback
+from collections import deque
+import pandas as pd
+from app.utils.market_data import get_provider, download_range
+from app.utils.streaming_signals import StreamingMomentum
+
+# Symbols traded live by the runtime, e.g. STRATEGY_RUNTIME_SYMBOLS="AAPL,BTC-USD"
+STRATEGY_RUNTIME_SYMBOLS = os.environ.get('STRATEGY_RUNTIME_SYMBOLS') or ''
+# Provider interval of the live bars
+STRATEGY_RUNTIME_INTERVAL = os.environ.get('STRATEGY_RUNTIME_INTERVAL') or '1m'
+# Seconds between polls of the live feed
+STRATEGY_RUNTIME_POLL_SECONDS = float(os.environ.get('STRATEGY_RUNTIME_POLL_SECONDS') or 15)
+# Position events kept for the API
+STRATEGY_RUNTIME_EVENT_HISTORY = int(os.environ.get('STRATEGY_RUNTIME_EVENT_HISTORY') or 1000)
+
+# Length of one bar per provider interval, to tell closed bars from forming ones
+BAR_LENGTHS = {
+    '1m': pd.Timedelta(minutes=1),
+    '2m': pd.Timedelta(minutes=2),
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '30m': pd.Timedelta(minutes=30),
+    '60m': pd.Timedelta(hours=1),
+    '90m': pd.Timedelta(minutes=90),
+    '1h': pd.Timedelta(hours=1),
+    '1d': pd.Timedelta(days=1),
+}
+
+
+class BarEvent:
+    """One closed bar of one symbol."""
+
+    __slots__ = ('symbol', 'interval', 'timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, symbol, interval, timestamp, open, high, low, close, volume):
+        self.symbol = symbol
+        self.interval = interval
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+
+class PositionEvent:
+    """A strategy entering (+1) or leaving (-1) a position on a bar."""
+
+    __slots__ = ('strategy', 'symbol', 'timestamp', 'position', 'price', 'detail')
+
+    def __init__(self, strategy, symbol, timestamp, position, price, detail=None):
+        self.strategy = strategy
+        self.symbol = symbol
+        self.timestamp = timestamp
+        self.position = position
+        self.price = price
+        self.detail = detail or {}
+
+    def to_dict(self):
+        return {
+            'strategy': self.strategy,
+            'symbol': self.symbol,
+            'timestamp': self.timestamp.isoformat(),
+            'action': 'buy' if self.position > 0 else 'sell',
+            'position': self.position,
+            'price': self.price,
+            **self.detail,
+        }
+
+
+def _bar_events(symbol, interval, data):
+    """BarEvents for each row of a bar DataFrame."""
+    columns = [data[col].to_numpy() if col in data.columns else [math.nan] * len(data)
+               for col in ['Open', 'High', 'Low', 'Close', 'Volume']]
+    for timestamp, o, h, l, c, v in zip(data.index, *columns):
+        yield BarEvent(symbol, interval, timestamp, o, h, l, c, v)
+
+
+def _event_order(bar):
+    # Nanoseconds since the epoch (UTC for tz-aware timestamps)
+    return bar.timestamp.value
+
+
+class ReplayBarSource:
+    """Replays stored or recorded bars for many symbols in timestamp order.
+
+    Bars come from the market data provider (recorded files or synthetic
+    bars with the replay provider), merged across symbols so a strategy
+    sees them in the order a live feed would deliver them.
+    """
+
+    def __init__(self, symbols, interval, start, end, provider=None):
+        self.symbols = symbols
+        self.interval = interval
+        self.start = start
+        self.end = end
+        self.provider = provider
+
+    def __iter__(self):
+        streams = []
+        for symbol in self.symbols:
+            data = download_range(symbol, self.start, self.end, self.interval, self.provider)
+            if data is not None and not data.empty:
+                streams.append(_bar_events(symbol, self.interval, data))
+        return heapq.merge(*streams, key=_event_order)
+
+
+class PollingBarSource:
+    """Live bars from polling the market data provider.
+
+    Every ``poll_seconds`` recent bars are requested for all symbols in one
+    grouped call, and bars that have closed since the previous poll are
+    emitted in timestamp order. The first poll of a symbol reaches back
+    ``warmup_bars`` so strategies start with full windows. ``symbols`` may
+    be a callable returning the current symbols, so symbols can be added
+    while the source runs. Naive bar timestamps are read as UTC.
+    """
+
+    def __init__(self, symbols, interval, poll_seconds=STRATEGY_RUNTIME_POLL_SECONDS, provider=None,
+                 warmup_bars=200):
+        self.symbols = symbols
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self.provider = provider
+        self.warmup_bars = warmup_bars
+        self.bar_length = BAR_LENGTHS.get(interval, pd.Timedelta(minutes=1))
+        self._last_seen = {}
+        self._stop = threading.Event()
+
+    def poll(self, now=None):
+        """Return the bars that closed since the previous poll."""
+        symbols = self.symbols() if callable(self.symbols) else self.symbols
+        if not symbols:
+            return []
+        provider = self.provider or get_provider()
+        now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+        if now.tz is None:
+            now = now.tz_localize('UTC')
+        warming = any(symbol not in self._last_seen for symbol in symbols)
+        lookback = self.bar_length * (self.warmup_bars if warming else 2)
+        start = (now - max(lookback, pd.Timedelta(days=1))).tz_convert(None).normalize()
+        end = (now + pd.Timedelta(days=1)).tz_convert(None).normalize()
+        frames = provider.download_many(list(symbols), start, end, self.interval)
+
+        bars = []
+        for symbol, data in frames.items():
+            if data is None or data.empty:
+                continue
+            index = data.index if data.index.tz is not None else data.index.tz_localize('UTC')
+            closed = data[(index + self.bar_length) <= now]
+            last_seen = self._last_seen.get(symbol)
+            if last_seen is not None:
+                closed = closed[closed.index > last_seen]
+            if not closed.empty:
+                self._last_seen[symbol] = closed.index[-1]
+                bars.extend(_bar_events(symbol, self.interval, closed))
+        bars.sort(key=_event_order)
+        return bars
+
+    def __iter__(self):
+        while not self._stop.is_set():
+            try:
+                yield from self.poll()
+            except Exception:
+                traceback.print_exc()
+            self._stop.wait(self.poll_seconds)
+
+    def close(self):
+        self._stop.set()
+
+
+class MomentumHandler:
+    """Moving average crossover ported from ``momentum_trading_strategy``.
+
+    Per-symbol state is a StreamingMomentum (two fixed-size windows and a
+    few counters), so each bar costs O(1) and positions match the batch
+    strategy run over the same bars.
+    """
+
+    name = 'momentum'
+
+    def __init__(self, short_window=5, long_window=20):
+        self.short_window = short_window
+        self.long_window = long_window
+        self.states = {}
+
+    def on_bar(self, bar):
+        state = self.states.get(bar.symbol)
+        if state is None:
+            state = self.states[bar.symbol] = StreamingMomentum(self.short_window, self.long_window)
+        short_mavg, long_mavg, _, position = state.update(bar.close)
+        if position == 1.0 or position == -1.0:
+            return PositionEvent(self.name, bar.symbol, bar.timestamp, position, bar.close,
+                                 {'short_mavg': short_mavg, 'long_mavg': long_mavg})
+        return None
+
+
+class EventRuntime:
+    """Event loop dispatching bars to strategy handlers.
+
+    Each bar from the source is passed to every registered handler; any
+    position change a handler returns is kept in a bounded history and
+    passed to the subscribed callbacks.
+    """
+
+    def __init__(self, history=STRATEGY_RUNTIME_EVENT_HISTORY):
+        self.handlers = []
+        self.listeners = []
+        self.events = deque(maxlen=history)
+        self.bars_processed = 0
+        self.last_bar = None
+        self._source = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def register(self, handler):
+        self.handlers.append(handler)
+        return handler
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+        return callback
+
+    def dispatch(self, bar):
+        """Run one bar through every handler; returns the emitted events."""
+        emitted = []
+        for handler in self.handlers:
+            event = handler.on_bar(bar)
+            if event is not None:
+                emitted.append(event)
+        self.bars_processed += 1
+        self.last_bar = bar.timestamp
+        if emitted:
+            with self._lock:
+                self.events.extend(emitted)
+            for event in emitted:
+                for callback in self.listeners:
+                    callback(event)
+        return emitted
+
+    def run(self, source, max_bars=None):
+        """Consume ``source`` in this thread until it ends (or ``max_bars``)."""
+        for count, bar in enumerate(source, 1):
+            self.dispatch(bar)
+            if max_bars is not None and count >= max_bars:
+                break
+
+    def start(self, source):
+        """Run the loop over ``source`` in a background thread."""
+        if self._thread is not None:
+            return
+        self._source = source
+        self._thread = threading.Thread(target=self.run, args=(source,), name='strategy-runtime', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._source is not None and hasattr(self._source, 'close'):
+            self._source.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def recent_events(self, symbol=None, limit=100):
+        with self._lock:
+            events = [e for e in self.events if symbol is None or e.symbol == symbol]
+        return [event.to_dict() for event in events[-limit:]]
+
+    def status(self):
+        return {
+            'running': self._thread is not None,
+            'handlers': [getattr(handler, 'name', type(handler).__name__) for handler in self.handlers],
+            'bars_processed': self.bars_processed,
+            'last_bar': self.last_bar.isoformat() if self.last_bar is not None else None,
+            'events': len(self.events),
+        }
+
+
+def runtime_symbols(spec=STRATEGY_RUNTIME_SYMBOLS):
+    return [symbol.strip().upper() for symbol in spec.split(',') if symbol.strip()]
+
+
+# Shared runtime trading the configured symbols with the momentum strategy
+strategy_runtime = EventRuntime()
+strategy_runtime.register(MomentumHandler())
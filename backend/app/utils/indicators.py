@@ -0,0 +1,115 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Maximum number of memoized indicator series kept in memory
+INDICATOR_CACHE_MAX_ENTRIES = int(os.environ.get('INDICATOR_CACHE_MAX_ENTRIES') or 512)
+
+# Memoized results keyed by (series version, indicator, parameters)
+_indicator_cache = OrderedDict()
+_indicator_cache_lock = threading.Lock()
+
+
+def _digest(array):
+    """128-bit digest of an array's raw buffer."""
+    return hashlib.blake2b(memoryview(np.ascontiguousarray(array)).cast('B'), digest_size=16).digest()
+
+
+def series_version(series):
+    """Content fingerprint of a Series: its name, dtype, length and digests.
+
+    Two Series with the same version hold the same values on the same
+    index, so an indicator computed for one can be reused for the other.
+    Hashing the raw buffers is far cheaper than any rolling window, and a
+    128-bit digest makes a collision between different series negligible.
+    A DataFrame (e.g. one close column per symbol) is fingerprinted the
+    same way, named by its columns.
+    """
+    values = np.ascontiguousarray(series.to_numpy())
+    if values.dtype == object:
+        # Object buffers hold pointers, so digest the row hashes instead
+        values_digest = _digest(pd.util.hash_pandas_object(series, index=False).to_numpy())
+    else:
+        values_digest = _digest(values)
+    index = series.index
+    index_values = index.asi8 if isinstance(index, pd.DatetimeIndex) else \
+        pd.util.hash_pandas_object(index, index=False).to_numpy()
+    name = tuple(series.columns) if isinstance(series, pd.DataFrame) else series.name
+    return (name, str(values.dtype), values.shape, values_digest, _digest(index_values),
+            str(getattr(index, 'tz', None)))
+
+
+def _memoized(series, name, params, compute):
+    key = (series_version(series), name, params)
+    with _indicator_cache_lock:
+        result = _indicator_cache.get(key)
+        if result is not None:
+            _indicator_cache.move_to_end(key)
+    if result is None:
+        result = compute()
+        with _indicator_cache_lock:
+            _indicator_cache[key] = result
+            while len(_indicator_cache) > INDICATOR_CACHE_MAX_ENTRIES:
+                _indicator_cache.popitem(last=False)
+    # Shallow copy: callers can modify it without touching the cached result
+    return result.copy(deep=False)
+
+
+def sma(series, window, min_periods=None):
+    """Simple moving average of a Series or each DataFrame column, as ``series.rolling(window).mean()``."""
+    return _memoized(series, 'sma', (window, min_periods),
+                     lambda: series.rolling(window=window, min_periods=min_periods).mean())
+
+
+def ema(series, span, adjust=False):
+    """Exponential moving average with the given span."""
+    return _memoized(series, 'ema', (span, adjust),
+                     lambda: series.ewm(span=span, adjust=adjust).mean())
+
+
+def returns(series, periods=1):
+    """Percentage change over ``periods`` bars, as ``series.pct_change(periods)``."""
+    return _memoized(series, 'returns', (periods,), lambda: series.pct_change(periods))
+
+
+def rolling_std(series, window, min_periods=None):
+    """Rolling standard deviation of the series itself."""
+    return _memoized(series, 'rolling_std', (window, min_periods),
+                     lambda: series.rolling(window=window, min_periods=min_periods).std())
+
+
+def volatility(series, window, min_periods=None):
+    """Rolling standard deviation of one-bar returns."""
+    return _memoized(series, 'volatility', (window, min_periods),
+                     lambda: returns(series).rolling(window=window, min_periods=min_periods).std())
+
+
+def rsi(series, window=14):
+    """Relative Strength Index with Wilder smoothing, from 0 to 100."""
+    def compute():
+        change = series.diff()
+        gain = change.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+        loss = (-change.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = 100 - 100 / (1 + gain / loss)
+        # No losses over the window means maximum strength
+        return value.where(loss != 0, 100.0).where(gain.notna())
+    return _memoized(series, 'rsi', (window,), compute)
+
+
+def bollinger_bands(series, window=20, num_std=2.0):
+    """Bollinger bands: DataFrame with 'middle', 'upper' and 'lower' columns."""
+    def compute():
+        middle = sma(series, window)
+        width = num_std * rolling_std(series, window)
+        return pd.DataFrame({'middle': middle, 'upper': middle + width, 'lower': middle - width})
+    return _memoized(series, 'bollinger_bands', (window, num_std), compute)
+
+
+def clear_indicator_cache():
+    """Drop all memoized indicators."""
+    with _indicator_cache_lock:
+        _indicator_cache.clear()
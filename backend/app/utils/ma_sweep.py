@@ -0,0 +1,168 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Largest (pairs, bars) matrix built at once; sweeps are scored in chunks of pairs
+SWEEP_CHUNK_CELLS = int(os.environ.get('SWEEP_CHUNK_CELLS') or 8_000_000)
+# Window pairs swept by default: every short window against every longer long window
+DEFAULT_SHORT_WINDOWS = list(range(2, 51))
+DEFAULT_LONG_WINDOWS = list(range(10, 201, 5))
+
+
+def rolling_means(close, windows):
+    """Simple moving averages for many windows.
+
+    Each window uses pandas' compensated rolling mean, so the averages
+    (and the crossovers compared on them) are identical to
+    ``Series.rolling(w).mean()`` and ``momentum_trading_strategy``; a
+    cumulative sum difference drifts in the last bits and flips ties.
+
+    Args:
+        close: 1-D array of prices
+        windows: Iterable of window lengths
+
+    Returns:
+        2-D array of shape (len(windows), len(close)); entries before a
+        window is full are NaN
+    """
+    close = pd.Series(np.asarray(close, dtype=np.float64))
+    windows = list(windows)
+    means = np.empty((len(windows), len(close)))
+    for row, window in enumerate(windows):
+        means[row] = close.rolling(window).mean().to_numpy()
+    return means
+
+
+def window_pairs(short_windows=None, long_windows=None):
+    """All (short, long) pairs with short < long."""
+    short_windows = DEFAULT_SHORT_WINDOWS if short_windows is None else short_windows
+    long_windows = DEFAULT_LONG_WINDOWS if long_windows is None else long_windows
+    return [(s, l) for s in short_windows for l in long_windows if s < l]
+
+
+class SweepResult:
+    """Signals and summary statistics for a set of moving average pairs.
+
+    Only the per-window means and the ``stats`` are kept; ``signal`` and
+    ``positions`` build the (n_pairs, n_bars) matrices, with the same
+    meaning as the columns of ``momentum_trading_strategy``, on access.
+    """
+
+    def __init__(self, index, close, pairs, windows, means, stats):
+        self.index = index
+        self.close = close
+        self.pairs = pairs
+        self.windows = windows
+        self.means = means
+        self.stats = stats
+
+    @property
+    def signal(self):
+        return crossover_matrices(self.means, self.windows, self.pairs)[0]
+
+    @property
+    def positions(self):
+        return crossover_matrices(self.means, self.windows, self.pairs)[1]
+
+    def mean_for(self, window):
+        return self.means[self.windows.index(window)]
+
+    def signals_frame(self, short_window, long_window):
+        """The ``momentum_trading_strategy`` frame for one swept pair."""
+        signal, positions = crossover_matrices(self.means, self.windows, [(short_window, long_window)])
+        return pd.DataFrame({
+            'price': self.close,
+            'short_mavg': self.mean_for(short_window),
+            'long_mavg': self.mean_for(long_window),
+            'signal': signal[0],
+            'positions': positions[0],
+        }, index=self.index)
+
+
+def pair_chunks(pairs, n_bars, max_cells=None):
+    """Split ``pairs`` into consecutive (offset, pairs) chunks of at most ``max_cells`` (pairs x bars)."""
+    max_cells = SWEEP_CHUNK_CELLS if max_cells is None else max_cells
+    size = max(max_cells // max(n_bars, 1), 1)
+    return [(offset, pairs[offset:offset + size]) for offset in range(0, len(pairs), size)]
+
+
+def crossover_matrices(means, windows, pairs):
+    """Signal and position matrices for window pairs from precomputed means."""
+    lookup = {window: row for row, window in enumerate(windows)}
+    short_rows = np.array([lookup[s] for s, _ in pairs])
+    long_rows = np.array([lookup[l] for _, l in pairs])
+    short_windows = np.array([s for s, _ in pairs])
+
+    # NaN comparisons are False, so bars before the long window is full are flat
+    signal = (means[short_rows] > means[long_rows]).astype(np.float64)
+    signal[np.arange(means.shape[1])[None, :] < short_windows[:, None]] = 0.0
+
+    positions = np.empty_like(signal)
+    positions[:, 0] = np.nan
+    positions[:, 1:] = np.diff(signal, axis=1)
+    return signal, positions
+
+
+def sweep_stats(close, signal, positions):
+    """Per-pair trade counts and returns of holding the signal from the next bar.
+
+    Sharpe ratios are annualized assuming daily bars.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    returns = np.zeros_like(close)
+    returns[1:] = close[1:] / close[:-1] - 1
+
+    strategy_returns = np.zeros_like(signal)
+    strategy_returns[:, 1:] = signal[:, :-1] * returns[None, 1:]
+    log_growth = np.log1p(strategy_returns).sum(axis=1)
+
+    volatility = strategy_returns[:, 1:].std(axis=1)
+    mean = strategy_returns[:, 1:].mean(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(volatility > 0, mean / volatility * np.sqrt(252), 0.0)
+
+    return {
+        'total_trades': np.nansum(np.abs(positions), axis=1).astype(int),
+        'buy_signals': (positions == 1.0).sum(axis=1),
+        'sell_signals': (positions == -1.0).sum(axis=1),
+        'exposure': signal.mean(axis=1),
+        'total_return': np.expm1(log_growth),
+        'sharpe': sharpe,
+    }
+
+
+def sweep_moving_averages(data, pairs=None):
+    """Evaluate many moving average crossover pairs in one vectorized pass.
+
+    Every window's moving average is computed once; pairs are then
+    compared as 2-D matrices (a chunk of pairs at a time) instead of
+    running ``momentum_trading_strategy`` once per pair.
+
+    Args:
+        data: DataFrame with a 'Close' column (or a Series of prices)
+        pairs: List of (short_window, long_window); defaults to every
+            pair from DEFAULT_SHORT_WINDOWS x DEFAULT_LONG_WINDOWS
+
+    Returns:
+        SweepResult with signal/position matrices and a ``stats`` DataFrame
+        indexed by 'short_long'
+    """
+    close_series = data['Close'] if isinstance(data, pd.DataFrame) else data
+    close = close_series.to_numpy(dtype=np.float64)
+    pairs = window_pairs() if pairs is None else [tuple(pair) for pair in pairs]
+
+    windows = sorted({w for pair in pairs for w in pair})
+    means = rolling_means(close, windows)
+
+    # Pairs are evaluated a chunk at a time, so memory stays bounded for
+    # thousands of pairs over long histories
+    chunks = []
+    for _, chunk in pair_chunks(pairs, len(close)):
+        signal, positions = crossover_matrices(means, windows, chunk)
+        chunks.append(pd.DataFrame(sweep_stats(close, signal, positions)))
+    stats = pd.concat(chunks, ignore_index=True)
+    stats.index = [f'{s}_{l}' for s, l in pairs]
+    stats.insert(0, 'short_window', [s for s, _ in pairs])
+    stats.insert(1, 'long_window', [l for _, l in pairs])
+
+    return SweepResult(close_series.index, close, pairs, windows, means, stats)
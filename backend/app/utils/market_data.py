@@ -0,0 +1,340 @@
+import os
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from app.utils.resample import resample_bars
+
+# Which provider serves market data: 'yfinance' (live) or 'replay' (offline)
+MARKET_DATA_PROVIDER = os.environ.get('MARKET_DATA_PROVIDER') or 'yfinance'
+# Directory holding recorded bars for the replay provider
+REPLAY_DATA_DIR = os.environ.get('REPLAY_DATA_DIR') or os.path.join('data', 'replay')
+# Maximum number of concurrent upstream requests when fetching in chunks
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS') or 4)
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class MarketDataProvider:
+    """Interface for sources of OHLCV bars and latest quotes.
+
+    Dates passed to providers are day timestamps; ``end`` is exclusive.
+    Intervals use the yfinance interval strings ('1m', '1h', '1d', ...).
+    """
+
+    def download(self, symbol, start, end, interval):
+        """Return bars for one symbol as a DataFrame with OHLCV columns."""
+        raise NotImplementedError
+
+    def max_request_days(self, interval):
+        """Longest date span a single request may cover, or None if unlimited."""
+        return None
+
+    def max_history_days(self, interval):
+        """How far back data is available for an interval, or None if unlimited."""
+        return None
+
+    def download_many(self, symbols, start, end, interval):
+        """Return bars for several symbols as a dict of DataFrames."""
+        return {symbol: self.download(symbol, start, end, interval) for symbol in symbols}
+
+    def latest_quotes(self, symbols):
+        """Return the most recent hourly high for each symbol."""
+        end = pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+        frames = self.download_many(symbols, end - pd.Timedelta(days=5), end, '1h')
+        return {symbol: float(frame['High'].iloc[-1])
+                for symbol, frame in frames.items() if not frame.empty}
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live market data from Yahoo Finance."""
+
+    # Yahoo serves 1m bars in 7-day requests for the last 30 days, other
+    # sub-hourly bars for the last 60 days and hourly bars for 730 days.
+    # Hourly requests are split into 60-day chunks so they run concurrently.
+    REQUEST_DAYS = {'1m': 7, '2m': 60, '5m': 60, '15m': 60, '30m': 60, '90m': 60, '60m': 60, '1h': 60}
+    HISTORY_DAYS = {'1m': 30, '2m': 60, '5m': 60, '15m': 60, '30m': 60, '90m': 60, '60m': 730, '1h': 730}
+
+    def max_request_days(self, interval):
+        return self.REQUEST_DAYS.get(interval)
+
+    def max_history_days(self, interval):
+        return self.HISTORY_DAYS.get(interval)
+
+    def download(self, symbol, start, end, interval):
+        data = yf.download(
+            symbol,
+            start=pd.Timestamp(start).strftime('%Y-%m-%d'),
+            end=pd.Timestamp(end).strftime('%Y-%m-%d'),
+            interval=interval,
+            progress=False
+        )
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        return data.dropna()
+
+    def download_many(self, symbols, start, end, interval):
+        raw = yf.download(
+            list(symbols),
+            start=pd.Timestamp(start).strftime('%Y-%m-%d'),
+            end=pd.Timestamp(end).strftime('%Y-%m-%d'),
+            interval=interval,
+            group_by='ticker',
+            progress=False
+        )
+        frames = {}
+        for symbol in symbols:
+            if isinstance(raw.columns, pd.MultiIndex):
+                # Yahoo returns upper-case tickers whatever case was requested
+                ticker = symbol.upper()
+                if ticker not in raw.columns.get_level_values(0):
+                    continue
+                frames[symbol] = raw[ticker].dropna()
+            else:
+                frames[symbol] = raw.dropna()
+        return frames
+
+    def latest_quotes(self, symbols):
+        data = yf.download(
+            list(symbols),
+            period='5d',
+            interval='1h',
+            group_by='column',
+            progress=False
+        )
+        if data.empty:
+            return {}
+
+        highs = data['High']
+        if isinstance(highs, pd.Series):
+            highs = highs.to_frame(list(symbols)[0])
+
+        quotes = {}
+        for symbol in highs.columns:
+            series = highs[symbol].dropna()
+            if not series.empty:
+                quotes[symbol] = float(series.iloc[-1])
+        return quotes
+
+
+class ReplayProvider(MarketDataProvider):
+    """Deterministic offline market data for tests and benchmarks.
+
+    Bars are read from ``{root}/{interval}/{SYMBOL}.csv`` when a recording
+    exists. Otherwise a synthetic random walk is generated that depends
+    only on the symbol, interval and timestamps, so repeated and
+    overlapping requests always return identical bars.
+    """
+
+    # Daily anchor path starts here; synthetic data before it is not served
+    EPOCH = pd.Timestamp('2000-01-03')
+
+    def __init__(self, root=REPLAY_DATA_DIR, annual_volatility=0.3):
+        self.root = root
+        self.annual_volatility = annual_volatility
+        self._recordings = {}
+        self._anchors = {}
+        self._lock = threading.Lock()
+
+    def download(self, symbol, start, end, interval):
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+
+        recording = self._recording(symbol, interval)
+        if recording is not None:
+            days = recording.index.normalize()
+            if days.tz is not None:
+                days = days.tz_localize(None)
+            return recording[(days >= start) & (days < end)]
+
+        if interval in ('1wk', '1mo'):
+            daily = self.download(symbol, start, end, '1d')
+            return resample_bars(daily, interval)
+        return self._synthetic(symbol, start, end, interval)
+
+    def _recording(self, symbol, interval):
+        key = (symbol.upper(), interval)
+        with self._lock:
+            if key not in self._recordings:
+                path = os.path.join(self.root, interval, f"{symbol.upper()}.csv")
+                recording = None
+                if os.path.exists(path):
+                    recording = pd.read_csv(path, index_col=0, parse_dates=True).sort_index()
+                self._recordings[key] = recording
+            return self._recordings[key]
+
+    def _daily_anchors(self, symbol, last_day):
+        """Close price at the start of each calendar day since EPOCH."""
+        n_days = (last_day - self.EPOCH).days + 2
+        with self._lock:
+            anchors = self._anchors.get(symbol)
+            if anchors is None or len(anchors) < n_days:
+                rng = np.random.default_rng(_seed(symbol, 'daily'))
+                # Always draw the full history so earlier days never change
+                n_draw = max(n_days, 365 * 30)
+                sigma = self.annual_volatility / np.sqrt(365)
+                steps = rng.normal(0.0002, sigma, n_draw)
+                base = 20 + _seed(symbol, 'base') % 480
+                anchors = base * np.exp(np.concatenate([[0.0], np.cumsum(steps)]))
+                self._anchors[symbol] = anchors
+            return anchors
+
+    def _synthetic(self, symbol, start, end, interval):
+        start = max(start, self.EPOCH)
+        if end <= start:
+            return pd.DataFrame(columns=PRICE_COLUMNS)
+
+        is_crypto = symbol.upper().endswith('-USD')
+        days = pd.date_range(start, end, freq='D', inclusive='left')
+        if not is_crypto:
+            days = days[days.dayofweek < 5]
+        if len(days) == 0:
+            return pd.DataFrame(columns=PRICE_COLUMNS)
+
+        anchors = self._daily_anchors(symbol, days[-1])
+        offsets = (days - self.EPOCH).days.to_numpy()
+        day_open = anchors[offsets]
+        day_close = anchors[offsets + 1]
+
+        if interval == '1d':
+            index = days
+            opens, closes = day_open, day_close
+            seeds = [_seed(symbol, interval, day.value) for day in days]
+            noise = np.array([np.random.default_rng(seed).random(3) for seed in seeds])
+        else:
+            step = pd.Timedelta(_INTRADAY_STEPS[interval])
+            per_day = int(pd.Timedelta(days=1) / step)
+            sigma = self.annual_volatility / np.sqrt(365 * per_day)
+
+            # Brownian bridge from each day's open anchor to its close anchor
+            paths, noise = [], []
+            for day, first, last in zip(days, day_open, day_close):
+                rng = np.random.default_rng(_seed(symbol, interval, day.value))
+                walk = np.cumsum(rng.normal(0, sigma, per_day))
+                t = np.arange(1, per_day + 1) / per_day
+                bridge = walk - t * walk[-1] + t * np.log(last / first)
+                paths.append(first * np.exp(bridge))
+                noise.append(rng.random((per_day, 3)))
+            closes = np.concatenate(paths)
+            opens = np.concatenate([
+                np.concatenate([[first], path[:-1]]) for first, path in zip(day_open, paths)
+            ])
+            noise = np.concatenate(noise)
+            index = (days.to_numpy()[:, None] + np.arange(per_day) * step.to_timedelta64()).ravel()
+            index = pd.DatetimeIndex(index)
+
+        spread = np.abs(closes - opens) + closes * 0.002
+        data = pd.DataFrame({
+            'Open': opens,
+            'High': np.maximum(opens, closes) + spread * noise[:, 0],
+            'Low': np.minimum(opens, closes) - spread * noise[:, 1],
+            'Close': closes,
+            'Volume': np.round(1e5 + 1e6 * noise[:, 2]),
+        }, index=index)
+        data.index.name = 'Date'
+        return data
+
+
+_INTRADAY_STEPS = {
+    '1m': '1min',
+    '2m': '2min',
+    '5m': '5min',
+    '15m': '15min',
+    '30m': '30min',
+    '60m': '1h',
+    '90m': '90min',
+    '1h': '1h',
+}
+
+
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='market-data')
+
+
+def date_chunks(start, end, chunk_days):
+    """Split ``[start, end)`` into consecutive day ranges of at most ``chunk_days``."""
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    if not chunk_days or end - start <= pd.Timedelta(days=chunk_days):
+        return [(start, end)]
+
+    chunks = []
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + pd.Timedelta(days=chunk_days), end)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return chunks
+
+
+def _stitch(frames):
+    """Concatenate chunk frames into one de-duplicated, time-sorted frame."""
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    data = pd.concat(frames)
+    data = data[~data.index.duplicated(keep='last')]
+    return data.sort_index()
+
+
+def download_range(symbol, start, end, interval, provider=None):
+    """Download bars for one symbol, splitting long ranges into provider-sized
+    chunks that are fetched concurrently on the shared worker pool."""
+    provider = provider or get_provider()
+    chunks = date_chunks(start, end, provider.max_request_days(interval))
+    if len(chunks) == 1:
+        return provider.download(symbol, start, end, interval)
+
+    futures = [_fetch_pool.submit(provider.download, symbol, chunk_start, chunk_end, interval)
+               for chunk_start, chunk_end in chunks]
+    return _stitch([future.result() for future in futures])
+
+
+def download_range_many(symbols, start, end, interval, provider=None):
+    """Grouped download for several symbols, chunked like ``download_range``."""
+    provider = provider or get_provider()
+    chunks = date_chunks(start, end, provider.max_request_days(interval))
+    if len(chunks) == 1:
+        return provider.download_many(symbols, start, end, interval)
+
+    futures = [_fetch_pool.submit(provider.download_many, symbols, chunk_start, chunk_end, interval)
+               for chunk_start, chunk_end in chunks]
+    parts = [future.result() for future in futures]
+    return {symbol: _stitch([part.get(symbol) for part in parts])
+            for symbol in symbols if any(symbol in part for part in parts)}
+
+
+def _seed(*parts):
+    return zlib.crc32('|'.join(str(part).upper() for part in parts).encode())
+
+
+def save_replay_file(data, symbol, interval, root=REPLAY_DATA_DIR):
+    """Record bars so the replay provider serves them instead of synthetic data."""
+    os.makedirs(os.path.join(root, interval), exist_ok=True)
+    data.to_csv(os.path.join(root, interval, f"{symbol.upper()}.csv"))
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Return the configured market data provider."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if MARKET_DATA_PROVIDER == 'replay':
+                _provider = ReplayProvider()
+            elif MARKET_DATA_PROVIDER == 'yfinance':
+                _provider = YFinanceProvider()
+            else:
+                raise ValueError(f"Unknown market data provider: {MARKET_DATA_PROVIDER}")
+        return _provider
+
+
+def set_provider(provider):
+    """Replace the market data provider, e.g. with a ReplayProvider in tests."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,147 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from app.utils.prefetch import BAR_FREQUENCIES
+
+# Simulated paths per forecast, generated in chunks to bound memory
+MONTE_CARLO_PATHS = int(os.environ.get('MONTE_CARLO_PATHS') or 20000)
+MONTE_CARLO_CHUNK = int(os.environ.get('MONTE_CARLO_CHUNK') or 5000)
+# Largest (paths, steps) array simulated at once; long horizons of short bars use smaller chunks
+MONTE_CARLO_MAX_CELLS = int(os.environ.get('MONTE_CARLO_MAX_CELLS') or 4_000_000)
+# Wall-clock budget for one simulation; remaining chunks are skipped once spent
+MONTE_CARLO_BUDGET_MS = float(os.environ.get('MONTE_CARLO_BUDGET_MS') or 250)
+# Bars of history the return distribution is estimated from
+MONTE_CARLO_LOOKBACK = int(os.environ.get('MONTE_CARLO_LOOKBACK') or 252)
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Forecast horizons labelled like SKModel.predict: in trading days of an
+# exchange, in calendar days of markets trading around the clock (crypto),
+# and in hourly bars
+DAILY_HORIZONS = {'1d': 1, '7d': 5, '30d': 21, '90d': 63}
+CALENDAR_HORIZONS = {'1d': 1, '7d': 7, '30d': 30, '90d': 90}
+HOURLY_HORIZONS = {'1h': 1, '4h': 4, '8h': 8, '24h': 24}
+
+# Length of an exchange's trading day, for intraday bars
+SESSION_LENGTH = pd.Timedelta(hours=6.5)
+
+
+def horizons_for(interval, continuous=False):
+    """Forecast horizons, in bars of ``interval``, matching its prediction labels.
+
+    Args:
+        interval: API interval of the bars
+        continuous: Whether the market trades every day around the clock
+            (crypto), so horizons count calendar days
+
+    Returns:
+        Dict of label -> bars ahead
+    """
+    if interval == 'hour':
+        return HOURLY_HORIZONS
+    bar = pd.Timedelta(BAR_FREQUENCIES.get(interval, '1D'))
+    if continuous:
+        bars_per_day = pd.Timedelta(days=1) / bar
+        days = CALENDAR_HORIZONS
+    elif bar < pd.Timedelta(days=1):
+        bars_per_day = SESSION_LENGTH / bar
+        days = DAILY_HORIZONS
+    else:
+        # Daily and longer bars only cover trading days, five a week
+        bars_per_day = 1 / max(round(bar.days * 5 / 7), 1)
+        days = DAILY_HORIZONS
+    return {label: max(round(count * bars_per_day), 1) for label, count in days.items()}
+
+
+def _log_returns(close, lookback):
+    close = np.asarray(close, dtype=np.float64)[-(lookback + 1):]
+    returns = np.diff(np.log(close))
+    return returns[np.isfinite(returns)]
+
+
+def simulate_paths(log_returns, n_paths, n_steps, method='bootstrap', rng=None):
+    """Simulate cumulative log returns of price paths as one array.
+
+    ``bootstrap`` resamples historical one-bar log returns; ``gbm`` draws
+    normal steps with the historical mean and volatility (geometric
+    Brownian motion).
+
+    Returns:
+        Array of shape (n_paths, n_steps) with the cumulative log return of
+        each path after each step
+    """
+    rng = rng or np.random.default_rng()
+    if method == 'bootstrap':
+        steps = log_returns[rng.integers(0, len(log_returns), size=(n_paths, n_steps))]
+    elif method == 'gbm':
+        std = log_returns.std(ddof=1) if len(log_returns) > 1 else 0.0
+        steps = rng.normal(log_returns.mean(), std, size=(n_paths, n_steps))
+    else:
+        raise ValueError(f"Unknown simulation method: {method}")
+    return np.cumsum(steps, axis=1)
+
+
+def forecast_bands(close, horizons=None, n_paths=MONTE_CARLO_PATHS, method='bootstrap',
+                   quantiles=QUANTILES, chunk_size=MONTE_CARLO_CHUNK, lookback=MONTE_CARLO_LOOKBACK,
+                   time_budget=None, seed=None):
+    """Monte Carlo price quantile bands for several horizons.
+
+    Paths are simulated ``chunk_size`` at a time (fewer when the longest
+    horizon would make the chunk exceed MONTE_CARLO_MAX_CELLS); only the
+    cumulative return at each horizon is kept from a chunk, so memory
+    stays at one (chunk_size, longest horizon) array. With a ``time_budget`` (seconds)
+    no new chunk is started once it is spent, so the band quality degrades
+    gracefully instead of the caller missing its latency target.
+
+    Args:
+        close: Array or Series of historical closes (last value is current)
+        horizons: Dict of label -> bars ahead; defaults to DAILY_HORIZONS
+        n_paths: Paths to simulate
+        method: 'bootstrap' or 'gbm'
+        quantiles: Quantiles reported per horizon
+        chunk_size: Paths simulated per array operation
+        lookback: Bars of history used to estimate returns
+        time_budget: Optional wall-clock limit in seconds
+        seed: Optional random seed for reproducible bands
+
+    Returns:
+        Dict with per-horizon 'bands' ({label: {'p5': ..., 'p50': ..., 'mean': ...}}),
+        and the 'paths' simulated, 'method' and 'elapsed_ms'
+    """
+    started = time.perf_counter()
+    horizons = horizons or DAILY_HORIZONS
+    close = np.asarray(close, dtype=np.float64)
+    current_price = close[-1]
+    log_returns = _log_returns(close, lookback)
+    if len(log_returns) < 2:
+        raise ValueError("Not enough price history for a Monte Carlo forecast")
+
+    labels = list(horizons)
+    columns = np.array([horizons[label] for label in labels]) - 1
+    n_steps = int(columns.max()) + 1
+    rng = np.random.default_rng(seed)
+    chunk_size = max(min(chunk_size, MONTE_CARLO_MAX_CELLS // n_steps), 1)
+
+    terminal, simulated = [], 0
+    while simulated < n_paths:
+        size = min(chunk_size, n_paths - simulated)
+        terminal.append(simulate_paths(log_returns, size, n_steps, method, rng)[:, columns])
+        simulated += size
+        if time_budget is not None and time.perf_counter() - started > time_budget:
+            break
+
+    prices = current_price * np.exp(np.concatenate(terminal))
+    levels = np.quantile(prices, quantiles, axis=0)
+    bands = {}
+    for column, label in enumerate(labels):
+        band = {f"p{round(q * 100)}": float(levels[row, column]) for row, q in enumerate(quantiles)}
+        band['mean'] = float(prices[:, column].mean())
+        bands[label] = band
+
+    return {
+        'bands': bands,
+        'paths': simulated,
+        'method': method,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
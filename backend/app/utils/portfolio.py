@@ -0,0 +1,165 @@
+import os
+import numpy as np
+import pandas as pd
+from app.utils.backtest import BACKTEST_FEE_BPS, BACKTEST_SLIPPAGE_BPS, BACKTEST_INITIAL_CAPITAL
+from app.utils.backtest import PERIODS_PER_YEAR
+from app.utils.screener import align_closes, DAILY_INTERVALS
+from app.utils.trading_strategy import fetch_stock_data_batch, momentum_trading_strategy_batch
+
+# Bars between portfolio rebalances, or a pandas period such as 'W' or 'M'
+PORTFOLIO_REBALANCE = os.environ.get('PORTFOLIO_REBALANCE') or 'M'
+
+
+def rebalance_rows(index, rebalance=PORTFOLIO_REBALANCE):
+    """Row numbers of the rebalance bars; the first bar always rebalances.
+
+    ``rebalance`` is either a number of bars or a pandas period alias, in
+    which case the first bar of each new period rebalances.
+    """
+    n = len(index)
+    if isinstance(rebalance, str) and not rebalance.isdigit():
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        periods = index.to_period(rebalance).asi8
+        return np.flatnonzero(np.diff(periods, prepend=periods[0] - 1) != 0) if n else np.array([], dtype=int)
+    return np.arange(0, n, max(1, int(rebalance)))
+
+
+def target_weights(signal, tradable, max_weight=1.0, cash_buffer=0.0):
+    """Equal weights across held assets, capped per asset, leaving cash unspent.
+
+    Args:
+        signal: (n_rebalances, n_assets) 0/1 crossover signals
+        tradable: Boolean mask of assets with a price on each rebalance bar
+        max_weight: Largest weight of a single asset
+        cash_buffer: Fraction of equity always kept in cash
+
+    Returns:
+        (n_rebalances, n_assets) weights summing to at most ``1 - cash_buffer``
+    """
+    held = (signal > 0) & tradable
+    count = held.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = np.where(held, (1 - cash_buffer) / count, 0.0)
+    return np.minimum(weights, max_weight)
+
+
+def portfolio_backtest(closes, short_window=5, long_window=20, rebalance=PORTFOLIO_REBALANCE,
+                       fee_bps=BACKTEST_FEE_BPS, slippage_bps=BACKTEST_SLIPPAGE_BPS,
+                       initial_capital=BACKTEST_INITIAL_CAPITAL, max_weight=1.0, cash_buffer=0.0,
+                       periods_per_year=252):
+    """Backtest an equal-weight crossover portfolio over many symbols at once.
+
+    On each rebalance bar the portfolio is traded at the close to equal
+    weights across the symbols whose ``momentum_trading_strategy`` signal
+    is long; between rebalances holdings are left to drift with prices.
+    The whole run is matrix operations over the (time x asset) weight and
+    price arrays: equity within a rebalance period is the held weights
+    times each asset's price relative to the rebalance bar, and the
+    periods are chained with one cumulative product. Costs are charged on
+    the turnover from the drifted to the new weights, and the portfolio is
+    never leveraged (unallocated weight stays in cash).
+
+    Args:
+        closes: DataFrame of aligned close prices, one column per symbol
+        short_window, long_window: Crossover windows
+        rebalance: Bars between rebalances, or a pandas period alias ('W', 'M')
+        fee_bps, slippage_bps: Costs per unit of turnover, in basis points
+        initial_capital: Starting equity
+        max_weight: Largest weight of a single asset
+        cash_buffer: Fraction of equity always kept in cash
+        periods_per_year: Bars per year, to annualize returns
+
+    Returns:
+        tuple: (DataFrame of per-bar equity, returns, drawdown, turnover,
+        fees, slippage, cash and holdings; DataFrame of target weights on
+        each rebalance bar; dict of summary statistics)
+    """
+    prices = closes.to_numpy(dtype=np.float64)
+    n, m = prices.shape
+    signal = momentum_trading_strategy_batch(closes, short_window, long_window)['signal'].to_numpy()
+
+    rows = rebalance_rows(closes.index, rebalance)
+    weights = target_weights(signal[rows], np.isfinite(prices[rows]) & (prices[rows] > 0),
+                             max_weight, cash_buffer)
+    cash = 1 - weights.sum(axis=1)
+
+    # Period of each bar and each asset's price relative to its period's rebalance bar
+    period = np.cumsum(np.isin(np.arange(n), rows)) - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.nan_to_num(prices / prices[rows][period])
+        period_end = np.nan_to_num(prices[rows[1:]] / prices[rows[:-1]])
+    growth = cash[period] + np.einsum('ij,ij->i', weights[period], relative)
+
+    # Weights drifted to the next rebalance bar, and the turnover to the new targets
+    end_growth = cash[:-1] + np.einsum('ij,ij->i', weights[:-1], period_end)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drifted = np.nan_to_num(weights[:-1] * period_end / end_growth[:, None])
+    turnover = np.abs(weights - np.vstack([np.zeros((1, m)), drifted])).sum(axis=1)
+    fee_rate = turnover * fee_bps / 1e4
+    slippage_rate = turnover * slippage_bps / 1e4
+
+    # Equity right after each rebalance, chaining every period's growth
+    chained = np.concatenate([[1.0], end_growth]) * (1 - fee_rate - slippage_rate)
+    after_rebalance = initial_capital * np.cumprod(chained)
+    equity = after_rebalance[period] * growth
+    before_rebalance = np.concatenate([[initial_capital], after_rebalance[:-1] * end_growth])
+
+    returns = np.zeros(n)
+    returns[1:] = equity[1:] / equity[:-1] - 1
+    bar_turnover, fees, slippage = np.zeros(n), np.zeros(n), np.zeros(n)
+    bar_turnover[rows] = turnover
+    fees[rows] = before_rebalance * fee_rate
+    slippage[rows] = before_rebalance * slippage_rate
+
+    frame = pd.DataFrame({
+        'equity': equity,
+        'returns': returns,
+        'drawdown': equity / np.maximum.accumulate(equity) - 1,
+        'turnover': bar_turnover,
+        'fees': fees,
+        'slippage': slippage,
+        'cash': cash[period] / growth,
+        'holdings': (weights > 0).sum(axis=1)[period],
+    }, index=closes.index)
+    weight_frame = pd.DataFrame(weights, index=closes.index[rows], columns=closes.columns)
+
+    total_return = equity[-1] / initial_capital - 1 if n else 0.0
+    volatility = returns[1:].std() if n > 1 else 0.0
+    years = n / periods_per_year
+    summary = {
+        'initial_capital': initial_capital,
+        'final_equity': equity[-1] if n else initial_capital,
+        'total_return': total_return,
+        'cagr': (1 + total_return) ** (1 / years) - 1 if years > 0 and total_return > -1 else total_return,
+        'annual_volatility': volatility * np.sqrt(periods_per_year),
+        'sharpe': returns[1:].mean() / volatility * np.sqrt(periods_per_year) if volatility > 0 else 0.0,
+        'max_drawdown': frame['drawdown'].min() if n else 0.0,
+        'fees': fees.sum(),
+        'slippage': slippage.sum(),
+        'turnover': turnover.sum(),
+        'rebalances': len(rows),
+        'average_holdings': frame['holdings'].mean() if n else 0.0,
+        'average_cash': frame['cash'].mean() if n else 1.0,
+        'assets': m,
+        'fee_bps': fee_bps,
+        'slippage_bps': slippage_bps,
+    }
+    return frame, weight_frame, summary
+
+
+def backtest_portfolio(symbols, timeframe='1Y', interval='day', **kwargs):
+    """Fetch bars for ``symbols`` and backtest them as one crossover portfolio.
+
+    Returns:
+        tuple: (per-bar DataFrame, rebalance weights DataFrame, summary dict,
+        dict of symbols that could not be fetched)
+    """
+    frames, errors = fetch_stock_data_batch(symbols, timeframe, interval)
+    closes = align_closes(frames, by_day=interval in DAILY_INTERVALS)
+    if closes.empty:
+        raise Exception(f"No price data for any of {', '.join(symbols)}")
+    kwargs.setdefault('periods_per_year', PERIODS_PER_YEAR.get(interval, 252))
+    frame, weights, summary = portfolio_backtest(closes, **kwargs)
+    return frame, weights, summary, errors
@@ -0,0 +1,184 @@
+import os
+import time
+import threading
+import traceback
+import pandas as pd
+from datetime import datetime
+from app.models.sk_models import SKModel
+from app.models.model_registry import model_registry
+from app.utils.trading_strategy import fetch_stock_data
+from app.utils.streaming_signals import streaming_signals, stream_key
+
+# Watchlist kept warm by the scheduler, as "SYMBOL:interval:timeframe" entries,
+# e.g. PREFETCH_WATCHLIST="NVDA:day:1Y,BTC:hour:1M"
+PREFETCH_WATCHLIST = os.environ.get('PREFETCH_WATCHLIST') or ''
+# Seconds to wait after a bar closes before refreshing, so the provider has it
+PREFETCH_DELAY_SECONDS = float(os.environ.get('PREFETCH_DELAY_SECONDS') or 30)
+
+# Bar length of each API interval, used to find the next bar close (weeks and
+# months close on calendar boundaries, see next_bar_close) and to convert
+# forecast horizons into bars
+BAR_FREQUENCIES = {
+    'minute': '1min',
+    '5min': '5min',
+    '15min': '15min',
+    '30min': '30min',
+    'hour': '1h',
+    'day': '1D',
+    'week': '7D',
+    'month': '30D',
+}
+
+
+def parse_watchlist(spec):
+    """Parse a "SYMBOL:interval:timeframe,..." watchlist specification."""
+    entries = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        parts = item.split(':')
+        symbol = parts[0].upper()
+        interval = parts[1] if len(parts) > 1 else 'day'
+        timeframe = parts[2] if len(parts) > 2 else '1Y'
+        entries.append((symbol, interval, timeframe))
+    return entries
+
+
+def next_bar_close(interval, now=None):
+    """Return the time the current bar of ``interval`` closes."""
+    now = pd.Timestamp(now) if now is not None else pd.Timestamp.now()
+    if interval == 'week':
+        return (now + pd.offsets.Week(weekday=0)).normalize()
+    if interval == 'month':
+        return (now + pd.offsets.MonthBegin()).normalize()
+
+    freq = BAR_FREQUENCIES.get(interval, '1h')
+    close = now.ceil(freq)
+    return close if close > now else close + pd.Timedelta(freq)
+
+
+class WatchlistEntry:
+    """Refresh state of one watched (symbol, interval, timeframe)."""
+
+    def __init__(self, symbol, interval, timeframe):
+        self.symbol = symbol
+        self.interval = interval
+        self.timeframe = timeframe
+        self.next_run = None
+        self.last_refresh = None
+        self.last_bar = None
+        self.duration = None
+        self.error = None
+        self.signals = None
+        self.model = None
+        self.predictions = None
+        self.performance = None
+
+    @property
+    def key(self):
+        return (self.symbol, self.interval, self.timeframe)
+
+    def status(self):
+        return {
+            'symbol': self.symbol,
+            'interval': self.interval,
+            'timeframe': self.timeframe,
+            'last_refresh': self.last_refresh.isoformat() if self.last_refresh else None,
+            'next_run': self.next_run.isoformat() if self.next_run is not None else None,
+            'last_bar': self.last_bar.isoformat() if self.last_bar is not None else None,
+            'duration_seconds': self.duration,
+            'model_ready': self.model is not None,
+            'error': self.error,
+        }
+
+
+class PrefetchScheduler:
+    """Background thread that keeps watchlist bars, signals and models warm.
+
+    Each entry is refreshed shortly after its bar closes: new bars are
+    fetched into the chart cache, crossover signals are recomputed and the
+    entry's model in the model registry is brought up to date (updated
+    incrementally when possible) and evaluated, so request handlers rarely
+    pay for a cold fetch or a training run.
+    """
+
+    def __init__(self, watchlist, delay=PREFETCH_DELAY_SECONDS, model_factory=SKModel, registry=model_registry):
+        self.delay = delay
+        self.model_factory = model_factory
+        self.registry = registry
+        self.entries = {}
+        for symbol, interval, timeframe in watchlist:
+            entry = WatchlistEntry(symbol, interval, timeframe)
+            self.entries[entry.key] = entry
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the scheduler thread; entries are warmed immediately."""
+        if self._thread is not None or not self.entries:
+            return
+        now = pd.Timestamp.now()
+        for entry in self.entries.values():
+            entry.next_run = now
+        self._thread = threading.Thread(target=self._run, name='prefetch-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = pd.Timestamp.now()
+            for entry in list(self.entries.values()):
+                if entry.next_run <= now:
+                    self.refresh(entry)
+                    entry.next_run = next_bar_close(entry.interval) + pd.Timedelta(seconds=self.delay)
+
+            next_run = min(entry.next_run for entry in self.entries.values())
+            wait = max((next_run - pd.Timestamp.now()).total_seconds(), 0.0)
+            self._stop.wait(min(wait, 60.0))
+
+    def refresh(self, entry):
+        """Refresh bars, signals and model predictions for one entry."""
+        started = time.monotonic()
+        try:
+            # Intraday entries wake up every bar, so they fetch today's session too
+            data = fetch_stock_data(entry.symbol, entry.timeframe, entry.interval, force_refresh=True,
+                                    include_today=True)
+            signals = streaming_signals.update(stream_key(entry.symbol, entry.timeframe, entry.interval), data)
+
+            if self.registry is not None:
+                # Registered models are updated incrementally with the new bars
+                model = self.registry.get(entry.symbol, entry.interval, entry.timeframe, data)
+            else:
+                model = self.model_factory()
+                model.train(data)
+            performance = model.evaluate(data)
+            predictions = model.predict(data)
+
+            with self._lock:
+                entry.signals = signals
+                entry.model = model
+                entry.predictions = predictions
+                entry.performance = performance
+                entry.last_bar = data.index[-1]
+                entry.error = None
+        except Exception as e:
+            traceback.print_exc()
+            entry.error = str(e)
+        finally:
+            entry.last_refresh = datetime.now()
+            entry.duration = round(time.monotonic() - started, 3)
+
+    def status(self):
+        with self._lock:
+            return [entry.status() for entry in self.entries.values()]
+
+
+# Shared scheduler for the configured watchlist
+prefetch_scheduler = PrefetchScheduler(parse_watchlist(PREFETCH_WATCHLIST))
@@ -0,0 +1,68 @@
+import os
+import time
+import threading
+from app.utils.market_data import get_provider
+
+# Seconds a cached quote is considered fresh
+QUOTE_TTL_SECONDS = float(os.environ.get('QUOTE_TTL_SECONDS') or 60)
+
+
+class QuoteCache:
+    """In-memory cache of latest quotes with a per-symbol TTL.
+
+    A miss or an expired entry triggers a bulk refresh: one upstream call
+    refreshes the requested symbol together with every symbol already in
+    the cache, so a busy set of currencies costs one download per TTL.
+    Symbols are upper-cased on the way in, like the provider's quote keys.
+    """
+
+    def __init__(self, ttl=QUOTE_TTL_SECONDS):
+        self.ttl = ttl
+        self._quotes = {}  # symbol -> (price, fetched_at)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def get(self, symbol):
+        """Return the latest quote for ``symbol``, refreshing if stale."""
+        symbol = symbol.upper()
+        quote = self._fresh(symbol)
+        if quote is not None:
+            return quote
+
+        # Only one thread refreshes at a time; the others re-check afterwards
+        with self._refresh_lock:
+            quote = self._fresh(symbol)
+            if quote is not None:
+                return quote
+            with self._lock:
+                symbols = set(self._quotes) | {symbol}
+            self.refresh(symbols)
+
+        with self._lock:
+            if symbol not in self._quotes:
+                raise Exception(f"No quote found for symbol {symbol}")
+            return self._quotes[symbol][0]
+
+    def refresh(self, symbols):
+        """Refresh the given symbols with a single upstream call."""
+        quotes = get_provider().latest_quotes(sorted({symbol.upper() for symbol in symbols}))
+        now = time.monotonic()
+        with self._lock:
+            for symbol, price in quotes.items():
+                self._quotes[symbol.upper()] = (price, now)
+        return quotes
+
+    def clear(self):
+        with self._lock:
+            self._quotes.clear()
+
+    def _fresh(self, symbol):
+        with self._lock:
+            entry = self._quotes.get(symbol)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+
+# Shared cache used by the exchange rate endpoint
+quote_cache = QuoteCache()
@@ -0,0 +1,71 @@
+import pandas as pd
+from app.utils.bar_store import index_days
+
+# Finer intervals a coarser one can be built from, in order of preference
+DERIVATION_SOURCES = {
+    '1h': ['30m', '15m', '5m', '1m'],
+    '1d': ['1h', '30m', '15m', '5m', '1m'],
+    '1wk': ['1d', '1h'],
+    '1mo': ['1d', '1h'],
+}
+
+# How each OHLCV column is aggregated into a coarser bar
+AGGREGATIONS = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Adj Close': 'last',
+    'Volume': 'sum',
+}
+
+
+def _bar_labels(index, interval):
+    """Start label of the coarser bar each timestamp falls into."""
+    if interval == '1h':
+        # Keep the session's minute offset so e.g. 09:30 opens give
+        # 09:30-10:30 bars, matching the provider's own hourly bars
+        offset = pd.Timedelta(minutes=index[0].minute)
+        return (index - offset).floor('h') + offset
+
+    days = index_days(index)
+    if interval == '1d':
+        return days
+    if interval == '1wk':
+        return days - pd.to_timedelta(days.dayofweek, unit='D')
+    if interval == '1mo':
+        return days.to_period('M').start_time
+    raise ValueError(f"Cannot resample bars to interval {interval}")
+
+
+def resample_bars(data, interval):
+    """Aggregate bars into a coarser interval.
+
+    Args:
+        data: DataFrame of OHLCV bars with a DatetimeIndex
+        interval: Target interval string ('1h', '1d', '1wk' or '1mo')
+
+    Returns:
+        DataFrame of coarser bars (first open, max high, min low, last
+        close, summed volume) indexed by bar start
+    """
+    if data.empty:
+        return data
+
+    labels = _bar_labels(pd.DatetimeIndex(data.index), interval)
+    aggregations = {col: AGGREGATIONS[col] for col in data.columns if col in AGGREGATIONS}
+    resampled = data.groupby(labels).agg(aggregations)
+    resampled.index.name = data.index.name
+    return resampled.dropna()
+
+
+def derive_from_store(store, symbol, interval, start, end):
+    """Build bars for ``interval`` from finer bars already in the store.
+
+    Returns None unless a finer interval is stored, fully covers
+    ``[start, end)`` and needs no upstream top-up.
+    """
+    for source in DERIVATION_SOURCES.get(interval, []):
+        if store.pending_start(symbol, source, start, end) is None:
+            return resample_bars(store.read(symbol, source, start, end), interval)
+    return None
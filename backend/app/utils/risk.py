@@ -0,0 +1,192 @@
+import os
+import warnings
+import threading
+from collections import OrderedDict
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from app.utils.bar_store import index_days
+from app.utils.indicators import series_version
+
+# Benchmark symbol betas are measured against
+RISK_BENCHMARK = os.environ.get('RISK_BENCHMARK') or 'SPY'
+# Bars in each rolling risk window
+RISK_WINDOW = int(os.environ.get('RISK_WINDOW') or 63)
+# Confidence level of the value-at-risk estimates
+RISK_CONFIDENCE = float(os.environ.get('RISK_CONFIDENCE') or 0.95)
+RISK_CACHE_MAX_ENTRIES = int(os.environ.get('RISK_CACHE_MAX_ENTRIES') or 256)
+
+# Risk frames keyed by (close version, benchmark version, parameters)
+_risk_cache = OrderedDict()
+_risk_cache_lock = threading.Lock()
+
+
+def _windows(values, window):
+    """(n, window) matrix of trailing windows; rows before the first full window are NaN."""
+    padded = np.concatenate([np.full(window - 1, np.nan), values])
+    return sliding_window_view(padded, window)
+
+
+def rolling_risk_arrays(returns, window=RISK_WINDOW, confidence=RISK_CONFIDENCE,
+                        periods_per_year=252, benchmark_returns=None):
+    """Rolling risk metrics of a return array in one vectorized pass.
+
+    A single (n, window) view of trailing returns feeds every statistic,
+    so no metric loops over bars. NaN returns (e.g. the first bar, or bars
+    missing from the benchmark) are ignored within each window, and a
+    window needs at least half its bars to produce a value.
+
+    Args:
+        returns: 1-D array of one-bar returns
+        window: Bars per rolling window
+        confidence: VaR confidence level, e.g. 0.95
+        periods_per_year: Bars per year, to annualize Sharpe, Sortino and volatility
+        benchmark_returns: Optional benchmark returns aligned with ``returns``
+
+    Returns:
+        Dict of 1-D arrays: var_historical and var_parametric (positive
+        numbers are losses), volatility, sharpe, sortino and beta when a
+        benchmark is given
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    windows = _windows(returns, window)
+    if benchmark_returns is not None:
+        benchmark = _windows(np.asarray(benchmark_returns, dtype=np.float64), window)
+        # Only bars where both series have a return count towards beta
+        paired = np.isnan(windows) | np.isnan(benchmark)
+        windows_paired = np.where(paired, np.nan, windows)
+        benchmark = np.where(paired, np.nan, benchmark)
+
+    counts = np.sum(~np.isnan(windows), axis=1)
+    valid = counts >= max(2, window // 2)
+    annualize = np.sqrt(periods_per_year)
+
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        # All-NaN windows (before the first full window) just yield NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(windows, axis=1)
+        std = np.nanstd(windows, axis=1, ddof=1)
+        downside = np.sqrt(np.nanmean(np.minimum(windows, 0.0) ** 2, axis=1))
+        quantile = np.nanquantile(windows, 1 - confidence, axis=1)
+        z = NormalDist().inv_cdf(1 - confidence)
+
+        result = {
+            'var_historical': -quantile,
+            'var_parametric': -(mean + z * std),
+            'volatility': std * annualize,
+            'sharpe': np.where(std > 0, mean / std * annualize, np.nan),
+            'sortino': np.where(downside > 0, mean / downside * annualize, np.nan),
+        }
+        if benchmark_returns is not None:
+            benchmark_mean = np.nanmean(benchmark, axis=1, keepdims=True)
+            own_mean = np.nanmean(windows_paired, axis=1, keepdims=True)
+            covariance = np.nanmean((windows_paired - own_mean) * (benchmark - benchmark_mean), axis=1)
+            variance = np.nanmean((benchmark - benchmark_mean) ** 2, axis=1)
+            paired_counts = np.sum(~np.isnan(benchmark), axis=1)
+            result['beta'] = np.where((variance > 0) & (paired_counts >= max(2, window // 2)),
+                                      covariance / variance, np.nan)
+
+    for name in result:
+        result[name] = np.where(valid, result[name], np.nan)
+    return result
+
+
+def drawdown_array(close):
+    """Drawdown from the running peak at each bar (0 at a new high, negative below)."""
+    close = np.asarray(close, dtype=np.float64)
+    return close / np.fmax.accumulate(close) - 1
+
+
+def _aligned_benchmark_returns(close, benchmark_close):
+    """Benchmark one-bar returns on ``close``'s bars (NaN where it has no bar)."""
+    def keys(index):
+        index = pd.DatetimeIndex(index)
+        local = index.tz_localize(None) if index.tz is not None else index
+        if (local == local.normalize()).all():
+            # Daily bars: match by calendar day so exchange-local and UTC days line up
+            return index_days(index)
+        return index.tz_convert('UTC') if index.tz is not None else index
+
+    benchmark = pd.Series(benchmark_close.pct_change().to_numpy(), index=keys(benchmark_close.index))
+    benchmark = benchmark[~benchmark.index.duplicated(keep='last')]
+    try:
+        return benchmark.reindex(keys(close.index)).to_numpy()
+    except TypeError:
+        # Mixed naive and tz-aware bars cannot be matched
+        return np.full(len(close), np.nan)
+
+
+def risk_metrics(data, benchmark=None, window=RISK_WINDOW, confidence=RISK_CONFIDENCE, periods_per_year=252):
+    """Rolling risk metrics for a bar DataFrame, cached with its bars.
+
+    Results are memoized on the version of the close series (and of the
+    benchmark closes), so repeated requests for the same bars reuse them.
+
+    Parameters:
+        data (pd.DataFrame): Bars with a 'Close' column
+        benchmark (pd.DataFrame): Optional benchmark bars for beta
+        window (int): Bars per rolling window
+        confidence (float): VaR confidence level
+        periods_per_year (int): Bars per year
+
+    Returns:
+        pd.DataFrame: returns, drawdown, var_historical, var_parametric,
+        volatility, sharpe, sortino (and beta) per bar
+    """
+    close = data['Close']
+    benchmark_close = benchmark['Close'] if benchmark is not None and not benchmark.empty else None
+    key = (series_version(close),
+           series_version(benchmark_close) if benchmark_close is not None else None,
+           window, confidence, periods_per_year)
+
+    with _risk_cache_lock:
+        frame = _risk_cache.get(key)
+        if frame is not None:
+            _risk_cache.move_to_end(key)
+            return frame.copy(deep=False)
+
+    values = close.to_numpy(dtype=np.float64)
+    returns = np.full(len(values), np.nan)
+    returns[1:] = values[1:] / values[:-1] - 1
+    benchmark_returns = _aligned_benchmark_returns(close, benchmark_close) if benchmark_close is not None else None
+
+    columns = {'returns': returns, 'drawdown': drawdown_array(values)}
+    columns.update(rolling_risk_arrays(returns, window, confidence, periods_per_year, benchmark_returns))
+    frame = pd.DataFrame(columns, index=close.index)
+
+    with _risk_cache_lock:
+        _risk_cache[key] = frame
+        while len(_risk_cache) > RISK_CACHE_MAX_ENTRIES:
+            _risk_cache.popitem(last=False)
+    return frame.copy(deep=False)
+
+
+def risk_summary(risk, periods_per_year=252):
+    """Latest rolling values plus whole-period drawdown, Sharpe and Sortino."""
+    returns = risk['returns'].to_numpy()[1:]
+    returns = returns[~np.isnan(returns)]
+    annualize = np.sqrt(periods_per_year)
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2)) if len(returns) else 0.0
+
+    latest = risk.iloc[-1] if len(risk) else pd.Series(dtype=float)
+    summary = {
+        'max_drawdown': risk['drawdown'].min() if len(risk) else 0.0,
+        'current_drawdown': latest.get('drawdown', np.nan),
+        'sharpe': returns.mean() / std * annualize if std > 0 else np.nan,
+        'sortino': returns.mean() / downside * annualize if downside > 0 else np.nan,
+        'rolling_sharpe': latest.get('sharpe', np.nan),
+        'rolling_sortino': latest.get('sortino', np.nan),
+        'var_historical': latest.get('var_historical', np.nan),
+        'var_parametric': latest.get('var_parametric', np.nan),
+        'volatility': latest.get('volatility', np.nan),
+    }
+    if 'beta' in risk.columns:
+        summary['beta'] = latest.get('beta', np.nan)
+    return summary
+
+
+def clear_risk_cache():
+    with _risk_cache_lock:
+        _risk_cache.clear()
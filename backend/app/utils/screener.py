@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from app.utils.bar_store import index_days
+from app.utils.trading_strategy import fetch_stock_data_batch, momentum_trading_strategy_batch
+
+# API intervals whose bars are aligned across symbols by calendar day
+DAILY_INTERVALS = ('day', 'week', 'month')
+
+
+def align_closes(frames, by_day=False):
+    """Stack per-symbol close prices into one (n_bars, n_symbols) DataFrame.
+
+    Bars are aligned on the union of all timestamps (or calendar days when
+    ``by_day``, so e.g. exchange-local and UTC daily bars line up). A symbol
+    without a bar at some timestamp carries its last close forward; bars
+    before its first close stay NaN.
+    """
+    columns = {}
+    for symbol, frame in frames.items():
+        if frame is None or frame.empty:
+            continue
+        close = frame['Close']
+        if by_day:
+            close = pd.Series(close.to_numpy(), index=index_days(close.index))
+            close = close[~close.index.duplicated(keep='last')]
+        elif close.index.tz is not None:
+            close = close.tz_convert('UTC')
+        columns[symbol] = close
+    if not columns:
+        return pd.DataFrame()
+    return pd.DataFrame(columns).sort_index().ffill()
+
+
+def screen(closes, short_window=5, long_window=20, momentum_window=20, volatility_window=20,
+           periods_per_year=252):
+    """Cross-sectional crossover screen over a matrix of close prices.
+
+    The crossover signals come from ``momentum_trading_strategy_batch``, so
+    every symbol's state matches ``momentum_trading_strategy`` on its
+    aligned closes; momentum, volatility and ranks are computed for all
+    symbols at once on the (n_bars, n_symbols) array.
+
+    Args:
+        closes: DataFrame of aligned close prices, one column per symbol
+        short_window, long_window: Crossover windows
+        momentum_window: Bars over which momentum (price change) is measured
+        volatility_window: Bars of one-bar returns used for volatility
+        periods_per_year: Bars per year, to annualize volatility
+
+    Returns:
+        DataFrame with one row per symbol: latest price and moving averages,
+        crossover state, a buy/sell trigger on the latest bar, bars since the
+        last cross, momentum and volatility with their ranks (1 = strongest
+        momentum / lowest volatility)
+    """
+    batch = momentum_trading_strategy_batch(closes, short_window, long_window)
+    prices = closes.to_numpy(dtype=np.float64)
+    signal = batch['signal'].to_numpy()
+    positions = np.nan_to_num(batch['positions'].to_numpy())
+    n_bars = len(prices)
+
+    # Bars since the most recent crossover, via the last nonzero position per column
+    crossed = positions != 0
+    last_cross = n_bars - 1 - np.argmax(crossed[::-1], axis=0)
+    bars_since_cross = np.where(crossed.any(axis=0), n_bars - 1 - last_cross, -1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        momentum = prices[-1] / prices[-1 - momentum_window] - 1 if n_bars > momentum_window \
+            else np.full(prices.shape[1], np.nan)
+        bar_returns = prices[1:] / prices[:-1] - 1
+    recent = bar_returns[-volatility_window:]
+    enough = np.isfinite(recent).sum(axis=0) > 1
+    volatility = np.full(prices.shape[1], np.nan)
+    if enough.any():
+        volatility[enough] = np.nanstd(recent[:, enough], axis=0, ddof=1) * np.sqrt(periods_per_year)
+
+    trigger = np.select([positions[-1] > 0, positions[-1] < 0], ['buy', 'sell'], None)
+    result = pd.DataFrame({
+        'price': prices[-1],
+        'short_mavg': batch['short_mavg'].to_numpy()[-1],
+        'long_mavg': batch['long_mavg'].to_numpy()[-1],
+        'state': np.where(signal[-1] > 0, 'long', 'flat'),
+        'trigger': trigger,
+        'bars_since_cross': bars_since_cross,
+        'momentum': momentum,
+        'volatility': volatility,
+    }, index=closes.columns)
+    result['momentum_rank'] = result['momentum'].rank(ascending=False, method='min')
+    result['volatility_rank'] = result['volatility'].rank(ascending=True, method='min')
+    result.index.name = 'symbol'
+    return result
+
+
+def screen_universe(symbols, timeframe='1Y', interval='day', **kwargs):
+    """Fetch bars for ``symbols`` and screen them in one pass.
+
+    Returns:
+        tuple: (screen DataFrame, dict of symbols that could not be fetched)
+    """
+    frames, errors = fetch_stock_data_batch(symbols, timeframe, interval)
+    closes = align_closes(frames, by_day=interval in DAILY_INTERVALS)
+    if closes.empty:
+        return pd.DataFrame(), errors
+    return screen(closes, **kwargs), errors
@@ -0,0 +1,364 @@
+import os
+import math
+import bisect
+import threading
+from collections import OrderedDict, deque
+import numpy as np
+import pandas as pd
+from app.utils.indicators import sma
+
+# Maximum number of (stream, short_window, long_window) states kept in memory
+STREAMING_MAX_STATES = int(os.environ.get('STREAMING_MAX_STATES') or 1024)
+# Relative gap between the averages below which a crossover is re-decided
+# from the batch averages; streamed averages can differ in the last bits
+STREAMING_TIE_TOLERANCE = 1e-12
+
+
+def stream_key(symbol, timeframe, interval):
+    """Stream identifying the bars of one chart, shared by every caller of the cache."""
+    return (symbol.upper(), timeframe, interval)
+
+
+class RollingMean:
+    """O(1) running mean over a fixed window.
+
+    Mirrors the add/remove algorithm pandas uses for ``rolling().mean()``
+    (Kahan-compensated running sums, sign counts and repeated-value
+    tracking), so values match the batch computation bit for bit.
+    """
+
+    __slots__ = ('window', 'values', 'nobs', 'sum_x', 'neg_ct',
+                 'compensation_add', 'compensation_remove',
+                 'num_consecutive_same_value', 'prev_value')
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.neg_ct = 0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def copy(self):
+        other = RollingMean.__new__(RollingMean)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.values = deque(self.values, maxlen=self.window)
+        return other
+
+    def update(self, value):
+        """Add one value (dropping the oldest once full) and return the mean."""
+        if self.prev_value is None:
+            self.prev_value = value
+        if len(self.values) == self.window:
+            self._remove(self.values[0])
+        self.values.append(value)
+        self._add(value)
+        return self.mean()
+
+    def _add(self, value):
+        if value != value:
+            return
+        self.nobs += 1
+        y = value - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct += 1
+        if value == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = value
+
+    def _remove(self, value):
+        if value != value:
+            return
+        self.nobs -= 1
+        y = -value - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct -= 1
+
+    def mean(self):
+        if self.nobs < self.window or self.nobs == 0:
+            return math.nan
+        if self.num_consecutive_same_value >= self.nobs:
+            return self.prev_value
+        result = self.sum_x / self.nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+
+class StreamingMomentum:
+    """Incremental moving average crossover for one price series.
+
+    Each ``update`` costs constant time and yields the same short_mavg,
+    long_mavg, signal and positions values ``momentum_trading_strategy``
+    computes for that bar over the full history.
+    """
+
+    __slots__ = ('short_window', 'long_window', 'short', 'long', 'count', 'last_signal')
+
+    def __init__(self, short_window=5, long_window=20):
+        self.short_window = short_window
+        self.long_window = long_window
+        self.short = RollingMean(short_window)
+        self.long = RollingMean(long_window)
+        self.count = 0
+        self.last_signal = None
+
+    def copy(self):
+        other = StreamingMomentum.__new__(StreamingMomentum)
+        other.short_window = self.short_window
+        other.long_window = self.long_window
+        other.short = self.short.copy()
+        other.long = self.long.copy()
+        other.count = self.count
+        other.last_signal = self.last_signal
+        return other
+
+    @classmethod
+    def seeded(cls, prices, last_signal, short_window=5, long_window=20):
+        """State after ``prices`` were processed, built from their last windows only.
+
+        Later means can differ from a full replay in the last bits, since
+        the running sums start from the window instead of the series start.
+        """
+        momentum = cls(short_window, long_window)
+        prices = list(prices)
+        for price in prices[-short_window:]:
+            momentum.short.update(price)
+        for price in prices[-long_window:]:
+            momentum.long.update(price)
+        momentum.count = len(prices)
+        momentum.last_signal = last_signal if prices else None
+        return momentum
+
+    def update(self, price):
+        """Process one bar; returns (short_mavg, long_mavg, signal, position)."""
+        short_mavg = self.short.update(price)
+        long_mavg = self.long.update(price)
+
+        # Bars before short_window are flat, as in the batch strategy
+        signal = 1.0 if self.count >= self.short_window and short_mavg > long_mavg else 0.0
+        position = math.nan if self.last_signal is None else signal - self.last_signal
+
+        self.count += 1
+        self.last_signal = signal
+        return short_mavg, long_mavg, signal, position
+
+
+class _SignalStream:
+    """Streaming state plus the signal history it has produced so far."""
+
+    def __init__(self, short_window, long_window, first_timestamp):
+        self.momentum = StreamingMomentum(short_window, long_window)
+        self.before_last = None
+        self.first_timestamp = first_timestamp
+        self.timestamps = []
+        self.prices = np.empty(0)
+        self.outputs = np.empty((0, 4))
+        self.length = 0
+
+    @classmethod
+    def from_batch(cls, data, short_window, long_window):
+        """Stream over ``data`` computed with the vectorized moving averages."""
+        close = data['Close']
+        prices = close.to_numpy(dtype=np.float64)
+        n = len(prices)
+        stream = cls(short_window, long_window, data.index[0] if n else None)
+        if n == 0:
+            return stream
+
+        short_mavg = sma(close, short_window).to_numpy(dtype=np.float64)
+        long_mavg = sma(close, long_window).to_numpy(dtype=np.float64)
+        signal = np.zeros(n)
+        signal[short_window:] = np.where(short_mavg[short_window:] > long_mavg[short_window:], 1.0, 0.0)
+        positions = np.concatenate([[np.nan], np.diff(signal)])
+
+        # All bars but the last come from the batch; pushing the last one
+        # leaves a snapshot for a revised last bar
+        head = n - 1
+        stream._reserve(n)
+        stream.prices[:head] = prices[:head]
+        stream.outputs[:head] = np.column_stack([short_mavg, long_mavg, signal, positions])[:head]
+        stream.timestamps = list(data.index[:head])
+        stream.length = head
+        stream.momentum = StreamingMomentum.seeded(
+            prices[:head].tolist(), signal[head - 1] if head else None, short_window, long_window)
+        stream.push(data.index[head], prices[head])
+        return stream
+
+    def _reserve(self, rows):
+        if rows > len(self.prices):
+            capacity = max(rows, 2 * len(self.prices), 64)
+            prices = np.empty(capacity)
+            outputs = np.empty((capacity, 4))
+            prices[:self.length] = self.prices[:self.length]
+            outputs[:self.length] = self.outputs[:self.length]
+            self.prices, self.outputs = prices, outputs
+
+    def push(self, timestamp, price):
+        self._reserve(self.length + 1)
+        self.before_last = self.momentum.copy()
+        self.outputs[self.length] = self.momentum.update(price)
+        self.prices[self.length] = price
+        self.timestamps.append(timestamp)
+        self.length += 1
+
+    def replace_last(self, price):
+        """Re-apply the last bar with a revised price."""
+        self.momentum = self.before_last
+        self.length -= 1
+        self.push(self.timestamps.pop(), price)
+
+    def trim(self, rows):
+        """Drop the first ``rows`` bars, as if the history started after them."""
+        n = self.length - rows
+        self.prices[:n] = self.prices[rows:self.length]
+        self.outputs[:n] = self.outputs[rows:self.length]
+        del self.timestamps[:rows]
+        self.length = n
+        self.first_timestamp = self.timestamps[0]
+        self.momentum.count = n
+        self.before_last.count = n - 1
+
+        # Only the first long window depends on where the history starts
+        # (warm-up NaNs, flat signal); later bars keep their values
+        momentum = StreamingMomentum(self.momentum.short_window, self.momentum.long_window)
+        for row in range(min(n, self.momentum.long_window + 1)):
+            self.outputs[row] = momentum.update(self.prices[row])
+
+    def settle_ties(self, close, start):
+        """Re-decide crossovers from ``start`` on where the averages nearly tie.
+
+        Averages streamed from a seeded or trimmed state can differ from
+        the batch ones in the last bits, which only matters when the two
+        averages are that close: those bars take the batch averages of
+        ``close`` and their signals and positions are recomputed.
+        """
+        short_window, long_window = self.momentum.short_window, self.momentum.long_window
+        n = self.length
+        lo = max(start, short_window)
+        if lo >= n:
+            return
+        short_mavg, long_mavg = self.outputs[lo:n, 0], self.outputs[lo:n, 1]
+        rows = np.flatnonzero(np.abs(short_mavg - long_mavg) <= STREAMING_TIE_TOLERANCE * np.abs(long_mavg)) + lo
+        if len(rows) == 0:
+            return
+
+        exact_short = sma(close, short_window).to_numpy(dtype=np.float64)[rows]
+        exact_long = sma(close, long_window).to_numpy(dtype=np.float64)[rows]
+        self.outputs[rows, 0] = exact_short
+        self.outputs[rows, 1] = exact_long
+        self.outputs[rows, 2] = np.where(exact_short > exact_long, 1.0, 0.0)
+
+        signal = self.outputs[:n, 2]
+        first, last = rows[0], min(rows[-1] + 1, n - 1)
+        self.outputs[first:last + 1, 3] = signal[first:last + 1] - signal[first - 1:last]
+        self.momentum.last_signal = signal[n - 1]
+        if self.before_last is not None and n > 1:
+            self.before_last.last_signal = signal[n - 2]
+
+    def frame(self, index):
+        n = self.length
+        signals = pd.DataFrame(index=index)
+        signals['price'] = self.prices[:n].copy()
+        signals['short_mavg'] = self.outputs[:n, 0]
+        signals['long_mavg'] = self.outputs[:n, 1]
+        signals['signal'] = self.outputs[:n, 2]
+        signals['positions'] = self.outputs[:n, 3]
+        return signals
+
+
+class StreamingSignalCache:
+    """Crossover signals kept up to date incrementally per stream.
+
+    States are keyed by (stream, short_window, long_window), where the
+    stream identifies one bar series, see ``stream_key``.
+    A new state is computed with the vectorized moving averages; after
+    that, a poll with one new bar costs O(1) signal work and a revised
+    last bar is re-applied from a snapshot. When the series' first bar
+    moved forward (e.g. a rolling one-year window), the bars before it are
+    trimmed; a series that does not overlap what was processed is rebuilt.
+    Signals and positions match ``momentum_trading_strategy`` exactly;
+    streamed averages can differ from the batch ones in the last bits,
+    so near ties are settled with the batch averages (see ``settle_ties``).
+    """
+
+    def __init__(self, max_states=STREAMING_MAX_STATES):
+        self.max_states = max_states
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, stream, data, short_window=5, long_window=20):
+        """Return ``momentum_trading_strategy(data, ...)`` computed incrementally."""
+        key = (stream, short_window, long_window)
+        timestamps = data.index
+        prices = data['Close'].to_numpy(dtype=np.float64)
+
+        with self._lock:
+            state = self._states.pop(key, None)
+
+        # First bar whose averages were streamed rather than computed in batch
+        settle_from = None
+        if state is not None and len(timestamps) and not self._extends(state, timestamps):
+            state = self._trimmed(state, timestamps)
+            settle_from = 0
+        if state is None or len(timestamps) == 0:
+            state = _SignalStream.from_batch(data, short_window, long_window)
+            start = state.length
+            settle_from = start - 1
+        else:
+            start = state.length
+            last = state.length - 1
+            settle_from = start if settle_from is None else settle_from
+            if prices[last] != state.prices[last]:
+                state.replace_last(prices[last])
+                settle_from = min(settle_from, last)
+
+        for row in range(start, len(prices)):
+            state.push(timestamps[row], prices[row])
+        state.settle_ties(data['Close'], settle_from)
+
+        with self._lock:
+            self._states[key] = state
+            while len(self._states) > self.max_states:
+                self._states.popitem(last=False)
+        return state.frame(data.index)
+
+    @staticmethod
+    def _extends(state, timestamps):
+        n = state.length
+        return (n > 0 and len(timestamps) >= n
+                and timestamps[0] == state.first_timestamp
+                and timestamps[n - 1] == state.timestamps[-1])
+
+    @staticmethod
+    def _trimmed(state, timestamps):
+        # The state trimmed to start at the series' first bar, or None
+        rows = bisect.bisect_left(state.timestamps, timestamps[0])
+        if rows == 0 or rows >= state.length or state.timestamps[rows] != timestamps[0]:
+            return None
+        if state.length - rows <= state.momentum.long_window:
+            return None
+        state.trim(rows)
+        return state if StreamingSignalCache._extends(state, timestamps) else None
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+
+# Shared cache used by the chart endpoints
+streaming_signals = StreamingSignalCache()
@@ -1,8 +1,222 @@
+import os
+import json
+import time
 import pandas as pd
 import numpy as np
-import yfinance as yf
+import threading
+from collections import OrderedDict
+from app.utils.bar_store import bar_store, index_days
+from app.utils.market_data import get_provider, download_range, download_range_many
+from app.utils.quote_cache import quote_cache
+from app.utils.resample import derive_from_store
+from app.utils.indicators import sma
 
-def fetch_stock_data(symbol: str, timeframe: str, interval: str = 'hour') -> pd.DataFrame:
+
+class _InFlightFetch:
+    """A download in progress that concurrent callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# In-flight fetches keyed by (symbol, timeframe, interval)
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _single_flight(key, fn):
+    """Run ``fn`` once for concurrent callers sharing the same key.
+
+    The first caller performs the call; callers arriving while it is still
+    running wait for it and receive a copy of its result (or its error).
+    """
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _InFlightFetch()
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result.copy()
+
+    try:
+        call.result = fn()
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        call.done.set()
+
+
+# Freshness budget and stale grace window (seconds) for cached chart frames,
+# per API interval. A frame younger than the budget is served as is; one that
+# is stale but within the grace window can be served while it is refreshed.
+# Override with CHART_CACHE_FRESHNESS='{"day": [3600, 43200], ...}'.
+CHART_CACHE_FRESHNESS = {
+    'minute': (30, 60),
+    '5min': (60, 240),
+    '15min': (180, 600),
+    '30min': (300, 1200),
+    'hour': (600, 2400),
+    'day': (4 * 3600, 20 * 3600),
+    'week': (12 * 3600, 48 * 3600),
+    'month': (24 * 3600, 96 * 3600),
+}
+CHART_CACHE_FRESHNESS.update(json.loads(os.environ.get('CHART_CACHE_FRESHNESS') or '{}'))
+CHART_CACHE_MAX_ENTRIES = int(os.environ.get('CHART_CACHE_MAX_ENTRIES') or 256)
+
+# Recently fetched frames keyed by (symbol, timeframe, interval) -> (frame, fetched_at)
+_frame_cache = OrderedDict()
+_frame_cache_lock = threading.Lock()
+
+
+def fetch_stock_data(symbol: str, timeframe: str, interval: str = 'hour',
+                     stale_ok: bool = False, force_refresh: bool = False,
+                     include_today: bool = False) -> pd.DataFrame:
+    """
+    Fetch historical stock data, sharing one download between concurrent
+    identical requests.
+
+    Recently fetched frames are served from memory within the interval's
+    freshness budget. With ``stale_ok`` a frame past its budget but within
+    the grace window is returned immediately and refreshed in the background
+    for the next caller (stale-while-revalidate).
+
+    Parameters:
+        symbol (str): Stock symbol, e.g., 'AAPL', 'MSFT'
+        timeframe (str): Time period, e.g., '1M', '3M', '1Y'
+        interval (str): Data frequency - 'hour', 'day', '15m', etc.
+        stale_ok (bool): Accept a slightly stale frame for an instant answer
+        force_refresh (bool): Skip the in-memory cache and check for new bars
+        include_today (bool): Also fetch today's bars for intraday intervals
+
+    Returns:
+        pd.DataFrame: Historical stock data
+    """
+    key = (symbol.upper(), timeframe, interval)
+    fresh_for, grace = CHART_CACHE_FRESHNESS.get(interval, (0, 0))
+
+    with _frame_cache_lock:
+        entry = _frame_cache.get(key)
+        if entry is not None:
+            _frame_cache.move_to_end(key)
+
+    if entry is not None and not force_refresh:
+        frame, fetched_at = entry
+        age = time.monotonic() - fetched_at
+        if age <= fresh_for:
+            return frame.copy()
+        if stale_ok and age <= fresh_for + grace:
+            _refresh_in_background(key, symbol, timeframe, interval)
+            return frame.copy()
+
+    return _single_flight(key, lambda: _fetch_and_cache(key, symbol, timeframe, interval, include_today)).copy()
+
+
+def _fetch_and_cache(key, symbol, timeframe, interval, include_today=False):
+    data = _fetch_stock_data(symbol, timeframe, interval, include_today)
+    with _frame_cache_lock:
+        _frame_cache[key] = (data, time.monotonic())
+        _frame_cache.move_to_end(key)
+        while len(_frame_cache) > CHART_CACHE_MAX_ENTRIES:
+            _frame_cache.popitem(last=False)
+    return data
+
+
+def _refresh_in_background(key, symbol, timeframe, interval):
+    """Start a refresh of a cached frame unless one is already running."""
+    with _inflight_lock:
+        if key in _inflight:
+            return
+
+    def refresh():
+        try:
+            _single_flight(key, lambda: _fetch_and_cache(key, symbol, timeframe, interval))
+        except Exception as e:
+            print(f"Background refresh failed for {key}: {str(e)}")
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def clear_frame_cache():
+    """Drop all cached chart frames."""
+    with _frame_cache_lock:
+        _frame_cache.clear()
+
+
+def _resolve_request(symbol: str, timeframe: str, interval: str, include_today: bool = False):
+    """
+    Translate API parameters into a provider symbol, interval and date range.
+
+    The range ends before today unless ``include_today`` is set for an
+    intraday interval, so bars of the current session can be fetched.
+
+    Returns:
+        tuple: (symbol, yf_interval, start_date, end_date) where the dates
+        are normalized days and end_date is exclusive
+    """
+    end_date = pd.Timestamp.now()
+    
+    # Map timeframes to days
+    timeframe_dict = {
+        '1M': 30,
+        '3M': 90, 
+        '6M': 180,
+        '1Y': 365,
+        '2Y': 730,
+        '5Y': 1825
+    }
+    
+    # Map interval parameter to yfinance interval strings
+    interval_dict = {
+        'minute': '1m',    # 1 minute
+        '5min': '5m',      # 5 minutes
+        '15min': '15m',    # 15 minutes
+        '30min': '30m',    # 30 minutes
+        'hour': '1h',      # 1 hour
+        'day': '1d',       # 1 day
+        'week': '1wk',     # 1 week
+        'month': '1mo'     # 1 month
+    }
+    
+    # Set the interval (default to 1h if not specified)
+    yf_interval = interval_dict.get(interval, '1h')
+    
+
+    # Long intraday ranges are fetched in chunks; only clamp to what the
+    # provider actually has available. The start is moved back to midnight
+    # below, so stay a day inside the limit.
+    days = timeframe_dict[timeframe]
+    history_days = get_provider().max_history_days(yf_interval)
+    if history_days is not None and days >= history_days:
+        days_limit = history_days - 1
+        print(f"Warning: Limiting {yf_interval} data to {days_limit} days instead of {days}")
+    else:
+        days_limit = days
+        
+    # Providers report tickers in upper case, so batch results are found by it
+    symbol = symbol.upper()
+    # Handle cryptocurrency symbols
+    if symbol in ['BTC', 'ETH', 'DOGE', 'XRP', 'SOL']:
+        symbol = f"{symbol}-USD"
+        
+    start_date = (end_date - pd.Timedelta(days=days_limit)).normalize()
+    end_date = end_date.normalize()
+    if include_today and yf_interval not in ('1d', '1wk', '1mo'):
+        end_date += pd.Timedelta(days=1)
+    return symbol, yf_interval, start_date, end_date
+
+
+def _fetch_stock_data(symbol: str, timeframe: str, interval: str = 'hour',
+                      include_today: bool = False) -> pd.DataFrame:
     """
     Fetch historical stock data with timeframe and interval selection.
     
@@ -10,70 +224,87 @@ def fetch_stock_data(symbol: str, timeframe: str, interval: str = 'hour') -> pd.
         symbol (str): Stock symbol, e.g., 'AAPL', 'MSFT'
         timeframe (str): Time period, e.g., '1M', '3M', '1Y'
         interval (str): Data frequency - 'hour', 'day', '15m', etc.
+        include_today (bool): Also fetch today's bars for intraday intervals
     
     Returns:
         pd.DataFrame: Historical stock data
     """
     try:
-        end_date = pd.Timestamp.now()
-        
-        # Map timeframes to days
-        timeframe_dict = {
-            '1M': 30,
-            '3M': 90, 
-            '6M': 180,
-            '1Y': 365,
-            '2Y': 730,
-            '5Y': 1825
-        }
-        
-        # Map interval parameter to yfinance interval strings
-        interval_dict = {
-            'minute': '1m',    # 1 minute
-            '5min': '5m',      # 5 minutes
-            '15min': '15m',    # 15 minutes
-            '30min': '30m',    # 30 minutes
-            'hour': '1h',      # 1 hour
-            'day': '1d',       # 1 day
-            'week': '1wk',     # 1 week
-            'month': '1mo'     # 1 month
-        }
-        
-        # Set the interval (default to 1h if not specified)
-        yf_interval = interval_dict.get(interval, '1h')
-        
+        symbol, yf_interval, start_date, end_date = _resolve_request(symbol, timeframe, interval, include_today)
 
-        days = timeframe_dict[timeframe]
-        if yf_interval in ['1m', '5m', '15m', '30m', '1h'] and days > 60:
-            days_limit = min(days, 60)  # Limit to 60 days for intraday data
-            print(f"Warning: Limiting {yf_interval} data to {days_limit} days instead of {days}")
-        else:
-            days_limit = days
-            
-        # Handle cryptocurrency symbols
-        if symbol.upper() in ['BTC', 'ETH', 'DOGE', 'XRP', 'SOL']:
-            symbol = f"{symbol}-USD"
-            
-        start_date = (end_date - pd.Timedelta(days=days_limit)).strftime('%Y-%m-%d')
-        
-        data = yf.download(
-            symbol,
-            start=start_date,
-            end=end_date.strftime('%Y-%m-%d'),
-            interval=yf_interval
-        )
-        
-        if data.empty:
+        def download(start, end):
+            return download_range(symbol, start, end, yf_interval)
+
+        data = None
+        if bar_store.pending_start(symbol, yf_interval, start_date, end_date) is not None:
+            # Build coarse bars from up-to-date finer bars instead of downloading
+            data = derive_from_store(bar_store, symbol, yf_interval, start_date, end_date)
+
+        if data is None or data.empty:
+            # Serve stored bars from disk and only download the missing tail
+            data = bar_store.get_bars(symbol, yf_interval, start_date, end_date, download)
+
+        if data is None or data.empty:
             raise Exception(f"No data found for symbol {symbol} with {yf_interval} interval")
-        
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = data.columns.get_level_values(0)
-        data = data.dropna()
 
         return data
     
     except Exception as e:
         raise Exception(f"Error fetching {interval} data for {symbol}: {str(e)}")
+
+
+def fetch_stock_data_batch(symbols: list, timeframe: str, interval: str = 'hour') -> tuple:
+    """
+    Fetch historical data for several symbols with one grouped download.
+
+    Symbols whose stored bars are already up to date are served from disk;
+    all others are downloaded together in a single upstream call and merged
+    into the bar store.
+
+    Parameters:
+        symbols (list): Stock symbols, e.g., ['AAPL', 'MSFT']
+        timeframe (str): Time period, e.g., '1M', '3M', '1Y'
+        interval (str): Data frequency - 'hour', 'day', '15m', etc.
+
+    Returns:
+        tuple: (data, errors) dicts keyed by the requested symbols, holding
+        each symbol's DataFrame or the reason it could not be fetched
+    """
+    requests = {symbol: _resolve_request(symbol, timeframe, interval) for symbol in symbols}
+
+    # Work out which symbols need an upstream call and from which day
+    pending = {}
+    for symbol, (yf_symbol, yf_interval, start_date, end_date) in requests.items():
+        download_start = bar_store.pending_start(yf_symbol, yf_interval, start_date, end_date)
+        if download_start is not None:
+            pending[yf_symbol] = download_start
+
+    grouped = {}
+    if pending:
+        _, yf_interval, _, end_date = next(iter(requests.values()))
+        grouped = download_range_many(
+            sorted(pending), min(pending.values()), end_date, yf_interval)
+
+    data, errors = {}, {}
+    for symbol, (yf_symbol, yf_interval, start_date, end_date) in requests.items():
+        frame = grouped.get(yf_symbol, pd.DataFrame())
+
+        def download(start, end, frame=frame):
+            return frame[index_days(frame.index) >= start] if not frame.empty else frame
+
+        try:
+            bars = bar_store.get_bars(yf_symbol, yf_interval, start_date, end_date, download)
+        except Exception as e:
+            errors[symbol] = str(e)
+            continue
+        if bars is None or bars.empty:
+            errors[symbol] = f"No data found for symbol {yf_symbol} with {yf_interval} interval"
+            continue
+        data[symbol] = bars
+
+    return data, errors
+
+
     
 def momentum_trading_strategy(data, short_window=5, long_window=20):
     """Generate trading signals based on moving average crossover strategy."""
@@ -82,90 +313,95 @@ def momentum_trading_strategy(data, short_window=5, long_window=20):
     
     # Create price and moving average columns
     signals['price'] = data['Close']
-    signals['short_mavg'] = data['Close'].rolling(window=short_window).mean()
-    signals['long_mavg'] = data['Close'].rolling(window=long_window).mean()
+    signals['short_mavg'] = sma(data['Close'], short_window)
+    signals['long_mavg'] = sma(data['Close'], long_window)
     
     # Create signals
     signals['signal'] = 0.0
-    signals['signal'][short_window:] = np.where(
-        signals['short_mavg'][short_window:] > signals['long_mavg'][short_window:], 1.0, 0.0)
+    signals.iloc[short_window:, signals.columns.get_loc('signal')] = np.where(
+        signals['short_mavg'].iloc[short_window:] > signals['long_mavg'].iloc[short_window:], 1.0, 0.0)
     
     # Generate positions
     signals['positions'] = signals['signal'].diff()
     
     return signals
 
+
+def momentum_trading_strategy_batch(closes, short_window=5, long_window=20):
+    """Generate crossover signals for many symbols in one vectorized pass.
+
+    Args:
+        closes: DataFrame of close prices, one column per symbol, sharing
+            a common index
+        short_window: Short moving average window
+        long_window: Long moving average window
+
+    Returns:
+        Dictionary of DataFrames (same shape as ``closes``) keyed by
+        'price', 'short_mavg', 'long_mavg', 'signal' and 'positions'
+    """
+    # Same indicator path as momentum_trading_strategy, one column per symbol
+    short_mavg = sma(closes, short_window)
+    long_mavg = sma(closes, long_window)
+
+    signal = (short_mavg > long_mavg).astype(float)
+    signal.iloc[:short_window] = 0.0
+
+    return {
+        'price': closes,
+        'short_mavg': short_mavg,
+        'long_mavg': long_mavg,
+        'signal': signal,
+        'positions': signal.diff()
+    }
+
+
+def momentum_trading_strategy_grouped(data, short_window=5, long_window=20):
+    """Run the batch crossover strategy over a dict of per-symbol frames.
+
+    Symbols are grouped by identical bar index (e.g. all equities on the
+    same exchange calendar) so each group is computed as one matrix.
+
+    Returns:
+        Dictionary mapping each symbol to its signals DataFrame, matching
+        the output of ``momentum_trading_strategy``
+    """
+    groups = {}
+    for symbol, frame in data.items():
+        index = pd.DatetimeIndex(frame.index).as_unit('ns')
+        groups.setdefault((str(index.tz), index.asi8.tobytes()), []).append(symbol)
+
+    results = {}
+    for symbols in groups.values():
+        index = data[symbols[0]].index
+        closes = pd.DataFrame({symbol: data[symbol]['Close'].to_numpy() for symbol in symbols}, index=index)
+        batch = momentum_trading_strategy_batch(closes, short_window, long_window)
+        for symbol in symbols:
+            results[symbol] = pd.DataFrame({name: frame[symbol] for name, frame in batch.items()})
+    return results
   
-def fetch_exchange_rate(symbol: str, timeframe: str = "1M", interval: str = 'hour') -> pd.DataFrame:
+def fetch_exchange_rate(symbol: str) -> float:
     """
-    Fetch historical stock data with timeframe and interval selection.
-    
+    Fetch the latest exchange rate (most recent hourly high) for a symbol.
+
+    Quotes are served from an in-memory TTL cache; an expired entry is
+    refreshed together with every other cached symbol in one upstream call.
+
     Parameters:
-        symbol (str): Stock symbol, e.g., 'AAPL', 'MSFT'
-        timeframe (str): Time period, e.g., '1M', '3M', '1Y'
-        interval (str): Data frequency - 'hour', 'day', '15m', etc.
-    
+        symbol (str): Currency or asset symbol, e.g., 'EURUSD=X', 'BTC'
+
     Returns:
-        pd.DataFrame: Historical stock data
+        float: Most recent high price
     """
     try:
-        end_date = pd.Timestamp.now()
-        
-        # Map timeframes to days
-        timeframe_dict = {
-            '1M': 30,
-            '3M': 90, 
-            '6M': 180,
-            '1Y': 365,
-            '2Y': 730,
-            '5Y': 1825
-        }
-        
-        # Map interval parameter to yfinance interval strings
-        interval_dict = {
-            'minute': '1m',    # 1 minute
-            '5min': '5m',      # 5 minutes
-            '15min': '15m',    # 15 minutes
-            '30min': '30m',    # 30 minutes
-            'hour': '1h',      # 1 hour
-            'day': '1d',       # 1 day
-            'week': '1wk',     # 1 week
-            'month': '1mo'     # 1 month
-        }
-        
-        # Set the interval (default to 1h if not specified)
-        yf_interval = interval_dict.get(interval, '1h')
-        
+        # Quotes are keyed by upper-case symbol, e.g. 'btc-usd' -> 'BTC-USD'
+        symbol = symbol.upper()
 
-        days = timeframe_dict[timeframe]
-        if yf_interval in ['1m', '5m', '15m', '30m', '1h'] and days > 60:
-            days_limit = min(days, 60)  # Limit to 60 days for intraday data
-            print(f"Warning: Limiting {yf_interval} data to {days_limit} days instead of {days}")
-        else:
-            days_limit = days
-            
         # Handle cryptocurrency symbols
-        if symbol.upper() in ['BTC', 'ETH', 'DOGE', 'XRP', 'SOL']:
+        if symbol in ['BTC', 'ETH', 'DOGE', 'XRP', 'SOL']:
             symbol = f"{symbol}-USD"
-            
-        start_date = (end_date - pd.Timedelta(days=days_limit)).strftime('%Y-%m-%d')
-        
-        data = yf.download(
-            symbol,
-            start=start_date,
-            end=end_date.strftime('%Y-%m-%d'),
-            interval=yf_interval
-        )
-        
-        if data.empty:
-            raise Exception(f"No data found for symbol {symbol} with {yf_interval} interval")
-        
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = data.columns.get_level_values(0)
-        data = data.dropna()
 
-        # Return only the most recent (last) high price
-        return data["High"].iloc[-1]
-    
+        return quote_cache.get(symbol)
+
     except Exception as e:
-        raise Exception(f"Error fetching {interval} data for {symbol}: {str(e)}")
+        raise Exception(f"Error fetching exchange rate for {symbol}: {str(e)}")
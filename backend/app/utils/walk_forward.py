@@ -0,0 +1,146 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.backtest import backtest_arrays, strategy_returns, summarize_backtest
+from app.utils.backtest import BACKTEST_FEE_BPS, BACKTEST_SLIPPAGE_BPS, BACKTEST_INITIAL_CAPITAL
+from app.utils.ma_sweep import rolling_means, crossover_matrices, pair_chunks, window_pairs
+
+# Threads used to score walk-forward folds
+WALK_FORWARD_WORKERS = int(os.environ.get('WALK_FORWARD_WORKERS') or 4)
+
+
+
+def _sharpe(returns):
+    volatility = returns.std(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(volatility > 0, returns.mean(axis=1) / volatility, 0.0)
+
+
+def _total_return(returns):
+    return np.expm1(np.log1p(returns).sum(axis=1))
+
+
+# In-sample objectives a window pair can be selected by
+SCORERS = {
+    'sharpe': _sharpe,
+    'total_return': _total_return,
+}
+
+
+def fold_bounds(n, train_bars, test_bars, anchored=False):
+    """(train_start, test_start, test_end) bar positions of each fold.
+
+    Test slices are consecutive and non-overlapping; the in-sample slice
+    is the ``train_bars`` before each test slice, or everything before it
+    when ``anchored``.
+    """
+    folds = []
+    test_start = train_bars
+    while test_start < n:
+        train_start = 0 if anchored else test_start - train_bars
+        folds.append((train_start, test_start, min(test_start + test_bars, n)))
+        test_start += test_bars
+    return folds
+
+
+class WalkForwardResult:
+    """Per-fold chosen windows and the stitched out-of-sample backtest."""
+
+    def __init__(self, folds, backtest, summary):
+        self.folds = folds
+        self.backtest = backtest
+        self.summary = summary
+
+
+def walk_forward_optimize(data, train_bars=252, test_bars=63, pairs=None, anchored=False,
+                          metric='sharpe', fee_bps=BACKTEST_FEE_BPS, slippage_bps=BACKTEST_SLIPPAGE_BPS,
+                          initial_capital=BACKTEST_INITIAL_CAPITAL, periods_per_year=252,
+                          workers=WALK_FORWARD_WORKERS):
+    """Walk-forward optimization of the moving average crossover windows.
+
+    Moving averages, signals and net returns for every window pair are
+    computed once over the whole history (a chunk of pairs at a time, so
+    memory stays bounded); since each bar only depends on earlier prices,
+    every fold scores pairs by slicing those matrices rather than
+    recomputing them. Folds are scored in parallel threads.
+    For each fold the pair with the best in-sample ``metric`` is traded on
+    the following out-of-sample slice, and those slices are stitched into
+    one backtest.
+
+    Parameters:
+        data (pd.DataFrame): Bars with a 'Close' column (or a Series of prices)
+        train_bars (int): In-sample bars per fold
+        test_bars (int): Out-of-sample bars per fold
+        pairs (list): (short_window, long_window) candidates; defaults to window_pairs()
+        anchored (bool): Grow the in-sample slice from the first bar instead of rolling it
+        metric (str): In-sample objective, one of SCORERS
+        fee_bps, slippage_bps, initial_capital, periods_per_year: See backtest_signals
+        workers (int): Threads used to score folds
+
+    Returns:
+        WalkForwardResult with a ``folds`` DataFrame, the stitched
+        out-of-sample ``backtest`` DataFrame and its ``summary`` dict
+    """
+    close_series = data['Close'] if isinstance(data, pd.DataFrame) else data
+    close = close_series.to_numpy(dtype=np.float64)
+    pairs = window_pairs() if pairs is None else [tuple(pair) for pair in pairs]
+    if metric not in SCORERS:
+        raise ValueError(f"Unknown walk-forward metric: {metric}")
+    if len(close) <= train_bars:
+        raise Exception(f"Not enough bars for walk-forward: {len(close)} bars, {train_bars} in-sample")
+
+    windows = sorted({w for pair in pairs for w in pair})
+    means = rolling_means(close, windows)
+    score = SCORERS[metric]
+    folds = fold_bounds(len(close), train_bars, test_bars, anchored)
+
+    # In-sample score of every pair in every fold
+    scores = np.empty((len(folds), len(pairs)))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for offset, chunk in pair_chunks(pairs, len(close)):
+            signal, _ = crossover_matrices(means, windows, chunk)
+            net_returns = strategy_returns(close, signal, fee_bps, slippage_bps)['net_returns']
+
+            def score_fold(fold):
+                train_start, test_start, _ = fold
+                return score(net_returns[:, train_start:test_start])
+
+            for row, fold_scores in enumerate(pool.map(score_fold, folds)):
+                scores[row, offset:offset + len(chunk)] = fold_scores
+    choices = [(int(np.argmax(row)), row[np.argmax(row)]) for row in scores]
+    chosen_signals = {best: crossover_matrices(means, windows, [pairs[best]])[0][0] for best, _ in choices}
+
+    # Positions held on test bars come from decisions on the bar before
+    first_test = folds[0][1]
+    decisions = np.zeros(len(close))
+    chosen_short = np.zeros(len(close), dtype=np.int64)
+    chosen_long = np.zeros(len(close), dtype=np.int64)
+    for (_, test_start, test_end), (best, _) in zip(folds, choices):
+        decisions[test_start - 1:test_end - 1] = chosen_signals[best][test_start - 1:test_end - 1]
+        chosen_short[test_start:test_end], chosen_long[test_start:test_end] = pairs[best]
+
+    result = backtest_arrays(close[first_test - 1:], decisions[first_test - 1:],
+                             fee_bps, slippage_bps, initial_capital)
+    result = {name: values[1:] for name, values in result.items()}
+    summary = summarize_backtest(result, initial_capital, periods_per_year)
+    summary.update({'fee_bps': fee_bps, 'slippage_bps': slippage_bps, 'metric': metric, 'folds': len(folds)})
+
+    rows = []
+    for number, ((train_start, test_start, test_end), (best, in_sample)) in enumerate(zip(folds, choices)):
+        fold_returns = result['net_returns'][test_start - first_test:test_end - first_test]
+        rows.append({
+            'fold': number,
+            'train_start': close_series.index[train_start],
+            'test_start': close_series.index[test_start],
+            'test_end': close_series.index[test_end - 1],
+            'short_window': pairs[best][0],
+            'long_window': pairs[best][1],
+            'in_sample_score': in_sample,
+            'out_of_sample_return': np.expm1(np.log1p(fold_returns).sum()),
+        })
+
+    backtest = pd.DataFrame(result, index=close_series.index[first_test:])
+    backtest['short_window'] = chosen_short[first_test:]
+    backtest['long_window'] = chosen_long[first_test:]
+    return WalkForwardResult(pd.DataFrame(rows), backtest, summary)
@@ -1,14 +1,18 @@
 import streamlit as st
-import yfinance as yf
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
-from momentum_trading_strategy import momentum_trading_strategy
 from sk_model import train_sk_model, make_sk_predictions
 from tf_model import train_tf_model, make_tf_predictions
 import os
 from openai import OpenAI
 from dotenv import load_dotenv
 
+# Share the backend's market data providers (set MARKET_DATA_PROVIDER=replay to run offline)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app.utils.market_data import get_provider
+from app.utils.ma_sweep import sweep_moving_averages
+
 load_dotenv()
 client = OpenAI(
     api_key=os.environ.get("OPENAI_API_KEY"),
@@ -65,10 +69,11 @@ def fetch_stock_data(symbol: str, timeframe: str) -> pd.DataFrame:
         if symbol.upper() in ['BTC', 'ETH', 'DOGE']:
             symbol = f"{symbol}-USD"
             
-        data = yf.download(
+        data = get_provider().download(
             symbol,
-            start=(end_date - pd.Timedelta(days=int(timeframe_dict[timeframe][:-1]))).strftime('%Y-%m-%d'),
-            end=end_date.strftime('%Y-%m-%d')
+            start=(end_date - pd.Timedelta(days=int(timeframe_dict[timeframe][:-1]))).normalize(),
+            end=end_date.normalize(),
+            interval='1d'
         )
         
         if data.empty:
@@ -83,8 +88,10 @@ def apply_trading_strategies(data: pd.DataFrame) -> dict:
     ma_pairs = [(5, 20), (10, 50), (20, 100), (50, 200)]
     results = {}
     
+    # Evaluate every pair from one cumulative sum instead of one pass per pair
+    sweep = sweep_moving_averages(data, ma_pairs)
     for short_window, long_window in ma_pairs:
-        signals = momentum_trading_strategy(data, short_window, long_window)
+        signals = sweep.signals_frame(short_window, long_window)
         results[f'{short_window}_{long_window}'] = signals
         
         # Save results
@@ -5,6 +5,12 @@ from sklearn.model_selection import train_test_split, TimeSeriesSplit
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 import matplotlib.pyplot as plt
+import os
+import sys
+
+# Share the backend's memoized indicator library
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app.utils.indicators import sma, returns, rolling_std
 
 def prepare_data(data, lookback=30):
     """Prepare data with technical indicators."""
@@ -13,23 +19,23 @@ def prepare_data(data, lookback=30):
         if len(data) < lookback * 2:
             raise ValueError(f"Insufficient data points. Need at least {lookback * 2}, got {len(data)}")
             
-        # Create feature DataFrame
-        df = pd.DataFrame()
+        # Create feature DataFrame (data may also be a zero-copy BarView)
+        df = pd.DataFrame(index=data.index)
         df['Close'] = data['Close']
         df['Volume'] = data['Volume'] if 'Volume' in data.columns else 0
         
         # Add technical indicators
         # Moving averages
-        df['SMA_5'] = df['Close'].rolling(window=5).mean()
-        df['SMA_20'] = df['Close'].rolling(window=20).mean()
-        df['SMA_50'] = df['Close'].rolling(window=50).mean()
+        df['SMA_5'] = sma(df['Close'], 5)
+        df['SMA_20'] = sma(df['Close'], 20)
+        df['SMA_50'] = sma(df['Close'], 50)
         
         # Price momentum
-        df['Price_Change'] = df['Close'].pct_change()
-        df['Price_Change_5d'] = df['Close'].pct_change(5)
+        df['Price_Change'] = returns(df['Close'])
+        df['Price_Change_5d'] = returns(df['Close'], 5)
         
         # Volatility
-        df['Volatility'] = df['Close'].rolling(window=20).std()
+        df['Volatility'] = rolling_std(df['Close'], 20)
         
         # Target variable (future price)
         df['Target'] = df['Close'].shift(-1)  # Next day's price
@@ -107,16 +113,16 @@ def make_sk_predictions(model, data, scaler):
         predictions["1d"] = base_prediction
         
         # Medium-term: regression to the mean
-        sma20 = data['Close'].rolling(20).mean().iloc[-1]
+        sma20 = sma(data['Close'], 20).iloc[-1]
         predictions["7d"] = 0.7 * base_prediction + 0.3 * sma20
         
         # Longer-term: more weight to longer moving averages
-        sma50 = data['Close'].rolling(50).mean().iloc[-1]
+        sma50 = sma(data['Close'], 50).iloc[-1]
         predictions["30d"] = 0.5 * base_prediction + 0.3 * sma20 + 0.2 * sma50
         
         # Very long-term: even more regression to the mean
         if len(data) >= 200:
-            sma200 = data['Close'].rolling(200).mean().iloc[-1]
+            sma200 = sma(data['Close'], 200).iloc[-1]
             predictions["90d"] = 0.3 * base_prediction + 0.2 * sma20 + 0.2 * sma50 + 0.3 * sma200
         else:
             predictions["90d"] = 0.4 * base_prediction + 0.3 * sma20 + 0.3 * sma50
@@ -10,6 +10,11 @@ from keras.src.models import  Model
 from keras.src.layers import LSTM, Dense, Dropout, BatchNormalization, Bidirectional, Input
 from keras.src.optimizers import Adam
 from keras.src.callbacks import EarlyStopping, ReduceLROnPlateau
+import sys as _sys
+
+# Share the backend's memoized indicator library
+_sys.path.append(_os.path.join(_os.path.dirname(_os.path.abspath(__file__)), '..'))
+from app.utils.indicators import sma
 
 
 
@@ -279,14 +284,14 @@ def make_tf_predictions(results, data):
             if isinstance(data.columns, pd.MultiIndex):
                 close_cols = [col for col in data.columns if 'Close' in col]
                 if close_cols:
-                    sma50 = data[close_cols[0]].rolling(50).mean().iloc[-1] if len(data) >= 50 else current_price
-                    sma200 = data[close_cols[0]].rolling(200).mean().iloc[-1] if len(data) >= 200 else current_price
+                    sma50 = sma(data[close_cols[0]], 50).iloc[-1] if len(data) >= 50 else current_price
+                    sma200 = sma(data[close_cols[0]], 200).iloc[-1] if len(data) >= 200 else current_price
                 else:
                     sma50 = current_price
                     sma200 = current_price
             else:
-                sma50 = data['Close'].rolling(50).mean().iloc[-1] if len(data) >= 50 else current_price
-                sma200 = data['Close'].rolling(200).mean().iloc[-1] if len(data) >= 200 else current_price
+                sma50 = sma(data['Close'], 50).iloc[-1] if len(data) >= 50 else current_price
+                sma200 = sma(data['Close'], 200).iloc[-1] if len(data) >= 200 else current_price
             
             # Blend of extrapolation and regression to long-term mean
             predictions["30d"] = current_price * (1 + trend_factor * 4) * 0.7 + sma50 * 0.3
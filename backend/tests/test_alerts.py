@@ -0,0 +1,104 @@
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.utils.alerts import AlertEngine
+from app.utils.event_runtime import BarEvent, PollingBarSource
+from app.utils.trading_strategy import momentum_trading_strategy
+
+
+def _bars(symbol, closes, start='2024-01-01'):
+    index = pd.date_range(start, periods=len(closes), freq='min', tz='UTC')
+    return [BarEvent(symbol, '1m', timestamp, c, c, c, c, 0) for timestamp, c in zip(index, closes)]
+
+
+class TestAlertEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = AlertEngine()
+        self.received = []
+        self.engine.subscribe(self.received.append)
+
+    def test_price_levels_fire_on_cross(self):
+        above = self.engine.add_rule('eth-usd', 'price_above', 105)
+        repeat = self.engine.add_rule('ETH-USD', 'price_above', 102, once=False)
+        below = self.engine.add_rule('ETH-USD', 'price_below', 95)
+        for bar in _bars('ETH-USD', [100, 103, 101, 106, 103, 94, 103]):
+            self.engine.on_bar(bar)
+
+        fired = [(alert['rule_id'], alert['price']) for alert in self.received]
+        self.assertEqual(fired, [(repeat.id, 103), (repeat.id, 106), (above.id, 106), (below.id, 94), (repeat.id, 103)])
+        self.assertEqual([rule['id'] for rule in self.engine.list_rules()], [repeat.id])
+
+    def test_crossovers_match_batch_strategy(self):
+        rng = np.random.default_rng(5)
+        closes = 100 + rng.normal(0, 1, 400).cumsum()
+        up = self.engine.add_rule('BTC-USD', 'cross_above', short_window=5, long_window=20, once=False)
+        down = self.engine.add_rule('BTC-USD', 'cross_below', short_window=5, long_window=20, once=False)
+        bars = _bars('BTC-USD', closes)
+        for bar in bars:
+            self.engine.on_bar(bar)
+
+        positions = momentum_trading_strategy(pd.DataFrame({'Close': closes}))['positions'].to_numpy()
+        expected = [(up.id if positions[i] > 0 else down.id, bars[i].timestamp.isoformat())
+                    for i in np.flatnonzero(np.isin(positions, [1.0, -1.0]))]
+        self.assertEqual([(alert['rule_id'], alert['timestamp']) for alert in self.received], expected)
+
+    def test_late_rule_warms_from_seen_closes(self):
+        rng = np.random.default_rng(9)
+        closes = 100 + rng.normal(0, 1, 300).cumsum()
+        bars = _bars('SOL-USD', closes)
+        for bar in bars[:150]:
+            self.engine.on_bar(bar)
+        rule = self.engine.add_rule('SOL-USD', 'cross_above', short_window=5, long_window=20, once=False)
+        for bar in bars[150:]:
+            self.engine.on_bar(bar)
+
+        positions = momentum_trading_strategy(pd.DataFrame({'Close': closes}))['positions'].to_numpy()
+        expected = [bars[i].timestamp.isoformat() for i in np.flatnonzero(positions[150:] == 1.0) + 150]
+        self.assertEqual([alert['timestamp'] for alert in self.received], expected)
+        self.assertTrue(all(alert['rule_id'] == rule.id for alert in self.received))
+
+    def test_since_skips_history(self):
+        bars = _bars('AAPL', [100, 110, 100, 110])
+        self.engine.add_rule('AAPL', 'price_above', 105, since=bars[2].timestamp.tz_convert(None))
+        for bar in bars:
+            self.engine.on_bar(bar)
+        self.assertEqual([alert['timestamp'] for alert in self.received], [bars[3].timestamp.isoformat()])
+
+    def test_invalid_rules(self):
+        with self.assertRaises(ValueError):
+            self.engine.add_rule('AAPL', 'price_above')
+        with self.assertRaises(ValueError):
+            self.engine.add_rule('AAPL', 'cross_above', short_window=20, long_window=5)
+        with self.assertRaises(ValueError):
+            self.engine.add_rule('AAPL', 'volume_spike', 1)
+        self.assertFalse(self.engine.remove_rule(42))
+
+    def test_thousands_of_rules(self):
+        rng = np.random.default_rng(2)
+        for symbol in range(50):
+            for threshold in rng.uniform(50, 150, 100):
+                self.engine.add_rule(f"S{symbol}", 'price_above', threshold, once=False)
+                self.engine.add_rule(f"S{symbol}", 'price_below', threshold, once=False)
+            self.engine.add_rule(f"S{symbol}", 'cross_above', once=False)
+
+        started = time.perf_counter()
+        for step, timestamp in enumerate(pd.date_range('2024-01-01', periods=200, freq='min', tz='UTC')):
+            for symbol in range(50):
+                price = 100 + 10 * np.sin(step / 10 + symbol)
+                self.engine.on_bar(BarEvent(f"S{symbol}", '1m', timestamp, price, price, price, price, 0))
+        self.assertLess(time.perf_counter() - started, 5.0)
+        self.assertEqual(len(self.engine.rules), 10050)
+        self.assertTrue(self.received)
+
+    def test_polling_source_follows_symbols(self):
+        symbols = []
+        source = PollingBarSource(lambda: symbols, '1h', provider=None)
+        self.assertEqual(source.poll(pd.Timestamp('2024-03-06 15:10', tz='UTC')), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from unittest import mock
+
+from app.models.model_registry import model_registry
+from app.utils.event_runtime import strategy_runtime
+from app.utils.prefetch import prefetch_scheduler
+
+
+class TestCreateApp(unittest.TestCase):
+
+    def test_background_threads_stay_off_when_testing(self):
+        try:
+            import app.routes.api  # noqa: F401
+        except ImportError as e:
+            self.skipTest(f"API dependencies not installed: {e}")
+        from app import create_app
+        from config import TestingConfig
+
+        with mock.patch.object(model_registry, 'warm_load') as warm_load:
+            app = create_app(TestingConfig)
+        self.assertTrue(app.config['TESTING'])
+        warm_load.assert_not_called()
+        self.assertIsNone(prefetch_scheduler._thread)
+        self.assertIsNone(strategy_runtime._thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.utils.backtest import backtest_arrays, backtest_signals
+from app.utils.ma_sweep import sweep_moving_averages
+from app.utils.trading_strategy import momentum_trading_strategy
+
+
+class TestBacktest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        index = pd.date_range('2022-01-01', periods=500, freq='D')
+        self.data = pd.DataFrame({'Close': 100 * np.exp(rng.normal(0, 0.015, 500).cumsum())}, index=index)
+        self.signals = momentum_trading_strategy(self.data)
+
+    def _reference(self, price, signal, fee_bps, slippage_bps, capital):
+        """Bar-by-bar account simulation the vectorized engine must reproduce."""
+        equity, held, costs = [], 0.0, 0.0
+        for t in range(len(price)):
+            position = signal[t - 1] if t > 0 else 0.0
+            cost = abs(position - held) * capital * (fee_bps + slippage_bps) / 1e4
+            growth = position * (price[t] / price[t - 1] - 1) if t > 0 else 0.0
+            capital = capital * (1 + growth) - cost
+            costs += cost
+            held = position
+            equity.append(capital)
+        return np.array(equity), costs
+
+    def test_matches_bar_by_bar_simulation(self):
+        frame, summary = backtest_signals(self.signals, fee_bps=10, slippage_bps=5, initial_capital=1000)
+        equity, costs = self._reference(self.signals['price'].to_numpy(), self.signals['signal'].to_numpy(),
+                                        10, 5, 1000)
+        np.testing.assert_allclose(frame['equity'].to_numpy(), equity, rtol=1e-10)
+        self.assertAlmostEqual(summary['fees'] + summary['slippage'], costs, places=6)
+        self.assertAlmostEqual(summary['gross_pnl'] - summary['fees'] - summary['slippage'], summary['net_pnl'])
+
+    def test_costs_and_drawdown(self):
+        free, free_summary = backtest_signals(self.signals, fee_bps=0, slippage_bps=0)
+        _, costly_summary = backtest_signals(self.signals, fee_bps=25, slippage_bps=25)
+        self.assertLess(costly_summary['final_equity'], free_summary['final_equity'])
+        self.assertEqual(free_summary['trades'], int(self.signals['positions'].abs().sum()))
+        self.assertLessEqual(free['drawdown'].max(), 0.0)
+        self.assertAlmostEqual(free_summary['max_drawdown'], free['drawdown'].min())
+
+    def test_many_signals_at_once(self):
+        pairs = [(5, 20), (10, 50)]
+        sweep = sweep_moving_averages(self.data, pairs)
+        result = backtest_arrays(sweep.close, sweep.signal)
+        self.assertEqual(result['equity'].shape, (2, len(self.data)))
+        single = backtest_arrays(sweep.close, sweep.signal[1])
+        np.testing.assert_allclose(result['equity'][1], single['equity'])
+
+
+if __name__ == '__main__':
+    unittest.main()
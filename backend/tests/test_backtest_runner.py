@@ -0,0 +1,38 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.utils.backtest import backtest_signals
+from app.utils.backtest_runner import run_universe_backtest
+from app.utils.trading_strategy import momentum_trading_strategy
+
+
+class TestUniverseBacktest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(9)
+        self.frames = {}
+        for symbol, periods in [('AAA', 400), ('BBB', 300), ('CCC', 500), ('DDD', 250)]:
+            index = pd.date_range('2022-01-01', periods=periods, freq='D')
+            close = 100 * np.exp(rng.normal(0, 0.02, periods).cumsum())
+            self.frames[symbol] = pd.DataFrame({'Close': close}, index=index)
+
+    def test_process_pool_matches_serial(self):
+        serial = run_universe_backtest(self.frames, workers=1)
+        pooled = run_universe_backtest(self.frames, workers=2)
+        pd.testing.assert_frame_equal(serial, pooled)
+
+    def test_ranked_table(self):
+        table = run_universe_backtest(self.frames, workers=2)
+        self.assertEqual(sorted(table.index), sorted(self.frames))
+        self.assertEqual(list(table['rank']), [1, 2, 3, 4])
+        self.assertTrue(table['sharpe'].is_monotonic_decreasing)
+        self.assertEqual(table.loc['BBB', 'bars'], 300)
+
+        _, summary = backtest_signals(momentum_trading_strategy(self.frames['CCC']))
+        self.assertAlmostEqual(table.loc['CCC', 'final_equity'], summary['final_equity'], places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
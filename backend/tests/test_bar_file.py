@@ -0,0 +1,150 @@
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.models.sk_models import SKModel
+from app.utils.bar_file import BarFile, BarView
+
+
+def make_bars(start, periods, freq='1h', tz=None, offset=0.0):
+    index = pd.date_range(start, periods=periods, freq=freq, tz=tz)
+    close = 100.0 + offset + np.sin(np.arange(periods) / 5.0) * 5 + np.arange(periods) * 0.1
+    return pd.DataFrame({
+        'Open': close - 0.5,
+        'High': close + 1.0,
+        'Low': close - 1.0,
+        'Close': close,
+        'Volume': np.full(periods, 1000.0),
+    }, index=index)
+
+
+class TestBarFile(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.bar_file = BarFile(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_append_and_read_back(self):
+        bars = make_bars('2024-01-01', 48, tz='America/New_York')
+        self.bar_file.append(bars.iloc[:30])
+        self.bar_file.append(bars.iloc[30:])
+        self.assertEqual(len(self.bar_file), 48)
+        pd.testing.assert_frame_equal(self.bar_file.read_range().to_frame(), bars, check_freq=False, check_index_type=False)
+
+    def test_append_replaces_forming_bar(self):
+        bars = make_bars('2024-01-01', 10)
+        self.bar_file.append(bars)
+        generation = self.bar_file.meta()['generation']
+
+        # Appending past the end keeps the generation
+        self.bar_file.append(make_bars(bars.index[-1] + pd.Timedelta(hours=1), 1))
+        self.assertEqual(self.bar_file.meta()['generation'], generation)
+
+        before = self.bar_file.read_range()
+        before_close = before['Close'].copy()
+        update = make_bars(bars.index[-1], 3, offset=50.0)
+        self.bar_file.append(update)
+
+        stored = self.bar_file.read_range().to_frame()
+        self.assertEqual(len(stored), 12)
+        self.assertEqual(stored['Close'].iloc[9], update['Close'].iloc[0])
+        pd.testing.assert_frame_equal(stored.iloc[:9], bars.iloc[:9], check_freq=False, check_index_type=False)
+        self.assertEqual(self.bar_file.meta()['generation'], generation + 1)
+        # A view read before the overlapping append still shows the old bars
+        np.testing.assert_array_equal(before['Close'], before_close)
+        self.assertEqual(len(before), 11)
+
+    def test_unchanged_overlap_appends_in_place(self):
+        bars = make_bars('2024-01-01', 48)
+        self.bar_file.append(bars.iloc[:30])
+        view = self.bar_file.read_range()
+        # A top-up re-sends the last stored day along with the new bars
+        self.bar_file.append(bars.iloc[24:])
+        self.bar_file.append(bars.iloc[40:44], attrs={'last_day': '2024-01-02'})
+
+        self.assertEqual(self.bar_file.meta()['generation'], 0)
+        self.assertEqual(len(self.bar_file), 48)
+        self.assertEqual(self.bar_file.attrs(), {'last_day': '2024-01-02'})
+        pd.testing.assert_frame_equal(self.bar_file.read_range().to_frame(), bars,
+                                      check_freq=False, check_index_type=False)
+        self.assertEqual(len(view), 30)
+
+    def test_concurrent_readers_and_overlapping_appends(self):
+        bars = make_bars('2024-01-01', 400)
+        self.bar_file.append(bars.iloc[:100])
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                try:
+                    view = self.bar_file.read_range()
+                    self.assertEqual(len(view['Close']), len(view))
+                except Exception as e:
+                    errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        for end in range(101, 401):
+            # Each append revises the previous last bar, writing a new generation
+            revised = bars.iloc[end - 2:end].copy()
+            revised.iloc[0, revised.columns.get_loc('Close')] += 0.5
+            self.bar_file.append(revised)
+        done.set()
+        for reader in readers:
+            reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.bar_file), 400)
+        self.assertGreater(self.bar_file.meta()['generation'], 200)
+
+    def test_prepend_writes_new_generation(self):
+        bars = make_bars('2024-01-01', 20)
+        self.bar_file.append(bars.iloc[10:])
+        old_view = self.bar_file.read_range()
+        self.bar_file.append(bars.iloc[:12])
+
+        self.assertEqual(self.bar_file.meta()['generation'], 1)
+        pd.testing.assert_frame_equal(self.bar_file.read_range().to_frame(), bars, check_freq=False, check_index_type=False)
+        # Views taken before the rewrite stay readable
+        self.assertEqual(len(old_view['Close']), 10)
+
+    def test_range_reads_are_zero_copy_views(self):
+        bars = make_bars('2024-01-01', 100)
+        self.bar_file.append(bars)
+        view = self.bar_file.read_range('2024-01-02', '2024-01-03')
+
+        self.assertEqual(len(view), 24)
+        self.assertEqual(view.index[0], pd.Timestamp('2024-01-02'))
+        self.assertIsInstance(view['Close'].base, np.memmap)
+        np.testing.assert_array_equal(view['Close'], bars.loc['2024-01-02', 'Close'].to_numpy())
+
+    def test_float32_columns(self):
+        bars = make_bars('2024-01-01', 10)
+        self.bar_file.write(bars, dtype='float32')
+        view = self.bar_file.read_range()
+        self.assertEqual(view['Close'].dtype, np.float32)
+        self.bar_file.append(make_bars(bars.index[-1] + pd.Timedelta(hours=1), 5))
+        self.assertEqual(len(self.bar_file), 15)
+
+    def test_sk_model_reads_bar_view(self):
+        bars = make_bars('2024-01-01', 200, freq='D')
+        self.bar_file.append(bars)
+        view = self.bar_file.read_range()
+        self.assertIsInstance(view, BarView)
+
+        from_view = SKModel()._create_features(view)
+        from_frame = SKModel()._create_features(bars)
+        pd.testing.assert_frame_equal(from_view, from_frame, check_freq=False, check_index_type=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.utils.bar_store import BarStore
+
+
+def make_bars(start, end, tz=None):
+    index = pd.date_range(start, end, freq='D', inclusive='left', tz=tz)
+    close = np.linspace(100.0, 100.0 + len(index), len(index))
+    return pd.DataFrame({
+        'Close': close,
+        'High': close + 1,
+        'Low': close - 1,
+        'Open': close,
+        'Volume': np.full(len(index), 1000.0),
+    }, index=index)
+
+
+class TestBarStore(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = BarStore(self.root)
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def download(self, start, end):
+        self.calls.append((start, end))
+        return make_bars(start, end)
+
+    def test_round_trip(self):
+        bars = make_bars('2024-01-01', '2024-02-01', tz='America/New_York')
+        self.store.save('AAPL', '1d', bars, '2024-01-01', '2024-02-01')
+        loaded = self.store.load('AAPL', '1d')
+        pd.testing.assert_frame_equal(loaded, bars, check_freq=False, check_index_type=False)
+
+    def test_only_missing_tail_is_downloaded(self):
+        first = self.store.get_bars('AAPL', '1d', '2024-01-01', '2024-02-01', self.download)
+        self.assertEqual(len(first), 31)
+
+        second = self.store.get_bars('AAPL', '1d', '2024-01-01', '2024-02-01', self.download)
+        self.assertEqual(len(self.calls), 1)
+        pd.testing.assert_frame_equal(first, second, check_freq=False, check_index_type=False)
+
+        self.store.get_bars('AAPL', '1d', '2024-01-10', '2024-02-10', self.download)
+        self.assertEqual(self.calls[-1], (pd.Timestamp('2024-01-31'), pd.Timestamp('2024-02-10')))
+
+    def test_symbol_case_shares_file_and_lock(self):
+        self.assertIs(self.store.bar_file('aapl', '1d'), self.store.bar_file('AAPL', '1d'))
+        self.assertIs(self.store._lock('aapl', '1d'), self.store._lock('AAPL', '1d'))
+
+    def test_today_is_requested_again(self):
+        today = pd.Timestamp.now().normalize()
+        start = today - pd.Timedelta(days=5)
+        self.store.get_bars('AAPL', '1d', start, today + pd.Timedelta(days=1), self.download)
+        self.store.get_bars('AAPL', '1d', start, today + pd.Timedelta(days=1), self.download)
+        self.assertEqual(self.calls[-1], (today, today + pd.Timedelta(days=1)))
+        # Ranges ending before today are complete
+        self.store.get_bars('AAPL', '1d', start, today, self.download)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_range_starting_on_weekend_is_covered(self):
+        def weekdays_only(start, end):
+            self.calls.append((start, end))
+            bars = make_bars(start, end)
+            return bars[bars.index.dayofweek < 5]
+
+        self.store.get_bars('AAPL', '1d', '2024-01-06', '2024-02-01', weekdays_only)
+        self.store.get_bars('AAPL', '1d', '2024-01-06', '2024-02-01', weekdays_only)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_earlier_start_refetches_full_range(self):
+        self.store.get_bars('AAPL', '1d', '2024-01-10', '2024-02-01', self.download)
+        bars = self.store.get_bars('AAPL', '1d', '2024-01-01', '2024-02-01', self.download)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(bars.index[0], pd.Timestamp('2024-01-01'))
+
+
+if __name__ == '__main__':
+    unittest.main()
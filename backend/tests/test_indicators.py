@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from app.utils import indicators
+from app.utils.indicators import (bollinger_bands, clear_indicator_cache, ema, returns, rsi,
+                                  sma, volatility)
+
+
+class TestIndicators(unittest.TestCase):
+
+    def setUp(self):
+        clear_indicator_cache()
+        rng = np.random.default_rng(4)
+        index = pd.date_range('2023-01-01', periods=300, freq='D')
+        self.close = pd.Series(100 * np.exp(rng.normal(0, 0.01, 300).cumsum()), index=index, name='Close')
+
+    def tearDown(self):
+        clear_indicator_cache()
+
+    def test_values_match_pandas(self):
+        pd.testing.assert_series_equal(sma(self.close, 20), self.close.rolling(20).mean())
+        pd.testing.assert_series_equal(sma(self.close, 20, min_periods=1),
+                                       self.close.rolling(20, min_periods=1).mean())
+        pd.testing.assert_series_equal(returns(self.close, 5), self.close.pct_change(5))
+        pd.testing.assert_series_equal(volatility(self.close, 14),
+                                       self.close.pct_change().rolling(14).std())
+        pd.testing.assert_series_equal(ema(self.close, 10), self.close.ewm(span=10, adjust=False).mean())
+
+        bands = bollinger_bands(self.close, 20, 2)
+        width = bands['upper'] - bands['middle']
+        pd.testing.assert_series_equal(width, 2 * self.close.rolling(20).std(), check_names=False)
+
+        value = rsi(self.close, 14)
+        self.assertTrue(value.iloc[:14].isna().all())
+        self.assertTrue(value.dropna().between(0, 100).all())
+
+    def test_memoized_per_frame_version(self):
+        with mock.patch.object(pd.Series, 'rolling', wraps=self.close.rolling) as rolling:
+            sma(self.close, 20)
+            sma(self.close.copy(), 20)
+            self.assertEqual(rolling.call_count, 1)
+
+        changed = self.close.copy()
+        changed.iloc[-1] += 1
+        self.assertNotEqual(sma(changed, 20).iloc[-1], sma(self.close, 20).iloc[-1])
+
+    def test_frames_of_columns(self):
+        closes = pd.DataFrame({'A': self.close, 'B': self.close * 2})
+        pd.testing.assert_frame_equal(sma(closes, 20), closes.rolling(20).mean())
+        pd.testing.assert_series_equal(sma(closes, 20)['A'], sma(self.close, 20), check_names=False)
+        self.assertNotEqual(indicators.series_version(closes), indicators.series_version(closes[['B', 'A']]))
+
+    def test_version_distinguishes_crc32_collisions(self):
+        # Both values have the same CRC32
+        index = pd.RangeIndex(1)
+        first = pd.Series([2507097273660968062], index=index)
+        second = pd.Series([2492500576784602499], index=index)
+        self.assertNotEqual(indicators.series_version(first), indicators.series_version(second))
+        labels = pd.Series(['a', 'b'])
+        self.assertEqual(indicators.series_version(labels), indicators.series_version(labels.copy()))
+
+    def test_results_are_isolated(self):
+        first = sma(self.close, 5)
+        first.iloc[-1] = -1.0
+        self.assertNotEqual(sma(self.close, 5).iloc[-1], -1.0)
+
+    def test_cache_is_bounded(self):
+        with mock.patch.object(indicators, 'INDICATOR_CACHE_MAX_ENTRIES', 3):
+            for window in range(2, 8):
+                sma(self.close, window)
+            self.assertEqual(len(indicators._indicator_cache), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from unittest import mock
+
+from app.utils import ma_sweep
+from app.utils.ma_sweep import pair_chunks, rolling_means, sweep_moving_averages, window_pairs
+from app.utils.trading_strategy import momentum_trading_strategy
+
+
+class TestMovingAverageSweep(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        index = pd.date_range('2020-01-01', periods=600, freq='D')
+        self.data = pd.DataFrame({'Close': 100 * np.exp(rng.normal(0, 0.01, 600).cumsum())}, index=index)
+
+    def test_rolling_means_match_pandas(self):
+        means = rolling_means(self.data['Close'], [1, 5, 20, 200])
+        for row, window in enumerate([1, 5, 20, 200]):
+            expected = self.data['Close'].rolling(window).mean().to_numpy()
+            np.testing.assert_array_equal(means[row], expected)
+
+    def test_matches_momentum_trading_strategy(self):
+        pairs = [(5, 20), (10, 50), (20, 100), (50, 200)]
+        sweep = sweep_moving_averages(self.data, pairs)
+        for short_window, long_window in pairs:
+            expected = momentum_trading_strategy(self.data, short_window, long_window)
+            frame = sweep.signals_frame(short_window, long_window)
+            pd.testing.assert_frame_equal(frame, expected)
+
+    def test_tick_rounded_prices_match_exactly(self):
+        # Flat prices on a 0.01 grid make averages tie; a cumulative sum drifts and flips them
+        rng = np.random.default_rng(2)
+        close = np.round(30000 + np.cumsum(rng.choice([-0.01, 0, 0, 0, 0.01], 20000)), 2)
+        data = pd.DataFrame({'Close': close}, index=pd.date_range('2024-01-01', periods=20000, freq='min'))
+        pairs = [(5, 20), (10, 50), (20, 100), (50, 200)]
+        sweep = sweep_moving_averages(data, pairs)
+        for short_window, long_window in pairs:
+            expected = momentum_trading_strategy(data, short_window, long_window)
+            pd.testing.assert_frame_equal(sweep.signals_frame(short_window, long_window), expected)
+
+    def test_pairs_are_swept_in_chunks(self):
+        pairs = window_pairs()
+        self.assertEqual(len(pair_chunks(pairs, len(self.data), max_cells=100 * len(self.data))), 18)
+        full = sweep_moving_averages(self.data)
+        with mock.patch.object(ma_sweep, 'SWEEP_CHUNK_CELLS', 100 * len(self.data)):
+            chunked = sweep_moving_averages(self.data)
+        pd.testing.assert_frame_equal(chunked.stats, full.stats)
+
+    def test_stats_for_many_pairs(self):
+        pairs = window_pairs()
+        sweep = sweep_moving_averages(self.data)
+        self.assertEqual(sweep.signal.shape, (len(pairs), len(self.data)))
+        self.assertEqual(len(sweep.stats), len(pairs))
+
+        row = sweep.stats.loc['5_20']
+        signals = momentum_trading_strategy(self.data, 5, 20)
+        self.assertEqual(row['buy_signals'], (signals['positions'] == 1).sum())
+        self.assertEqual(row['sell_signals'], (signals['positions'] == -1).sum())
+        held = signals['signal'].shift(1).fillna(0) * signals['price'].pct_change().fillna(0)
+        self.assertAlmostEqual(row['total_return'], (1 + held).prod() - 1, places=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from app.utils import market_data
+from app.utils.market_data import (
+    ReplayProvider, date_chunks, download_range, download_range_many, save_replay_file
+)
+from app.utils.quote_cache import QuoteCache
+
+
+class ChunkedReplayProvider(ReplayProvider):
+    """Replay provider that only accepts short requests, like Yahoo intraday."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.requests = []
+
+    def max_request_days(self, interval):
+        return 7
+
+    def download(self, symbol, start, end, interval):
+        span = pd.Timestamp(end) - pd.Timestamp(start)
+        assert span <= pd.Timedelta(days=7), f"request too long: {span}"
+        self.requests.append((start, end))
+        return super().download(symbol, start, end, interval)
+
+
+class TestReplayProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.provider = ReplayProvider(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_synthetic_bars_are_deterministic(self):
+        first = self.provider.download('AAPL', '2024-01-01', '2024-03-01', '1h')
+        again = ReplayProvider(self.root).download('AAPL', '2024-01-01', '2024-03-01', '1h')
+        pd.testing.assert_frame_equal(first, again)
+
+    def test_overlapping_ranges_agree(self):
+        wide = self.provider.download('AAPL', '2024-01-01', '2024-06-01', '1d')
+        narrow = self.provider.download('AAPL', '2024-03-01', '2024-04-01', '1d')
+        pd.testing.assert_frame_equal(wide.loc[narrow.index], narrow, check_freq=False)
+
+    def test_bars_are_consistent(self):
+        data = self.provider.download('BTC-USD', '2024-01-01', '2024-01-08', '15m')
+        self.assertEqual(len(data), 7 * 96)
+        self.assertTrue((data['High'] >= data[['Open', 'Close']].max(axis=1)).all())
+        self.assertTrue((data['Low'] <= data[['Open', 'Close']].min(axis=1)).all())
+
+    def test_equities_skip_weekends(self):
+        data = self.provider.download('AAPL', '2024-01-01', '2024-01-15', '1d')
+        self.assertTrue((data.index.dayofweek < 5).all())
+
+    def test_recorded_bars_take_precedence(self):
+        recorded = pd.DataFrame({
+            'Open': [1.0, 2.0], 'High': [1.5, 2.5], 'Low': [0.5, 1.5],
+            'Close': [1.2, 2.2], 'Volume': [10.0, 20.0]
+        }, index=pd.DatetimeIndex(['2024-01-02', '2024-01-03'], name='Date'))
+        save_replay_file(recorded, 'TEST', '1d', root=self.root)
+        self.assertTrue(os.path.exists(os.path.join(self.root, '1d', 'TEST.csv')))
+        data = self.provider.download('TEST', '2024-01-01', '2024-02-01', '1d')
+        pd.testing.assert_frame_equal(data, recorded, check_freq=False, check_index_type=False)
+
+
+class TestChunkedDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_date_chunks_cover_range(self):
+        chunks = date_chunks('2024-01-01', '2024-01-20', 7)
+        self.assertEqual(chunks[0][0], pd.Timestamp('2024-01-01'))
+        self.assertEqual(chunks[-1][1], pd.Timestamp('2024-01-20'))
+        self.assertEqual(len(chunks), 3)
+        for (_, end), (start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, start)
+
+    def test_chunked_download_matches_single_request(self):
+        provider = ChunkedReplayProvider(self.root)
+        data = download_range('BTC-USD', '2024-01-01', '2024-03-01', '1h', provider=provider)
+        expected = ReplayProvider(self.root).download('BTC-USD', '2024-01-01', '2024-03-01', '1h')
+        self.assertGreater(len(provider.requests), 1)
+        pd.testing.assert_frame_equal(data, expected, check_freq=False)
+        self.assertTrue(data.index.is_monotonic_increasing)
+
+    def test_chunked_grouped_download(self):
+        provider = ChunkedReplayProvider(self.root)
+        frames = download_range_many(['AAPL', 'MSFT'], '2024-01-01', '2024-02-01', '30m', provider=provider)
+        for symbol in ['AAPL', 'MSFT']:
+            expected = ReplayProvider(self.root).download(symbol, '2024-01-01', '2024-02-01', '30m')
+            pd.testing.assert_frame_equal(frames[symbol], expected, check_freq=False)
+
+
+class UpperCaseQuoteProvider:
+    """Quotes keyed by upper-case symbol, like Yahoo's download columns."""
+
+    def __init__(self):
+        self.requests = []
+
+    def latest_quotes(self, symbols):
+        self.requests.append(list(symbols))
+        return {symbol.upper(): 100.0 for symbol in symbols}
+
+
+class TestQuoteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.provider = UpperCaseQuoteProvider()
+        market_data.set_provider(self.provider)
+
+    def tearDown(self):
+        market_data.set_provider(None)
+
+    def test_symbols_are_case_insensitive(self):
+        cache = QuoteCache()
+        self.assertEqual(cache.get('btc-USD'), 100.0)
+        self.assertEqual(cache.get('BTC-usd'), 100.0)
+        self.assertEqual(self.provider.requests, [['BTC-USD']])
+
+
+if __name__ == '__main__':
+    unittest.main()
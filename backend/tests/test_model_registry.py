@@ -0,0 +1,227 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.models.model_registry import ModelRegistry
+from app.models.model_store import ModelStore
+from app.models.sk_models import SKModel
+
+
+class _CountingModel:
+    trainings = 0
+
+    def __init__(self):
+        self.payload = None
+
+    def train(self, data):
+        type(self).trainings += 1
+        self.payload = np.zeros(len(data))
+        return {}
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        _CountingModel.trainings = 0
+        index = pd.date_range('2024-01-01', periods=100, freq='D')
+        self.data = pd.DataFrame({'Close': np.linspace(100, 120, 100)}, index=index)
+        self.registry = ModelRegistry(model_types={'default': _CountingModel})
+
+    def test_reuses_model_until_new_bars(self):
+        model = self.registry.get('nvda', 'day', '1Y', self.data)
+        self.assertIs(self.registry.get('NVDA', 'day', '1Y', self.data.copy()), model)
+        self.assertIs(self.registry.get('NVDA', 'day', '1Y', self.data, 'unknown'), model)
+        self.assertEqual(_CountingModel.trainings, 1)
+        self.assertEqual(self.registry.lookup('nvda', 'day', '1Y').hits, 2)
+
+        extended = pd.concat([self.data, pd.DataFrame({'Close': [121.0]}, index=[pd.Timestamp('2024-04-10')])])
+        self.assertIsNot(self.registry.get('NVDA', 'day', '1Y', extended), model)
+        self.assertIsNot(self.registry.get('AMD', 'day', '1Y', self.data), model)
+        self.assertEqual(_CountingModel.trainings, 3)
+
+    def test_retrains_when_too_old(self):
+        self.registry.max_age = 0.0
+        self.registry.get('NVDA', 'day', '1Y', self.data)
+        self.registry.get('NVDA', 'day', '1Y', self.data)
+        self.assertEqual(_CountingModel.trainings, 2)
+
+    def test_lru_and_memory_cap(self):
+        self.registry.max_entries = 2
+        for symbol in ['A', 'B', 'C']:
+            self.registry.get(symbol, 'day', '1Y', self.data)
+        self.assertEqual([entry.key[0] for entry in self.registry.entries.values()], ['B', 'C'])
+
+        self.registry.max_entries = 10
+        self.registry.get('B', 'day', '1Y', self.data)
+        self.registry.max_bytes = self.registry.lookup('B', 'day', '1Y').nbytes * 1.5
+        self.registry.get('D', 'day', '1Y', self.data)
+        self.assertEqual([entry.key[0] for entry in self.registry.entries.values()], ['D'])
+        self.assertLessEqual(self.registry.status()['bytes'], self.registry.max_bytes)
+
+    def test_concurrent_requests_train_once(self):
+        models = []
+        threads = [threading.Thread(target=lambda: models.append(self.registry.get('NVDA', 'day', '1Y', self.data)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(_CountingModel.trainings, 1)
+        self.assertTrue(all(model is models[0] for model in models))
+
+    def test_clear_during_training_keeps_key_lock(self):
+        release = threading.Event()
+
+        class _SlowModel(_CountingModel):
+            def train(self, data):
+                release.wait(5)
+                return super().train(data)
+
+        self.registry.model_types = {'default': _SlowModel}
+        models = []
+        first = threading.Thread(target=lambda: models.append(self.registry.get('NVDA', 'day', '1Y', self.data)))
+        first.start()
+        time.sleep(0.1)
+        self.registry.clear()
+        second = threading.Thread(target=lambda: models.append(self.registry.get('NVDA', 'day', '1Y', self.data)))
+        second.start()
+        time.sleep(0.1)
+        release.set()
+        first.join()
+        second.join()
+        self.assertEqual(self.registry.trainings, 1)
+        self.assertIs(models[0], models[1])
+        self.assertEqual(self.registry._key_locks, {})
+
+
+class _SmallForest(SKModel):
+    def __init__(self):
+        super().__init__(n_estimators=10, max_depth=4)
+
+
+class TestModelPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ModelStore(self.tmp.name)
+        rng = np.random.default_rng(4)
+        index = pd.date_range('2023-01-01', periods=200, freq='D')
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 200)))
+        self.data = pd.DataFrame({'Close': close, 'Volume': rng.integers(1000, 2000, 200)}, index=index)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _registry(self):
+        return ModelRegistry(model_types={'default': _SmallForest}, store=self.store)
+
+    def test_saved_model_round_trips_memory_mapped(self):
+        model = _SmallForest()
+        metrics = model.train(self.data)
+        path = os.path.join(self.tmp.name, 'model.joblib')
+        model.save(path, {'bars': len(self.data)})
+
+        loaded, metadata = _SmallForest.load(path)
+        self.assertEqual(metadata, {'bars': 200})
+        self.assertEqual(loaded.feature_columns, model.feature_columns)
+        self.assertEqual(loaded.metrics['rmse'], metrics['rmse'])
+        self.assertIsInstance(loaded.scaler.scale_, np.memmap)
+        # The trees themselves stay mapped, so processes share their pages
+        self.assertIsInstance(loaded.model.nodes, np.memmap)
+        self.assertIsInstance(loaded.model.values, np.memmap)
+        self.assertEqual(loaded.nbytes(), model.nbytes())
+
+        X = model.scaler.transform(model._create_features(self.data)[model.feature_columns].values)
+        np.testing.assert_allclose(loaded.model.predict(X), model.model.predict(X))
+        np.testing.assert_array_equal(loaded.model.to_sklearn().predict(X), model.model.predict(X))
+        self.assertEqual(loaded.predict(self.data).keys(), model.predict(self.data).keys())
+
+    def test_restart_reuses_saved_models(self):
+        first = self._registry()
+        model = first.get('NVDA', 'day', '1Y', self.data)
+        first.get('AMD', 'day', '1Y', self.data)
+        first.get('NVDA', 'day', '1Y', self.data)  # NVDA is now the hottest
+
+        restarted = self._registry()
+        self.assertEqual(restarted.warm_load(limit=1), 1)
+        self.assertEqual([entry.key for entry in restarted.entries.values()], [('NVDA', 'day', '1Y', 'default')])
+        self.assertEqual(restarted.get('nvda', 'day', '1Y', self.data).predict(self.data), model.predict(self.data))
+        restarted.get('AMD', 'day', '1Y', self.data)  # loaded from disk, not retrained
+        self.assertEqual(restarted.trainings, 0)
+
+        extended = pd.concat([self.data, self.data.iloc[-1:].set_axis([self.data.index[-1] + pd.Timedelta(days=1)])])
+        restarted.get('NVDA', 'day', '1Y', extended)  # new bar: updated in place of a retrain
+        self.assertEqual((restarted.trainings, restarted.updates), (0, 1))
+
+        restarted.clear(remove_saved=True)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_warm_load_reads_model_type_from_metadata(self):
+        first = ModelRegistry(model_types={'default': _SmallForest, 'random_forest': _SmallForest}, store=self.store)
+        first.get('BTC-USD', 'hour', '1M', self.data, 'random_forest')
+
+        restarted = ModelRegistry(model_types={'default': _SmallForest, 'random_forest': _SmallForest},
+                                  store=self.store)
+        self.assertEqual(restarted.warm_load(), 1)
+        self.assertEqual(list(restarted.entries), [('BTC-USD', 'hour', '1M', 'random_forest')])
+
+
+class TestIncrementalUpdate(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        index = pd.date_range('2022-01-01', periods=400, freq='D')
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))
+        self.data = pd.DataFrame({'Close': close, 'Volume': rng.integers(1000, 2000, 400)}, index=index)
+
+    def test_rolls_oldest_trees(self):
+        model = SKModel(n_estimators=20, max_depth=4)
+        model.train(self.data.iloc[:390])
+        original = model.copy()
+        oldest = model.model.estimators_[5:]
+
+        result = model.update(self.data, new_trees=5, window=100)
+        self.assertEqual(result['mode'], 'incremental')
+        self.assertEqual(len(model.model.estimators_), 20)
+        self.assertEqual(model.model.estimators_[:15], oldest)
+        self.assertEqual(len(original.model.estimators_), 20)
+        self.assertIsNot(original.model.estimators_[-1], model.model.estimators_[-1])
+        self.assertIs(model.scaler, original.scaler)
+        self.assertIn('1d', model.predict(self.data))
+
+        # A second update keeps growing from the updated forest, with new seeds
+        added = model.model.estimators_[15:]
+        model.update(self.data, new_trees=5, window=100)
+        self.assertEqual(model.model.n_estimators, 20)
+        self.assertNotEqual([tree.random_state for tree in model.model.estimators_[15:]],
+                            [tree.random_state for tree in added])
+        self.assertEqual(model.model.random_state, 42)
+
+    def test_small_window_retrains_with_reason(self):
+        model = SKModel(n_estimators=10, max_depth=4)
+        model.train(self.data.iloc[:390])
+        result = model.update(self.data, new_trees=5, window=6)
+        self.assertEqual(result['mode'], 'full')
+        self.assertEqual(result['reason'], 'only 6 recent rows for 5 new trees')
+
+    def test_scaler_drift_retrains(self):
+        model = SKModel(n_estimators=10, max_depth=4)
+        model.train(self.data.iloc[:300])
+        shifted = self.data.copy()
+        shifted.iloc[300:, 0] *= 3
+        original = model.copy()
+
+        result = model.update(shifted)
+        self.assertEqual((result['mode'], result['reason']), ('full', 'feature ranges drifted'))
+        self.assertIsNot(model.scaler, original.scaler)
+        self.assertGreater(model.scaler.data_max_[0], original.scaler.data_max_[0])
+        self.assertEqual(len(original.model.estimators_), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from statistics import NormalDist
+
+import numpy as np
+
+from app.utils.monte_carlo import DAILY_HORIZONS, HOURLY_HORIZONS, forecast_bands, horizons_for
+
+
+class TestMonteCarlo(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, 300)))
+
+    def test_gbm_matches_lognormal_quantiles(self):
+        forecast = forecast_bands(self.close, n_paths=40000, method='gbm', seed=1)
+        returns = np.diff(np.log(self.close[-253:]))
+        mu, sigma = returns.mean(), returns.std(ddof=1)
+        for label, bars in DAILY_HORIZONS.items():
+            band = forecast['bands'][label]
+            for q in (0.05, 0.5, 0.95):
+                z = NormalDist().inv_cdf(q)
+                expected = self.close[-1] * np.exp(mu * bars + z * sigma * np.sqrt(bars))
+                self.assertAlmostEqual(band[f"p{round(q * 100)}"] / expected, 1.0, delta=0.01)
+            self.assertLess(band['p5'], band['p25'])
+            self.assertLess(band['p75'], band['p95'])
+        self.assertEqual(forecast['paths'], 40000)
+
+    def test_bootstrap_reproducible_and_widening(self):
+        first = forecast_bands(self.close, n_paths=10000, chunk_size=3000, seed=7)
+        second = forecast_bands(self.close, n_paths=10000, chunk_size=3000, seed=7)
+        self.assertEqual(first['bands'], second['bands'])
+        widths = [first['bands'][label]['p95'] - first['bands'][label]['p5'] for label in DAILY_HORIZONS]
+        self.assertEqual(widths, sorted(widths))
+
+    def test_time_budget_stops_after_chunk(self):
+        forecast = forecast_bands(self.close, n_paths=50000, chunk_size=1000, time_budget=0.0, seed=2)
+        self.assertEqual(forecast['paths'], 1000)
+
+    def test_horizons_and_errors(self):
+        self.assertIs(horizons_for('hour'), HOURLY_HORIZONS)
+        self.assertEqual(horizons_for('day'), DAILY_HORIZONS)
+        self.assertEqual(horizons_for('day', continuous=True), {'1d': 1, '7d': 7, '30d': 30, '90d': 90})
+        self.assertEqual(horizons_for('week'), {'1d': 1, '7d': 1, '30d': 4, '90d': 13})
+        self.assertEqual(horizons_for('week', continuous=True), {'1d': 1, '7d': 1, '30d': 4, '90d': 13})
+        self.assertEqual(horizons_for('month'), {'1d': 1, '7d': 1, '30d': 1, '90d': 3})
+        self.assertEqual(horizons_for('5min'), {'1d': 78, '7d': 390, '30d': 1638, '90d': 4914})
+        self.assertEqual(horizons_for('5min', continuous=True), {'1d': 288, '7d': 2016, '30d': 8640, '90d': 25920})
+        self.assertEqual(set(forecast_bands(self.close, HOURLY_HORIZONS, n_paths=100)['bands']), set(HOURLY_HORIZONS))
+        long = forecast_bands(self.close, horizons_for('5min', continuous=True), n_paths=1000, seed=3)
+        self.assertEqual(long['paths'], 1000)
+        with self.assertRaises(ValueError):
+            forecast_bands(self.close, method='garch')
+        with self.assertRaises(ValueError):
+            forecast_bands(self.close[:2])
+
+
+if __name__ == '__main__':
+    unittest.main()
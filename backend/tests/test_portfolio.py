@@ -0,0 +1,76 @@
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.utils.portfolio import portfolio_backtest, rebalance_rows
+from app.utils.trading_strategy import momentum_trading_strategy
+
+
+def _loop_backtest(closes, rows, max_weight, cash_buffer, cost_bps, capital):
+    """Reference bar-by-bar simulation holding share counts."""
+    prices = closes.to_numpy()
+    signals = np.column_stack([momentum_trading_strategy(closes[[symbol]].rename(columns={symbol: 'Close'}))['signal']
+                               for symbol in closes.columns])
+    cash, shares, equity = capital, np.zeros(closes.shape[1]), []
+    for t in range(len(prices)):
+        value = cash + np.nansum(shares * prices[t])
+        if t in rows:
+            held = (signals[t] > 0) & np.isfinite(prices[t])
+            weights = np.where(held, (1 - cash_buffer) / max(held.sum(), 1), 0.0)
+            weights = np.minimum(weights, max_weight)
+            current = np.nan_to_num(shares * prices[t]) / value
+            value *= 1 - np.abs(weights - current).sum() * cost_bps / 1e4
+            shares = np.where(held, weights * value / np.where(held, prices[t], 1), 0.0)
+            cash = value - np.nansum(shares * prices[t])
+        equity.append(value)
+    return np.array(equity)
+
+
+class TestPortfolioBacktest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(21)
+        index = pd.date_range('2020-01-01', periods=300, freq='D')
+        prices = 50 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, (300, 6)), axis=0))
+        prices[:40, 5] = np.nan  # listed later
+        self.closes = pd.DataFrame(prices, index=index, columns=[f"S{i}" for i in range(6)])
+
+    def test_matches_loop_simulation(self):
+        for rebalance, max_weight, cash_buffer in [(10, 1.0, 0.0), ('M', 0.25, 0.1), (1, 0.5, 0.0)]:
+            frame, weights, summary = portfolio_backtest(self.closes, rebalance=rebalance, fee_bps=10,
+                                                         slippage_bps=5, max_weight=max_weight,
+                                                         cash_buffer=cash_buffer)
+            rows = set(rebalance_rows(self.closes.index, rebalance))
+            expected = _loop_backtest(self.closes, rows, max_weight, cash_buffer, 15, 10000)
+            np.testing.assert_allclose(frame['equity'], expected, rtol=1e-10)
+            self.assertTrue((weights.sum(axis=1) <= 1 - cash_buffer + 1e-12).all())
+            self.assertTrue((weights <= max_weight).all().all())
+            self.assertAlmostEqual(summary['final_equity'], expected[-1], places=6)
+            self.assertEqual(summary['rebalances'], len(rows))
+
+    def test_costs_reduce_equity(self):
+        free, _, free_summary = portfolio_backtest(self.closes, rebalance=5, fee_bps=0, slippage_bps=0)
+        costly, _, summary = portfolio_backtest(self.closes, rebalance=5)
+        self.assertEqual(free_summary['fees'], 0)
+        self.assertGreater(summary['fees'], 0)
+        self.assertTrue((costly['equity'] <= free['equity'] + 1e-9).all())
+
+    def test_monthly_rebalance_rows(self):
+        rows = rebalance_rows(self.closes.index, 'M')
+        self.assertEqual(list(self.closes.index[rows].day), [1] * len(rows))
+        self.assertEqual(list(rebalance_rows(self.closes.index, '100')), [0, 100, 200])
+
+    def test_large_universe_is_fast(self):
+        rng = np.random.default_rng(1)
+        index = pd.bdate_range('2014-01-01', periods=2520)
+        closes = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (2520, 500)), axis=0)), index=index)
+        started = time.perf_counter()
+        frame, _, _ = portfolio_backtest(closes, rebalance='W')
+        self.assertLess(time.perf_counter() - started, 5.0)
+        self.assertEqual(len(frame), 2520)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from app.models.model_registry import model_registry
+from app.models.model_store import ModelStore
+from app.utils import market_data, trading_strategy
+from app.utils.bar_store import BarStore
+from app.utils.prefetch import PrefetchScheduler, next_bar_close, parse_watchlist
+from app.utils.streaming_signals import stream_key, streaming_signals
+
+
+class TestPrefetchScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.original_store = trading_strategy.bar_store
+        trading_strategy.bar_store = BarStore(self.root)
+        market_data.set_provider(market_data.ReplayProvider(self.root))
+        trading_strategy.clear_frame_cache()
+        self.original_model_store = model_registry.store
+        model_registry.store = ModelStore(self.root)
+
+    def tearDown(self):
+        model_registry.store = self.original_model_store
+        model_registry.clear()
+        streaming_signals.clear()
+        trading_strategy.bar_store = self.original_store
+        market_data.set_provider(None)
+        trading_strategy.clear_frame_cache()
+        shutil.rmtree(self.root)
+
+    def test_parse_watchlist(self):
+        self.assertEqual(parse_watchlist('nvda:day:1Y, BTC:hour:1M,AAPL'), [
+            ('NVDA', 'day', '1Y'), ('BTC', 'hour', '1M'), ('AAPL', 'day', '1Y')
+        ])
+
+    def test_next_bar_close(self):
+        now = pd.Timestamp('2024-01-03 10:07:12')
+        self.assertEqual(next_bar_close('5min', now), pd.Timestamp('2024-01-03 10:10'))
+        self.assertEqual(next_bar_close('hour', now), pd.Timestamp('2024-01-03 11:00'))
+        self.assertEqual(next_bar_close('day', now), pd.Timestamp('2024-01-04'))
+        self.assertEqual(next_bar_close('week', now), pd.Timestamp('2024-01-08'))
+        self.assertEqual(next_bar_close('hour', pd.Timestamp('2024-01-03 11:00')),
+                         pd.Timestamp('2024-01-03 12:00'))
+
+    def test_refresh_warms_model_for_latest_bar(self):
+        scheduler = PrefetchScheduler([('NVDA', 'day', '1Y')])
+        entry = scheduler.entries[('NVDA', 'day', '1Y')]
+        scheduler.refresh(entry)
+
+        self.assertIsNone(entry.error)
+        self.assertIsNotNone(entry.predictions)
+        data = trading_strategy.fetch_stock_data('NVDA', '1Y', 'day')
+        # Requests find the model and signals the scheduler warmed
+        registered = model_registry.lookup('nvda', 'day', '1Y')
+        self.assertIs(registered.model, entry.model)
+        self.assertEqual(registered.last_bar, data.index[-1])
+        self.assertIn((stream_key('nvda', '1Y', 'day'), 5, 20), streaming_signals._states)
+        self.assertIsNotNone(scheduler.status()[0]['last_refresh'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.utils import market_data, trading_strategy
+from app.utils.bar_store import BarStore
+from app.utils.resample import resample_bars
+
+
+class CountingReplayProvider(market_data.ReplayProvider):
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.intervals = []
+
+    def download(self, symbol, start, end, interval):
+        self.intervals.append(interval)
+        return super().download(symbol, start, end, interval)
+
+
+class TestResampleBars(unittest.TestCase):
+
+    def test_hourly_from_half_hourly_keeps_session_offset(self):
+        index = pd.date_range('2024-01-02 09:30', periods=4, freq='30min', tz='America/New_York')
+        bars = pd.DataFrame({
+            'Open': [1.0, 2.0, 3.0, 4.0],
+            'High': [1.5, 2.8, 3.5, 4.5],
+            'Low': [0.5, 1.5, 2.5, 3.9],
+            'Close': [2.0, 3.0, 4.0, 5.0],
+            'Volume': [10.0, 20.0, 30.0, 40.0],
+        }, index=index)
+        hourly = resample_bars(bars, '1h')
+
+        self.assertEqual(list(hourly.index.strftime('%H:%M')), ['09:30', '10:30'])
+        self.assertEqual(hourly['Open'].tolist(), [1.0, 3.0])
+        self.assertEqual(hourly['High'].tolist(), [2.8, 4.5])
+        self.assertEqual(hourly['Low'].tolist(), [0.5, 2.5])
+        self.assertEqual(hourly['Close'].tolist(), [3.0, 5.0])
+        self.assertEqual(hourly['Volume'].tolist(), [30.0, 70.0])
+
+    def test_weekly_bars_start_on_monday(self):
+        index = pd.date_range('2024-01-01', periods=14, freq='D')
+        bars = pd.DataFrame({'Close': np.arange(14.0), 'Volume': np.ones(14)}, index=index)
+        weekly = resample_bars(bars, '1wk')
+        self.assertTrue((weekly.index.dayofweek == 0).all())
+        self.assertEqual(weekly['Close'].tolist(), [6.0, 13.0])
+        self.assertEqual(weekly['Volume'].tolist(), [7.0, 7.0])
+
+
+class TestDerivedIntervals(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.original_store = trading_strategy.bar_store
+        trading_strategy.bar_store = BarStore(self.root)
+        self.provider = CountingReplayProvider(self.root)
+        market_data.set_provider(self.provider)
+        trading_strategy.clear_frame_cache()
+
+    def tearDown(self):
+        trading_strategy.bar_store = self.original_store
+        market_data.set_provider(None)
+        trading_strategy.clear_frame_cache()
+        shutil.rmtree(self.root)
+
+    def test_switching_to_coarser_interval_needs_no_download(self):
+        daily = trading_strategy.fetch_stock_data('NVDA', '1Y', 'day')
+        downloads = len(self.provider.intervals)
+
+        weekly = trading_strategy.fetch_stock_data('NVDA', '1Y', 'week')
+        monthly = trading_strategy.fetch_stock_data('NVDA', '1Y', 'month')
+
+        self.assertEqual(len(self.provider.intervals), downloads)
+        self.assertEqual(weekly['Volume'].sum(), daily['Volume'].sum())
+        self.assertEqual(monthly['High'].max(), daily['High'].max())
+
+
+if __name__ == '__main__':
+    unittest.main()
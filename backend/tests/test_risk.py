@@ -0,0 +1,67 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from app.utils import risk as risk_module
+from app.utils.risk import clear_risk_cache, risk_metrics, risk_summary
+
+
+class TestRiskMetrics(unittest.TestCase):
+
+    def setUp(self):
+        clear_risk_cache()
+        rng = np.random.default_rng(12)
+        index = pd.date_range('2022-01-03', periods=400, freq='D')
+        market = rng.normal(0.0002, 0.01, 400)
+        own = 1.3 * market + rng.normal(0, 0.006, 400)
+        self.benchmark = pd.DataFrame({'Close': 400 * np.exp(market.cumsum())}, index=index)
+        self.data = pd.DataFrame({'Close': 80 * np.exp(own.cumsum())}, index=index)
+
+    def tearDown(self):
+        clear_risk_cache()
+
+    def test_matches_pandas_rolling(self):
+        risk = risk_metrics(self.data, self.benchmark, window=63)
+        returns = self.data['Close'].pct_change()
+        market = self.benchmark['Close'].pct_change()
+        rolling = returns.rolling(63)
+
+        np.testing.assert_allclose(risk['volatility'].iloc[63:], (rolling.std() * np.sqrt(252)).iloc[63:])
+        np.testing.assert_allclose(risk['sharpe'].iloc[63:],
+                                   (rolling.mean() / rolling.std() * np.sqrt(252)).iloc[63:])
+        np.testing.assert_allclose(risk['var_historical'].iloc[63:], -rolling.quantile(0.05).iloc[63:])
+        beta = returns.rolling(63).cov(market) / market.rolling(63).var()
+        np.testing.assert_allclose(risk['beta'].iloc[63:], beta.iloc[63:])
+        self.assertTrue(risk['sharpe'].iloc[:31].isna().all())
+
+        drawdown = self.data['Close'] / self.data['Close'].cummax() - 1
+        np.testing.assert_allclose(risk['drawdown'], drawdown)
+
+    def test_summary(self):
+        summary = risk_summary(risk_metrics(self.data, self.benchmark))
+        self.assertLess(summary['max_drawdown'], 0)
+        self.assertGreater(summary['var_historical'], 0)
+        self.assertAlmostEqual(summary['beta'], 1.3, delta=0.3)
+        self.assertNotIn('beta', risk_summary(risk_metrics(self.data)))
+
+    def test_cached_with_bars(self):
+        with mock.patch.object(risk_module, 'rolling_risk_arrays', wraps=risk_module.rolling_risk_arrays) as calls:
+            risk_metrics(self.data, self.benchmark)
+            risk_metrics(self.data.copy(), self.benchmark.copy())
+            self.assertEqual(calls.call_count, 1)
+
+            extended = pd.concat([self.data, pd.DataFrame({'Close': [90.0]}, index=[pd.Timestamp('2023-02-07')])])
+            risk_metrics(extended, self.benchmark)
+            self.assertEqual(calls.call_count, 2)
+
+    def test_benchmark_aligned_by_day(self):
+        local = self.data.tz_localize('America/New_York')
+        utc = self.benchmark.tz_localize('UTC')
+        risk = risk_metrics(local, utc, window=63)
+        np.testing.assert_allclose(risk['beta'].iloc[63:], risk_metrics(self.data, self.benchmark, window=63)['beta'].iloc[63:])
+
+
+if __name__ == '__main__':
+    unittest.main()
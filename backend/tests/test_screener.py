@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.utils.screener import align_closes, screen
+from app.utils.trading_strategy import momentum_trading_strategy
+
+
+class TestScreener(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        index = pd.date_range('2023-01-02', periods=250, freq='D')
+        self.frames = {
+            symbol: pd.DataFrame({'Close': 50 * np.exp(rng.normal(0, 0.02, 250).cumsum())}, index=index)
+            for symbol in ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+        }
+
+    def test_matches_per_symbol_pipeline(self):
+        result = screen(align_closes(self.frames))
+        for symbol, frame in self.frames.items():
+            signals = momentum_trading_strategy(frame)
+            row = result.loc[symbol]
+            self.assertEqual(row['state'], 'long' if signals['signal'].iloc[-1] == 1 else 'flat')
+            self.assertAlmostEqual(row['short_mavg'], signals['short_mavg'].iloc[-1])
+
+            last = signals['positions'].iloc[-1]
+            expected = {1.0: 'buy', -1.0: 'sell'}.get(last)
+            if expected is None:
+                self.assertTrue(pd.isna(row['trigger']))
+            else:
+                self.assertEqual(row['trigger'], expected)
+
+            crosses = np.flatnonzero(signals['positions'].fillna(0).to_numpy() != 0)
+            self.assertEqual(row['bars_since_cross'], len(frame) - 1 - crosses[-1])
+
+            close = frame['Close']
+            self.assertAlmostEqual(row['momentum'], close.iloc[-1] / close.iloc[-21] - 1)
+            expected_vol = close.pct_change().iloc[-20:].std() * np.sqrt(252)
+            self.assertAlmostEqual(row['volatility'], expected_vol)
+
+    def test_ranks(self):
+        result = screen(align_closes(self.frames))
+        self.assertEqual(result.loc[result['momentum'].idxmax(), 'momentum_rank'], 1)
+        self.assertEqual(result.loc[result['volatility'].idxmin(), 'volatility_rank'], 1)
+        self.assertEqual(sorted(result['momentum_rank']), [1, 2, 3, 4, 5])
+
+    def test_align_by_day(self):
+        crypto = pd.DataFrame({'Close': [1.0, 2.0, 3.0]},
+                              index=pd.date_range('2024-01-05', periods=3, freq='D', tz='UTC'))
+        equity = pd.DataFrame({'Close': [10.0, 11.0]},
+                              index=pd.DatetimeIndex(['2024-01-05', '2024-01-08']).tz_localize('America/New_York'))
+        closes = align_closes({'BTC': crypto, 'SPY': equity}, by_day=True)
+        self.assertEqual(len(closes), 4)
+        self.assertEqual(list(closes['SPY']), [10.0, 10.0, 10.0, 11.0])
+        self.assertEqual(list(closes['BTC']), [1.0, 2.0, 3.0, 3.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
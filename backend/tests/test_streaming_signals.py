@@ -0,0 +1,96 @@
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.utils.streaming_signals import RollingMean, StreamingSignalCache
+from app.utils.trading_strategy import momentum_trading_strategy
+
+
+class TestStreamingSignals(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        index = pd.date_range('2024-01-01', periods=800, freq='h')
+        close = 100 * np.exp(rng.normal(0, 0.01, 800).cumsum())
+        close[300:340] = close[300]  # flat stretch exercises repeated-value handling
+        self.data = pd.DataFrame({'Close': close}, index=index)
+        self.cache = StreamingSignalCache()
+
+    def test_rolling_mean_matches_pandas_exactly(self):
+        close = self.data['Close']
+        rolling = RollingMean(20)
+        streamed = np.array([rolling.update(price) for price in close.to_numpy()])
+        np.testing.assert_array_equal(streamed, close.rolling(20).mean().to_numpy())
+
+    def test_bar_by_bar_updates_match_batch(self):
+        signals = self.cache.update('NVDA', self.data.iloc[:100])
+        for end in range(101, len(self.data) + 1):
+            signals = self.cache.update('NVDA', self.data.iloc[:end])
+        pd.testing.assert_frame_equal(signals, momentum_trading_strategy(self.data), check_exact=False, rtol=1e-12)
+
+    def test_revised_last_bar(self):
+        self.cache.update('NVDA', self.data.iloc[:500], 10, 50)
+        revised = self.data.iloc[:500].copy()
+        revised.iloc[-1, 0] *= 1.05
+        signals = self.cache.update('NVDA', revised, 10, 50)
+        pd.testing.assert_frame_equal(signals, momentum_trading_strategy(revised, 10, 50),
+                                      check_exact=False, rtol=1e-12)
+
+        extended = pd.concat([revised, self.data.iloc[500:]])
+        signals = self.cache.update('NVDA', extended, 10, 50)
+        pd.testing.assert_frame_equal(signals, momentum_trading_strategy(extended, 10, 50),
+                                      check_exact=False, rtol=1e-12)
+
+    def test_trims_when_history_start_moves(self):
+        self.cache.update('NVDA', self.data.iloc[:400])
+        state = self.cache._states[('NVDA', 5, 20)]
+        shifted = self.data.iloc[50:450]
+        pd.testing.assert_frame_equal(self.cache.update('NVDA', shifted), momentum_trading_strategy(shifted),
+                                      check_exact=False, rtol=1e-12)
+        self.assertIs(self.cache._states[('NVDA', 5, 20)], state)
+
+        # No overlap left: rebuilt
+        moved = self.data.iloc[600:]
+        pd.testing.assert_frame_equal(self.cache.update('NVDA', moved), momentum_trading_strategy(moved),
+                                      check_exact=False, rtol=1e-12)
+
+    def test_signals_match_batch_on_tick_rounded_prices(self):
+        # Flat stretches of prices on a 0.01 grid make the averages tie
+        # often, where last-bit differences would flip signals
+        rng = np.random.default_rng(1)
+        close = np.round(30000 + np.cumsum(rng.choice([-0.01, 0, 0, 0, 0.01], 6000)), 2)
+        data = pd.DataFrame({'Close': close}, index=pd.date_range('2024-01-01', periods=6000, freq='min'))
+
+        for end in range(500, len(data) + 1, 7):
+            signals = self.cache.update('BTC-USD', data.iloc[:end])
+        expected = momentum_trading_strategy(data.iloc[:end])
+        pd.testing.assert_frame_equal(signals[['signal', 'positions']], expected[['signal', 'positions']])
+        pd.testing.assert_frame_equal(signals, expected, check_exact=False, rtol=1e-12)
+
+        # A history start moving forward by more bars than are added each poll
+        for step in range(1, 40):
+            moved = data.iloc[step * 50:4000 + step * 7]
+            signals = self.cache.update('ETH-USD', moved)
+            expected = momentum_trading_strategy(moved)
+            pd.testing.assert_frame_equal(signals[['signal', 'positions']], expected[['signal', 'positions']])
+
+    def test_cold_start_is_vectorized(self):
+        rng = np.random.default_rng(7)
+        index = pd.date_range('2020-01-01', periods=40000, freq='h')
+        data = pd.DataFrame({'Close': 100 * np.exp(rng.normal(0, 0.01, 40000).cumsum())}, index=index)
+        started = time.perf_counter()
+        signals = self.cache.update('BTC-USD', data)
+        self.assertLess(time.perf_counter() - started, 0.5)
+        pd.testing.assert_frame_equal(signals, momentum_trading_strategy(data), check_exact=False, rtol=1e-12)
+
+    def test_states_are_bounded(self):
+        cache = StreamingSignalCache(max_states=2)
+        for stream in ['A', 'B', 'C']:
+            cache.update(stream, self.data.iloc[:50])
+        self.assertEqual(len(cache._states), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
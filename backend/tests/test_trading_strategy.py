@@ -0,0 +1,193 @@
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.utils import market_data, trading_strategy
+from app.utils.bar_store import BarStore
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_identical_calls_share_one_fetch(self):
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return pd.DataFrame({'Close': [1.0, 2.0]})
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                trading_strategy._single_flight(('NVDA', '1Y', 'day'), slow_fetch)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(trading_strategy._inflight, {})
+
+    def test_errors_propagate_and_are_not_cached(self):
+        def failing_fetch():
+            raise ValueError("upstream down")
+
+        with self.assertRaises(ValueError):
+            trading_strategy._single_flight(('NVDA', '1Y', 'day'), failing_fetch)
+        result = trading_strategy._single_flight(
+            ('NVDA', '1Y', 'day'), lambda: pd.DataFrame({'Close': [1.0]}))
+        self.assertEqual(len(result), 1)
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.original_fetch = trading_strategy._fetch_stock_data
+        trading_strategy._fetch_stock_data = self.fetch
+        trading_strategy.clear_frame_cache()
+
+    def tearDown(self):
+        trading_strategy._fetch_stock_data = self.original_fetch
+        trading_strategy.clear_frame_cache()
+
+    def fetch(self, symbol, timeframe, interval, include_today=False):
+        self.calls.append(symbol)
+        time.sleep(0.1)
+        return pd.DataFrame({'Close': [float(len(self.calls))]})
+
+    def age_cache(self, seconds):
+        for key, (frame, fetched_at) in trading_strategy._frame_cache.items():
+            trading_strategy._frame_cache[key] = (frame, fetched_at - seconds)
+
+    def test_fresh_frames_are_served_from_memory(self):
+        trading_strategy.fetch_stock_data('NVDA', '1Y', 'day')
+        trading_strategy.fetch_stock_data('NVDA', '1Y', 'day')
+        self.assertEqual(len(self.calls), 1)
+
+    def test_stale_frame_is_returned_and_refreshed_in_background(self):
+        trading_strategy.fetch_stock_data('NVDA', '1Y', '5min')
+        self.age_cache(trading_strategy.CHART_CACHE_FRESHNESS['5min'][0] + 1)
+
+        stale = trading_strategy.fetch_stock_data('NVDA', '1Y', '5min', stale_ok=True)
+        self.assertEqual(stale['Close'].iloc[0], 1.0)
+
+        time.sleep(0.3)
+        self.assertEqual(len(self.calls), 2)
+        refreshed = trading_strategy.fetch_stock_data('NVDA', '1Y', '5min', stale_ok=True)
+        self.assertEqual(refreshed['Close'].iloc[0], 2.0)
+
+    def test_stale_frame_is_not_served_without_stale_ok(self):
+        trading_strategy.fetch_stock_data('NVDA', '1Y', '5min')
+        self.age_cache(trading_strategy.CHART_CACHE_FRESHNESS['5min'][0] + 1)
+        data = trading_strategy.fetch_stock_data('NVDA', '1Y', '5min')
+        self.assertEqual(data['Close'].iloc[0], 2.0)
+
+    def test_frame_past_grace_window_is_refetched(self):
+        trading_strategy.fetch_stock_data('NVDA', '1Y', '5min')
+        self.age_cache(sum(trading_strategy.CHART_CACHE_FRESHNESS['5min']) + 1)
+        data = trading_strategy.fetch_stock_data('NVDA', '1Y', '5min', stale_ok=True)
+        self.assertEqual(data['Close'].iloc[0], 2.0)
+
+
+class TestMomentumTradingStrategy(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2024-01-01', periods=120, freq='D')
+        self.frames = {
+            symbol: pd.DataFrame({'Close': 100 + rng.normal(0, 1, len(index)).cumsum()}, index=index)
+            for symbol in ['AAPL', 'MSFT', 'NVDA']
+        }
+        # A symbol trading on a different calendar forms its own group
+        crypto_index = pd.date_range('2024-01-03', periods=90, freq='D')
+        self.frames['BTC'] = pd.DataFrame(
+            {'Close': 100 + rng.normal(0, 1, len(crypto_index)).cumsum()}, index=crypto_index)
+
+    def test_signals_are_generated(self):
+        signals = trading_strategy.momentum_trading_strategy(self.frames['AAPL'])
+        self.assertTrue(signals['signal'].iloc[:5].eq(0).all())
+        self.assertGreater(signals['signal'].sum(), 0)
+        self.assertTrue(signals['positions'].dropna().isin([-1.0, 0.0, 1.0]).all())
+
+    def test_grouped_matches_per_symbol(self):
+        grouped = trading_strategy.momentum_trading_strategy_grouped(self.frames)
+        for symbol, frame in self.frames.items():
+            expected = trading_strategy.momentum_trading_strategy(frame)
+            pd.testing.assert_frame_equal(grouped[symbol], expected, check_names=False)
+
+
+class TestFetchStockData(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.original_store = trading_strategy.bar_store
+        trading_strategy.bar_store = BarStore(self.root)
+        market_data.set_provider(market_data.ReplayProvider(self.root))
+        trading_strategy.clear_frame_cache()
+
+    def tearDown(self):
+        trading_strategy.bar_store = self.original_store
+        market_data.set_provider(None)
+        trading_strategy.clear_frame_cache()
+        shutil.rmtree(self.root)
+
+    def test_fetch_offline(self):
+        data = trading_strategy.fetch_stock_data('NVDA', '3M', 'day')
+        self.assertGreater(len(data), 50)
+        self.assertEqual(list(data.columns), market_data.PRICE_COLUMNS)
+
+    def test_batch_matches_single(self):
+        frames, errors = trading_strategy.fetch_stock_data_batch(['NVDA', 'BTC'], '1M', 'hour')
+        self.assertEqual(errors, {})
+        for symbol in ['NVDA', 'BTC']:
+            single = trading_strategy.fetch_stock_data(symbol, '1M', 'hour')
+            pd.testing.assert_frame_equal(frames[symbol], single, check_freq=False, check_index_type=False)
+
+    def test_include_today_fetches_current_session(self):
+        today = pd.Timestamp.now().normalize()
+        data = trading_strategy.fetch_stock_data('BTC', '1M', 'hour')
+        self.assertLess(data.index[-1], today)
+
+        data = trading_strategy.fetch_stock_data('BTC', '1M', 'hour', force_refresh=True, include_today=True)
+        self.assertEqual(data.index[-1].normalize(), today)
+        # Daily bars still end with the last completed day
+        _, _, _, end_date = trading_strategy._resolve_request('BTC', '1M', 'day', include_today=True)
+        self.assertEqual(end_date, today)
+
+    def test_start_stays_inside_provider_history(self):
+        class LimitedProvider(market_data.ReplayProvider):
+            def max_history_days(self, interval):
+                return market_data.YFinanceProvider.HISTORY_DAYS.get(interval)
+
+        market_data.set_provider(LimitedProvider(self.root))
+        for timeframe, interval, limit in [('2Y', 'hour', 730), ('5Y', 'hour', 730), ('1M', 'minute', 30)]:
+            started = pd.Timestamp.now()
+            _, _, start_date, _ = trading_strategy._resolve_request('NVDA', timeframe, interval)
+            self.assertGreater(start_date, started - pd.Timedelta(days=limit))
+
+    def test_batch_accepts_lowercase_symbols(self):
+        class UpperCaseProvider(market_data.ReplayProvider):
+            # Like Yahoo, results are keyed by upper-case tickers
+            def download_many(self, symbols, start, end, interval):
+                return {symbol.upper(): frame
+                        for symbol, frame in super().download_many(symbols, start, end, interval).items()}
+
+        market_data.set_provider(UpperCaseProvider(self.root))
+        frames, errors = trading_strategy.fetch_stock_data_batch(['nvda', 'btc'], '1M', 'day')
+        self.assertEqual(errors, {})
+        self.assertEqual(sorted(frames), ['btc', 'nvda'])
+        pd.testing.assert_frame_equal(frames['nvda'], trading_strategy.fetch_stock_data('NVDA', '1M', 'day'),
+                                      check_freq=False, check_index_type=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from app.utils import ma_sweep
+from app.utils.backtest import backtest_signals
+from app.utils.trading_strategy import momentum_trading_strategy
+from app.utils.walk_forward import fold_bounds, walk_forward_optimize
+
+
+class TestWalkForward(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        index = pd.date_range('2019-01-01', periods=900, freq='D')
+        self.data = pd.DataFrame({'Close': 100 * np.exp(rng.normal(0.0003, 0.015, 900).cumsum())}, index=index)
+        self.pairs = [(5, 20), (10, 50), (20, 100)]
+
+    def test_fold_bounds(self):
+        self.assertEqual(fold_bounds(10, 4, 3), [(0, 4, 7), (3, 7, 10)])
+        self.assertEqual(fold_bounds(10, 4, 3, anchored=True), [(0, 4, 7), (0, 7, 10)])
+
+    def test_folds_pick_best_in_sample_pair(self):
+        result = walk_forward_optimize(self.data, 300, 100, self.pairs, metric='total_return')
+        self.assertEqual(len(result.folds), 6)
+        self.assertEqual(len(result.backtest), 600)
+
+        fold = result.folds.iloc[2]
+        in_sample = self.data.iloc[:fold_bounds(900, 300, 100)[2][1]]
+        returns = {}
+        for short_window, long_window in self.pairs:
+            frame, _ = backtest_signals(momentum_trading_strategy(in_sample, short_window, long_window))
+            returns[(short_window, long_window)] = np.prod(1 + frame['net_returns'].iloc[200:]) - 1
+        self.assertEqual((fold['short_window'], fold['long_window']), max(returns, key=returns.get))
+
+    def test_single_pair_matches_plain_backtest(self):
+        result = walk_forward_optimize(self.data, 300, 100, [(10, 50)])
+        frame, _ = backtest_signals(momentum_trading_strategy(self.data, 10, 50))
+        np.testing.assert_allclose(result.backtest['net_returns'].to_numpy()[1:],
+                                   frame['net_returns'].to_numpy()[301:], atol=1e-12)
+        self.assertEqual(set(result.backtest['short_window']), {10})
+
+    def test_parallel_matches_serial(self):
+        serial = walk_forward_optimize(self.data, 200, 50, self.pairs, workers=1)
+        parallel = walk_forward_optimize(self.data, 200, 50, self.pairs, workers=4)
+        pd.testing.assert_frame_equal(serial.folds, parallel.folds)
+        self.assertEqual(serial.summary, parallel.summary)
+
+    def test_chunked_pairs_match(self):
+        whole = walk_forward_optimize(self.data, 200, 50, self.pairs)
+        with mock.patch.object(ma_sweep, 'SWEEP_CHUNK_CELLS', len(self.data)):
+            chunked = walk_forward_optimize(self.data, 200, 50, self.pairs)
+        pd.testing.assert_frame_equal(whole.folds, chunked.folds)
+        self.assertEqual(whole.summary, chunked.summary)
+
+
+if __name__ == '__main__':
+    unittest.main()